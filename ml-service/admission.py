@@ -0,0 +1,118 @@
+import math
+import threading
+import time
+from contextlib import contextmanager
+
+# Admission control: per-class concurrency limits with bounded waiting.
+#
+# Requests are split into classes (interactive single-meal predictions vs.
+# bulk batch/plan scoring), each with its own concurrency limit and queue,
+# so a burst of bulk work can never take the slots the interactive calls
+# need. A request that would have to wait is queued only if the queue has
+# room and its estimated wait (queue position x recent service time /
+# concurrency) is within the class's max wait; otherwise it is shed at once
+# with Overloaded, which the app turns into 503 + Retry-After. A queued
+# request that still hasn't started after max wait is shed as well.
+
+class Overloaded(Exception):
+    """Raised instead of queueing a request the class can't serve in time"""
+
+    def __init__(self, class_name, reason, retry_after):
+        super().__init__(f'{class_name} requests overloaded ({reason})')
+        self.class_name = class_name
+        self.reason = reason
+        self.retry_after = retry_after
+
+class AdmissionClass:
+    """Concurrency slots and a bounded wait queue for one class of requests"""
+
+    # Weight of the latest request in the service time average
+    EWMA_WEIGHT = 0.1
+
+    def __init__(self, name, max_concurrent, max_queue, max_wait_ms):
+        self.name = name
+        self.max_concurrent = max(1, int(max_concurrent))
+        self.max_queue = max(0, int(max_queue))
+        self.max_wait = float(max_wait_ms) / 1000
+        self.active = 0
+        self.queued = 0
+        self.admitted = 0
+        self.shed = {'queue_full': 0, 'wait_estimate': 0, 'timeout': 0}
+        self.service_seconds = None
+        self._condition = threading.Condition()
+
+    def estimated_wait(self, position):
+        """Seconds until the request at queue position `position` (1-based) would start"""
+        return position * (self.service_seconds or 0.0) / self.max_concurrent
+
+    def _shed(self, reason, wait):
+        self.shed[reason] += 1
+        # Retry-After is whole seconds
+        return Overloaded(self.name, reason, max(1, math.ceil(wait)))
+
+    def acquire(self):
+        """Take a slot, waiting in the queue if allowed; raises Overloaded otherwise"""
+        with self._condition:
+            if self.active < self.max_concurrent and self.queued == 0:
+                self.active += 1
+                self.admitted += 1
+                return
+
+            wait = self.estimated_wait(self.queued + 1)
+            if self.queued >= self.max_queue:
+                raise self._shed('queue_full', wait)
+            if wait > self.max_wait:
+                raise self._shed('wait_estimate', wait)
+
+            self.queued += 1
+            deadline = time.monotonic() + self.max_wait
+            try:
+                while self.active >= self.max_concurrent:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise self._shed('timeout', self.estimated_wait(self.queued))
+                    self._condition.wait(remaining)
+            finally:
+                self.queued -= 1
+            self.active += 1
+            self.admitted += 1
+
+    def release(self, service_seconds):
+        with self._condition:
+            self.active -= 1
+            if self.service_seconds is None:
+                self.service_seconds = service_seconds
+            else:
+                self.service_seconds += self.EWMA_WEIGHT * (service_seconds - self.service_seconds)
+            self._condition.notify()
+
+    def stats(self):
+        return {
+            'max_concurrent': self.max_concurrent,
+            'max_queue': self.max_queue,
+            'max_wait_ms': self.max_wait * 1000,
+            'active': self.active,
+            'queue_depth': self.queued,
+            'admitted': self.admitted,
+            'shed': dict(self.shed),
+            'service_ms': round(self.service_seconds * 1000, 3) if self.service_seconds is not None else None
+        }
+
+class AdmissionController:
+    """Named admission classes; slot(name) wraps one request"""
+
+    def __init__(self, classes):
+        self.classes = {admission_class.name: admission_class for admission_class in classes}
+
+    @contextmanager
+    def slot(self, class_name):
+        admission_class = self.classes[class_name]
+        admission_class.acquire()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            admission_class.release(time.perf_counter() - start)
+
+    def stats(self):
+        return {name: admission_class.stats() for name, admission_class in self.classes.items()}
@@ -1,50 +1,539 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify, stream_with_context
 from flask_cors import CORS
-import joblib
+import functools
+import hmac
+import numpy as np
 import os
+import threading
+import time
+
+from admission import AdmissionClass, AdmissionController, Overloaded
+from columnar import (CONTENT_TYPE, MSGPACK_AVAILABLE, decode_request, encode_response, is_columnar,
+                      items_to_columns, wants_columnar)
+from distill import predict_distilled
+from inference import (MACRO_TARGETS, lookup_entry, predict_components, predict_descriptions,
+                       predict_from_features, round_macros, transform_descriptions)
+from meal_types import MEAL_TYPES, normalize_meal_type
+from microbatch import MicroBatcher
+from model_registry import ModelRegistry, load_model_set
+from ndjson_stream import dumps_line, read_chunks
+from persistent_cache import PersistentCache
+from prediction_cache import PredictionCache, canonical_description
+from shadow import ShadowEvaluator
+from singleflight import SingleFlight
 
 app = Flask(__name__)
 CORS(app, resources={r"/*": {"origins": "*"}})
 
-# Load all 5 model sets on startup
+# How model sets are loaded at startup (model_registry.py):
+#   eager       - load all meal types concurrently before serving (default)
+#   background  - serve immediately; /health/ready turns 200 once loading finishes
+#   lazy        - load each meal type on its first request
+MODEL_LOADING = os.environ.get('MODEL_LOADING', 'eager')
+
+# Load all 5 model sets, concurrently
 print("Loading ML models...")
 
-model_types = ['breakfast', 'lunch', 'dinner', 'snacks', 'desserts']
-all_models = {}
-
-for meal_type in model_types:
-    print(f"  Loading {meal_type} models...")
-    all_models[meal_type] = {
-        'calories': joblib.load(f'{meal_type}/models/calories_model.joblib'),
-        'protein': joblib.load(f'{meal_type}/models/protein_model.joblib'),
-        'carbs': joblib.load(f'{meal_type}/models/carbs_model.joblib'),
-        'fat': joblib.load(f'{meal_type}/models/fat_model.joblib'),
-        'vectorizer': joblib.load(f'{meal_type}/models/vectorizer.joblib')
-    }
+# MEAL_TYPES serves a subset (e.g. "lunch,dinner" for one shard behind shard_router.py)
+model_types = [
+    meal_type for meal_type in MEAL_TYPES
+    if meal_type in os.environ.get('MEAL_TYPES', ','.join(MEAL_TYPES)).split(',')
+]
+registry = ModelRegistry(model_types)
+registry.start(MODEL_LOADING)
+
+# Pick up retrained models without a restart: reload a meal type once its
+# models directory has changed and then stayed unchanged for
+# MODEL_WATCH_SECONDS (0 disables watching). Each gunicorn worker watches
+# and swaps on its own (started from gunicorn.conf.py's post_worker_init,
+# so a preloading master never does); the new set passes a smoke test first.
+MODEL_WATCH_SECONDS = float(os.environ.get('MODEL_WATCH_SECONDS', 0))
+
+def start_model_watcher():
+    if MODEL_WATCH_SECONDS > 0:
+        registry.watch(MODEL_WATCH_SECONDS)
+
+# POST /admin/reload needs this in an X-Admin-Token header (unset disables it)
+ADMIN_TOKEN = os.environ.get('ADMIN_TOKEN')
+
+# Model sets that have finished loading (filled in as meal types become ready)
+all_models = registry.models
+
+if MODEL_LOADING == 'eager':
+    print(f"✅ Loaded {len(all_models)}/{len(model_types)} model sets!")
+else:
+    print(f"⏳ Model sets will load {'in the background' if MODEL_LOADING == 'background' else 'on first request'}")
+
+MAX_BATCH_SIZE = int(os.environ.get('MAX_BATCH_SIZE', 500))
+
+# /predict-stream predicts this many NDJSON lines at a time
+STREAM_CHUNK_SIZE = int(os.environ.get('STREAM_CHUNK_SIZE', 256))
+MAX_STREAM_LINE_BYTES = int(os.environ.get('MAX_STREAM_LINE_BYTES', 65536))
+
+# Recently scored meals, keyed by (model version, meal_type, canonical text);
+# PREDICTION_CACHE_SIZE=0 disables it
+prediction_cache = PredictionCache(int(os.environ.get('PREDICTION_CACHE_SIZE', 10000)))
+
+# Optional second tier shared by every worker and kept across restarts:
+# a SQLite file at PERSISTENT_CACHE_PATH (unset disables it)
+persistent_cache = None
+if os.environ.get('PERSISTENT_CACHE_PATH'):
+    persistent_cache = PersistentCache(
+        os.environ['PERSISTENT_CACHE_PATH'],
+        max_entries=int(os.environ.get('PERSISTENT_CACHE_SIZE', 200000))
+    )
+
+# Meals predicted for requests with a deadline, by the tier that answered
+tier_counts = {'full': 0, 'fast': 0}
+tier_counts_lock = threading.Lock()
+
+def count_tier(name, n_meals):
+    with tier_counts_lock:
+        tier_counts[name] += n_meals
+
+# Identical predictions (same cache key) in progress for several requests
+# at once are computed once (singleflight.py)
+in_flight = SingleFlight()
+
+# Coalesce concurrent single-meal predictions into per-meal-type batches
+# (microbatch.py): wait up to MICROBATCH_WINDOW_MS after the first queued
+# meal, or until MICROBATCH_MAX_ITEMS are queued. Needs a threaded server
+# (gunicorn GUNICORN_THREADS > 1) to see concurrent requests.
+microbatcher = None
+if os.environ.get('MICROBATCH', '0') == '1':
+    microbatcher = MicroBatcher(
+        lambda meal_type, meal_descriptions: predict_many_for_meal_type(meal_descriptions, meal_type),
+        window_ms=float(os.environ.get('MICROBATCH_WINDOW_MS', 2)),
+        max_items=int(os.environ.get('MICROBATCH_MAX_ITEMS', 32))
+    )
+
+# Admission control (admission.py): interactive single-meal calls and bulk
+# batch/plan scoring get separate concurrency limits and bounded queues;
+# requests that can't start within the class's max wait get 503 + Retry-After.
+# ADMISSION_CONTROL=0 admits everything. Limits apply per worker process, so
+# it only does anything with threaded workers (gunicorn GUNICORN_THREADS > 1);
+# sync workers never see two requests at once.
+def admission_class(name, concurrency, queue, max_wait_ms):
+    prefix = f'ADMISSION_{name.upper()}'
+    return AdmissionClass(
+        name,
+        max_concurrent=int(os.environ.get(f'{prefix}_CONCURRENCY', concurrency)),
+        max_queue=int(os.environ.get(f'{prefix}_QUEUE', queue)),
+        max_wait_ms=float(os.environ.get(f'{prefix}_MAX_WAIT_MS', max_wait_ms))
+    )
+
+admission = None
+if os.environ.get('ADMISSION_CONTROL', '1') == '1':
+    admission = AdmissionController([
+        admission_class('interactive', concurrency=32, queue=64, max_wait_ms=1000),
+        admission_class('bulk', concurrency=2, queue=8, max_wait_ms=10000),
+        # Streams hold their slot for the whole job: no queueing
+        admission_class('stream', concurrency=2, queue=0, max_wait_ms=0)
+    ])
+
+# Requests being served right now, counted whether or not admission control is on
+active_requests = 0
+active_requests_lock = threading.Lock()
+
+@app.before_request
+def count_request_start():
+    global active_requests
+    with active_requests_lock:
+        active_requests += 1
+
+@app.teardown_request
+def count_request_end(error=None):
+    # Streamed responses tear down once the stream is finished
+    global active_requests
+    with active_requests_lock:
+        active_requests -= 1
+
+# Shadow evaluation (shadow.py): candidate models in SHADOW_MODELS_DIR/<meal_type>/
+# (laid out like <meal_type>/models/) re-score a SHADOW_SAMPLE_RATE share of
+# newly computed predictions (not cache or lookup hits) in a background
+# thread, reported on /health. At most SHADOW_QUEUE_SIZE sampled requests
+# wait; later ones are dropped. Candidates are loaded and warmed here, at
+# startup (in the gunicorn master with preload_app), not during traffic.
+shadow = None
+if os.environ.get('SHADOW_MODELS_DIR'):
+    shadow_root = os.environ['SHADOW_MODELS_DIR']
+    shadow = ShadowEvaluator(
+        lambda meal_type: load_model_set(meal_type, model_dir=os.path.join(shadow_root, meal_type)),
+        [meal_type for meal_type in model_types if os.path.isdir(os.path.join(shadow_root, meal_type))],
+        sample_rate=float(os.environ.get('SHADOW_SAMPLE_RATE', 0.05)),
+        max_queue=int(os.environ.get('SHADOW_QUEUE_SIZE', 100)),
+        # Shadow chunks wait for a moment with no request in progress
+        busy=lambda: active_requests > 0
+    )
+    shadow.prepare()
+    print(f"👥 Shadow models for: {', '.join(sorted(shadow.meal_types)) or 'none'} ({shadow_root})")
+
+def admitted(class_name):
+    """Run the view inside an admission slot of class_name, or answer 503 when overloaded"""
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            if admission is None:
+                return view(*args, **kwargs)
+            try:
+                with admission.slot(class_name):
+                    return view(*args, **kwargs)
+            except Overloaded as e:
+                return overloaded_response(e)
+        return wrapper
+    return decorator
+
+def overloaded_response(error):
+    response = jsonify({'success': False, 'error': str(error), 'retry_after': error.retry_after})
+    response.headers['Retry-After'] = str(error.retry_after)
+    return response, 503
 
-print("✅ All models loaded!")
+# Word tokens of at least two characters: the analyzer canonical_description relies on
+DEFAULT_TOKEN_PATTERN = r'(?u)\b\w\w+\b'
 
-def predict_for_meal_type(meal_description, meal_type):
-    """Predict macros using the appropriate meal-type-specific model"""
+def get_models(meal_type):
+    """A meal type's model set, loading it first if it isn't ready yet"""
+    if meal_type not in model_types:
+        raise RuntimeError(f"{meal_type} models are not served here (MEAL_TYPES={','.join(model_types)})")
+    models = registry.get(meal_type)
+    if models is None:
+        raise RuntimeError(f"{meal_type} models are not loaded: {registry.status[meal_type]['error']}")
+    return models
+
+def cache_key(models, meal_type, meal_description):
+    """Prediction cache key; text is only canonicalized when the analyzer would ignore the difference"""
+    tfidf = models['tfidf']
+    if tfidf.lowercase and tfidf.token_pattern == DEFAULT_TOKEN_PATTERN:
+        meal_description = canonical_description(meal_description)
+    return (models['version'], meal_type, meal_description)
+
+def cached_predictions(keys):
+    """Cached {'predictions', 'source'} entries (or None) per key: in-process LRU first, then the shared tier"""
+    flat = [prediction_cache.get(key) for key in keys]
+    
+    if persistent_cache is not None:
+        misses = [key for key, result in zip(keys, flat) if result is None]
+        if misses:
+            shared = persistent_cache.get_many(misses)
+            for i, key in enumerate(keys):
+                if flat[i] is None and key in shared:
+                    flat[i] = shared[key]
+                    prediction_cache.put(key, shared[key])
+    
+    # Caches hold flat {macro: value, 'source': ...} rows
+    return [
+        None if row is None else {
+            'predictions': {target: row[target] for target in MACRO_TARGETS},
+            'source': row.get('source', 'model')
+        }
+        for row in flat
+    ]
+
+def store_predictions(items):
+    """Cache freshly computed [(key, entry)] in every tier"""
+    rows = [(key, dict(entry['predictions'], source=entry['source'])) for key, entry in items]
+    for key, row in rows:
+        prediction_cache.put(key, row)
+    if persistent_cache is not None:
+        persistent_cache.put_many(rows)
+
+def has_meal(data):
+    """Whether a JSON body is an object with a non-empty meal description"""
+    return isinstance(data, dict) and isinstance(data.get('meal'), str) and bool(data['meal'].strip())
+
+def request_deadline(data):
+    """Absolute time.perf_counter() deadline from the X-Deadline-Ms header or deadline_ms field, or None"""
+    budget = request.headers.get('X-Deadline-Ms', data.get('deadline_ms') if isinstance(data, dict) else None)
+    if budget is None:
+        return None
+    if isinstance(budget, bool):
+        # bool is an int: true would otherwise mean 1 ms
+        raise ValueError(f'Invalid deadline_ms: {budget!r}')
     try:
-        models = all_models[meal_type]
+        budget = float(budget)
+    except (TypeError, ValueError):
+        raise ValueError(f'Invalid deadline_ms: {budget!r}')
+    if not budget >= 0:
+        raise ValueError(f'Invalid deadline_ms: {budget!r}')
+    return time.perf_counter() + budget / 1000
+
+def full_tier_fits(models, n_meals, deadline):
+    """Whether the ensembles should finish n_meals before the deadline (by the warmup's cost estimate)"""
+    if deadline is None or 'full_cost' not in models:
+        return True
+    fixed, per_row = models['full_cost']
+    return fixed + per_row * n_meals <= deadline - time.perf_counter()
+
+def tier(entry):
+    """'fast' for answers from the distilled model, 'full' for everything else"""
+    return 'fast' if entry['source'] == 'distilled' else 'full'
+
+def stored_entries(models, meal_type, meal_descriptions):
+    """Lookup and cache hits per meal (None where a prediction is needed), plus the cache keys.
+
+    Exact lookup hits come first, then the prediction caches, then
+    near-duplicate lookups.
+    """
+    results = [lookup_entry(models, description, near=False) for description in meal_descriptions]
+    pending = [i for i, result in enumerate(results) if result is None]
+    
+    keys = {i: cache_key(models, meal_type, meal_descriptions[i]) for i in pending}
+    for i, entry in zip(pending, cached_predictions([keys[i] for i in pending])):
+        results[i] = entry or lookup_entry(models, meal_descriptions[i])
+    return results, keys
+
+def predict_many_for_meal_type(meal_descriptions, meal_type, deadline=None, cache=True):
+    """Predict macros for several meals of one type with a single transform/predict per macro.
+
+    Returns one {'predictions', 'source'} entry per meal. Stored macros and
+    cached predictions are used where available, and meals already being
+    predicted for another request are shared; only what is left is
+    predicted, in one batch (from the component table when COMPONENT_MODE is on).
+    If the ensembles can't finish before `deadline`, the rest comes from the
+    distilled model instead (source 'distilled', never cached). cache=False
+    reads the caches but doesn't fill them (bulk jobs would evict hot entries).
+    """
+    try:
+        models = get_models(meal_type)
         
-        # Transform to features
-        X = models['vectorizer'].transform([meal_description])
+        results, keys = stored_entries(models, meal_type, meal_descriptions)
+        misses = [i for i, result in enumerate(results) if result is None]
         
-        # Predict each macro
-        predictions = {
-            'calories': round(float(models['calories'].predict(X)[0]), 1),
-            'protein': round(float(models['protein'].predict(X)[0]), 1),
-            'carbs': round(float(models['carbs'].predict(X)[0]), 1),
-            'fat': round(float(models['fat'].predict(X)[0]), 1)
-        }
+        if misses and 'distilled' in models and not full_tier_fits(models, len(misses), deadline):
+            X = transform_descriptions(models, [meal_descriptions[i] for i in misses])
+            for i, row in zip(misses, predict_distilled(models, X)):
+                results[i] = {'predictions': round_macros(row), 'source': 'distilled'}
+            count_tier('fast', len(misses))
+            return results
+        if deadline is not None:
+            count_tier('full', len(misses))
+        
+        # Meals another request is already predicting are waited for, not recomputed
+        claims = [(i,) + in_flight.claim(keys[i]) for i in misses]
+        leading = [i for i, is_leader, _ in claims if is_leader]
+        
+        if leading:
+            # Predict all remaining descriptions at once
+            try:
+                entries = predict_descriptions(models, [meal_descriptions[i] for i in leading])
+                for i, entry in zip(leading, entries):
+                    results[i] = entry
+                if cache:
+                    store_predictions([(keys[i], results[i]) for i in leading])
+            except Exception as e:
+                for i in leading:
+                    in_flight.fail(keys[i], e)
+                raise
+            for i in leading:
+                in_flight.resolve(keys[i], results[i])
+            if shadow is not None:
+                # Only what this request predicted: hits were offered when first computed
+                shadow.offer(meal_type, [meal_descriptions[i] for i in leading], [results[i] for i in leading])
+        
+        for i, is_leader, future in claims:
+            if not is_leader:
+                results[i] = future.result()
         
-        return predictions
+        return results
     except Exception as e:
-        print(f"Error predicting for {meal_type}: {str(e)}")
+        print(f"Error predicting batch for {meal_type}: {str(e)}")
         return None
 
+def predict_all_meal_types(meal_description):
+    """Score one description against every meal type's models.
+
+    Tokenization and n-gram extraction run once per distinct analyzer
+    configuration (normally once in total); the extracted terms are then
+    projected onto each meal type's vocabulary. Returns an entry per meal type.
+    """
+    results = {}
+    
+    # Group meal types whose vectorizers tokenize identically
+    shared_analyzers = {}
+    for meal_type in model_types:
+        models = registry.get(meal_type)
+        if models is not None:
+            shared_analyzers.setdefault(models['tfidf'].analyzer_signature, []).append(meal_type)
+    
+    for meal_types in shared_analyzers.values():
+        terms = None
+        
+        for meal_type in meal_types:
+            try:
+                models = all_models[meal_type]
+                results[meal_type] = lookup_entry(models, meal_description, near=False)
+                if results[meal_type] is not None:
+                    continue
+                
+                key = cache_key(models, meal_type, meal_description)
+                results[meal_type] = cached_predictions([key])[0] or lookup_entry(models, meal_description)
+                if results[meal_type] is not None:
+                    continue
+                
+                if 'components' in models:
+                    row = predict_components(models, [meal_description])[0]
+                    if row is not None:
+                        results[meal_type] = {'predictions': round_macros(row), 'source': 'components'}
+                        store_predictions([(key, results[meal_type])])
+                        continue
+                
+                if terms is None:
+                    terms = models['tfidf'].extract_terms(meal_description)
+                X = models['tfidf'].project(terms)
+                results[meal_type] = {'predictions': predict_from_features(models, X)[0], 'source': 'model'}
+                store_predictions([(key, results[meal_type])])
+            except Exception as e:
+                print(f"Error predicting for {meal_type}: {str(e)}")
+                results[meal_type] = None
+    
+    return {meal_type: results.get(meal_type) for meal_type in model_types}
+
+def predict_for_meal_type(meal_description, meal_type, deadline=None):
+    """Predict macros using the appropriate meal-type-specific model ({'predictions', 'source'} or None).
+
+    With MICROBATCH on, a meal that isn't stored or cached waits to be
+    predicted together with other requests' meals of the same type (unless
+    the request has a deadline, which skips the batching window).
+    """
+    if microbatcher is not None and deadline is None:
+        try:
+            result = stored_entries(get_models(meal_type), meal_type, [meal_description])[0][0]
+            return result or microbatcher.submit(meal_type, meal_description).result()
+        except Exception as e:
+            print(f"Error predicting for {meal_type}: {str(e)}")
+            return None
+    
+    results = predict_many_for_meal_type([meal_description], meal_type, deadline)
+    return results[0] if results else None
+
+def predict_batch(items, deadline=None, cache=True):
+    """Predict a mixed list of {meal, meal_type} items, grouped by meal type.
+
+    Returns one result per item, in input order. Invalid items get an
+    error entry instead of failing the whole batch.
+    """
+    results = [None] * len(items)
+    groups = {}
+    
+    for i, item in enumerate(items):
+        if not has_meal(item):
+            results[i] = {'success': False, 'error': 'Missing meal description'}
+            continue
+        
+        meal_type = normalize_meal_type(item.get('meal_type'), model_types)
+        if meal_type is None:
+            results[i] = {'success': False, 'error': f'Invalid meal_type. Must be one of: {model_types}'}
+            continue
+        
+        groups.setdefault(meal_type, []).append(i)
+    
+    for meal_type, indices in groups.items():
+        entries = predict_many_for_meal_type([items[i]['meal'] for i in indices], meal_type, deadline, cache)
+        
+        for position, i in enumerate(indices):
+            if entries:
+                results[i] = {
+                    'success': True,
+                    'meal': items[i]['meal'],
+                    'meal_type': meal_type,
+                    'predictions': entries[position]['predictions'],
+                    'source': entries[position]['source'],
+                    'tier': tier(entries[position])
+                }
+            else:
+                results[i] = {'success': False, 'meal_type': meal_type, 'error': 'Prediction failed'}
+    
+    return results
+
+def predict_columns(meals, meal_types, deadline=None):
+    """predict_batch for columnar callers: parallel meal and meal type lists in.
+
+    Returns an (n, 4) float32 macro array in MACRO_TARGETS order (NaN rows
+    where a meal failed), the source per row and {row: error}, without
+    building a result dict per meal.
+    """
+    macros = np.full((len(meals), len(MACRO_TARGETS)), np.nan, dtype=np.float32)
+    sources = [None] * len(meals)
+    errors = {}
+    groups = {}
+    
+    for i, (meal, meal_type) in enumerate(zip(meals, meal_types)):
+        if not isinstance(meal, str) or not meal.strip():
+            errors[i] = 'Missing meal description'
+            continue
+        normalized = normalize_meal_type(meal_type, model_types)
+        if normalized is None:
+            errors[i] = f'Invalid meal_type. Must be one of: {model_types}'
+            continue
+        groups.setdefault(normalized, []).append(i)
+    
+    for meal_type, indices in groups.items():
+        entries = predict_many_for_meal_type([meals[i] for i in indices], meal_type, deadline)
+        if not entries:
+            errors.update((i, 'Prediction failed') for i in indices)
+            continue
+        macros[indices] = [[entry['predictions'][target] for target in MACRO_TARGETS] for entry in entries]
+        for i, entry in zip(indices, entries):
+            sources[i] = entry['source']
+    
+    return macros, sources, errors
+
+def score_plan(plan, deadline=None):
+    """Score a {day: {meal_type: description}} plan in one batched pass.
+
+    Returns per-meal predictions plus day and week totals. Empty meals are
+    skipped; meals that fail to predict are reported but left out of totals.
+    """
+    days = list(plan.keys())
+    entries = []
+    
+    for day in days:
+        meals = plan[day] or {}
+        if not isinstance(meals, dict):
+            raise ValueError(f'Plan day {day!r} must map meal types to descriptions')
+        for meal_key, description in meals.items():
+            if isinstance(description, str) and description.strip():
+                entries.append((day, meal_key, description))
+    
+    results = predict_batch([
+        {'meal': description, 'meal_type': meal_key}
+        for _, meal_key, description in entries
+    ], deadline)
+    
+    # Collect successful predictions into an (n_meals, 4) matrix for the totals
+    day_index = {day: i for i, day in enumerate(days)}
+    macros = np.zeros((len(entries), len(MACRO_TARGETS)))
+    scored = np.zeros(len(entries), dtype=bool)
+    
+    for i, result in enumerate(results):
+        if result['success']:
+            macros[i] = [result['predictions'][target] for target in MACRO_TARGETS]
+            scored[i] = True
+    
+    rows = np.array([day_index[day] for day, _, _ in entries], dtype=int)
+    day_totals = np.zeros((len(days), len(MACRO_TARGETS)))
+    np.add.at(day_totals, rows[scored], macros[scored])
+    week_totals = day_totals.sum(axis=0)
+    
+    scored_days = np.zeros(len(days), dtype=bool)
+    scored_days[rows[scored]] = True
+    n_scored_days = int(scored_days.sum())
+    
+    scored_plan = {
+        day: {'meals': {}, 'totals': round_macros(day_totals[i])}
+        for i, day in enumerate(days)
+    }
+    for (day, meal_key, _), result in zip(entries, results):
+        scored_plan[day]['meals'][meal_key] = result
+    
+    return {
+        'days': scored_plan,
+        'week_totals': round_macros(week_totals),
+        'daily_average': round_macros(week_totals / n_scored_days if n_scored_days else week_totals),
+        'meals_scored': int(scored.sum()),
+        'meals_failed': int(len(entries) - scored.sum())
+    }
+
 @app.route('/', methods=['GET'])
 def root():
     return jsonify({
@@ -54,151 +543,391 @@ def root():
         'models': model_types,
         'endpoints': {
             'health': '/health',
+            'liveness': '/health/live',
+            'readiness': '/health/ready',
             'predict_breakfast': '/predict-breakfast (POST)',
             'predict_lunch': '/predict-lunch (POST)',
             'predict_dinner': '/predict-dinner (POST)',
             'predict_snacks': '/predict-snacks (POST)',
             'predict_desserts': '/predict-desserts (POST)',
-            'predict_auto': '/predict-macros (POST with meal_type)'
+            'predict_auto': '/predict-macros (POST with meal_type, or meal_type=all for every model set)',
+            'predict_batch': '/predict-batch (POST with items: [{meal, meal_type}], or msgpack columns)',
+            'predict_stream': '/predict-stream (POST NDJSON lines of {meal, meal_type}, streams NDJSON back)',
+            'score_plan': '/score-plan (POST with plan: {day: {meal_type: meal}})'
         }
     }), 200
 
+def model_status(meal_type):
+    """Load state, timings and calorie setup of one meal type for /health"""
+    status = registry.status[meal_type]
+    models = all_models.get(meal_type)
+    return {
+        'loaded': models is not None,
+        'state': status['state'],
+        'load_seconds': status['load_seconds'],
+        'warmup_seconds': status['warmup_seconds'],
+        'calorie_mode': models['calorie_mode'] if models else None,
+        'calorie_factor': models['calorie_factor'] if models else None,
+        'format': models['format'] if models else None,
+        'version': models['version'] if models else None,
+        'distilled': 'distilled' in models if models else False,
+        'full_cost_ms': [round(seconds * 1000, 4) for seconds in models['full_cost']]
+                        if models and 'full_cost' in models else None,
+        'error': status['error'],
+        'reloads': status['reloads'],
+        'reloaded_at': status['reloaded_at'],
+        'reload_error': status['reload_error']
+    }
+
 @app.route('/health', methods=['GET'])
 def health():
     return jsonify({
         'status': 'healthy',
         'service': 'ML Macro Predictor',
-        'models_loaded': len(all_models)
+        'ready': registry.ready,
+        'load_mode': registry.load_mode,
+        'models_loaded': len(all_models),
+        'models': {meal_type: model_status(meal_type) for meal_type in model_types},
+        'lookup_index': {
+            meal_type: all_models[meal_type]['lookup'].stats()
+            for meal_type in model_types if 'lookup' in all_models.get(meal_type, {})
+        },
+        'prediction_cache': prediction_cache.stats(),
+        'persistent_cache': persistent_cache.stats() if persistent_cache is not None else None,
+        'deadline_tiers': dict(tier_counts),
+        'single_flight': in_flight.stats(),
+        'admission': admission.stats() if admission is not None else None,
+        'microbatch': microbatcher.stats() if microbatcher is not None else None,
+        'shadow': shadow.stats() if shadow is not None else None
     }), 200
 
+# Liveness: the process is up and serving requests, whatever the models are doing
+@app.route('/health/live', methods=['GET'])
+def health_live():
+    return jsonify({'status': 'alive'}), 200
+
+# Readiness: route traffic here only once the model sets are loaded and warm
+@app.route('/health/ready', methods=['GET'])
+def health_ready():
+    ready = registry.ready
+    return jsonify({
+        'status': 'ready' if ready else 'loading',
+        'models': {
+            meal_type: {
+                'state': registry.status[meal_type]['state'],
+                'load_seconds': registry.status[meal_type]['load_seconds']
+            }
+            for meal_type in model_types
+        }
+    }), 200 if ready else 503
+
 # Specific endpoints for each meal type
 @app.route('/predict-breakfast', methods=['POST'])
+@admitted('interactive')
 def predict_breakfast():
     try:
         data = request.get_json()
-        if not data or 'meal' not in data:
+        if not has_meal(data):
             return jsonify({'success': False, 'error': 'Missing meal description'}), 400
         
-        predictions = predict_for_meal_type(data['meal'], 'breakfast')
-        if predictions:
+        result = predict_for_meal_type(data['meal'], 'breakfast', request_deadline(data))
+        if result:
             return jsonify({
                 'success': True,
                 'meal': data['meal'],
                 'meal_type': 'breakfast',
-                'predictions': predictions
+                'predictions': result['predictions'],
+                'source': result['source'],
+                'tier': tier(result)
             }), 200
         else:
             return jsonify({'success': False, 'error': 'Prediction failed'}), 500
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
 @app.route('/predict-lunch', methods=['POST'])
+@admitted('interactive')
 def predict_lunch():
     try:
         data = request.get_json()
-        if not data or 'meal' not in data:
+        if not has_meal(data):
             return jsonify({'success': False, 'error': 'Missing meal description'}), 400
         
-        predictions = predict_for_meal_type(data['meal'], 'lunch')
-        if predictions:
+        result = predict_for_meal_type(data['meal'], 'lunch', request_deadline(data))
+        if result:
             return jsonify({
                 'success': True,
                 'meal': data['meal'],
                 'meal_type': 'lunch',
-                'predictions': predictions
+                'predictions': result['predictions'],
+                'source': result['source'],
+                'tier': tier(result)
             }), 200
         else:
             return jsonify({'success': False, 'error': 'Prediction failed'}), 500
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
 @app.route('/predict-dinner', methods=['POST'])
+@admitted('interactive')
 def predict_dinner():
     try:
         data = request.get_json()
-        if not data or 'meal' not in data:
+        if not has_meal(data):
             return jsonify({'success': False, 'error': 'Missing meal description'}), 400
         
-        predictions = predict_for_meal_type(data['meal'], 'dinner')
-        if predictions:
+        result = predict_for_meal_type(data['meal'], 'dinner', request_deadline(data))
+        if result:
             return jsonify({
                 'success': True,
                 'meal': data['meal'],
                 'meal_type': 'dinner',
-                'predictions': predictions
+                'predictions': result['predictions'],
+                'source': result['source'],
+                'tier': tier(result)
             }), 200
         else:
             return jsonify({'success': False, 'error': 'Prediction failed'}), 500
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
 @app.route('/predict-snacks', methods=['POST'])
+@admitted('interactive')
 def predict_snacks():
     try:
         data = request.get_json()
-        if not data or 'meal' not in data:
+        if not has_meal(data):
             return jsonify({'success': False, 'error': 'Missing meal description'}), 400
         
-        predictions = predict_for_meal_type(data['meal'], 'snacks')
-        if predictions:
+        result = predict_for_meal_type(data['meal'], 'snacks', request_deadline(data))
+        if result:
             return jsonify({
                 'success': True,
                 'meal': data['meal'],
                 'meal_type': 'snacks',
-                'predictions': predictions
+                'predictions': result['predictions'],
+                'source': result['source'],
+                'tier': tier(result)
             }), 200
         else:
             return jsonify({'success': False, 'error': 'Prediction failed'}), 500
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
 @app.route('/predict-desserts', methods=['POST'])
+@admitted('interactive')
 def predict_desserts():
     try:
         data = request.get_json()
-        if not data or 'meal' not in data:
+        if not has_meal(data):
             return jsonify({'success': False, 'error': 'Missing meal description'}), 400
         
-        predictions = predict_for_meal_type(data['meal'], 'desserts')
-        if predictions:
+        result = predict_for_meal_type(data['meal'], 'desserts', request_deadline(data))
+        if result:
             return jsonify({
                 'success': True,
                 'meal': data['meal'],
                 'meal_type': 'desserts',
-                'predictions': predictions
+                'predictions': result['predictions'],
+                'source': result['source'],
+                'tier': tier(result)
             }), 200
         else:
             return jsonify({'success': False, 'error': 'Prediction failed'}), 500
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
 # Auto-detect endpoint (for backwards compatibility)
 @app.route('/predict-macros', methods=['POST'])
+@admitted('interactive')
 def predict_macros():
     try:
         data = request.get_json()
-        if not data or 'meal' not in data:
+        if not has_meal(data):
             return jsonify({'success': False, 'error': 'Missing meal description'}), 400
         
         # Get meal type from request, default to 'dinner' if not specified
         meal_type = data.get('meal_type', 'dinner')
         
-        if meal_type not in model_types:
-            return jsonify({'error': f'Invalid meal_type. Must be one of: {model_types}'}), 400
+        # 'all' scores the meal against every meal type's models
+        if meal_type == 'all':
+            results = predict_all_meal_types(data['meal'])
+            if not any(results.values()):
+                return jsonify({'success': False, 'error': 'Prediction failed'}), 500
+            return jsonify({
+                'success': True,
+                'meal': data['meal'],
+                'meal_type': 'all',
+                'predictions': {name: result['predictions'] if result else None for name, result in results.items()},
+                'sources': {name: result['source'] if result else None for name, result in results.items()}
+            }), 200
+        
+        meal_type = normalize_meal_type(meal_type, model_types)
+        if meal_type is None:
+            return jsonify({'success': False, 'error': f'Invalid meal_type. Must be one of: {model_types}'}), 400
         
-        predictions = predict_for_meal_type(data['meal'], meal_type)
-        if predictions:
+        result = predict_for_meal_type(data['meal'], meal_type, request_deadline(data))
+        if result:
             return jsonify({
                 'success': True,
                 'meal': data['meal'],
                 'meal_type': meal_type,
-                'predictions': predictions
+                'predictions': result['predictions'],
+                'source': result['source'],
+                'tier': tier(result)
             }), 200
         else:
             return jsonify({'success': False, 'error': 'Prediction failed'}), 500
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
+# Batch endpoint: many meals of mixed types in one request
+@app.route('/predict-batch', methods=['POST'])
+@admitted('bulk')
+def predict_batch_endpoint():
+    if wants_columnar(request.content_type, request.headers.get('Accept')):
+        return predict_batch_columnar()
+    try:
+        data = request.get_json()
+        if not isinstance(data, dict) or not isinstance(data.get('items'), list):
+            return jsonify({'success': False, 'error': 'Missing items list'}), 400
+        
+        items = data['items']
+        if len(items) > MAX_BATCH_SIZE:
+            return jsonify({'success': False, 'error': f'Too many items (max {MAX_BATCH_SIZE})'}), 400
+        
+        results = predict_batch(items, request_deadline(data))
+        return jsonify({
+            'success': True,
+            'count': len(results),
+            'results': results
+        }), 200
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+def predict_batch_columnar():
+    """/predict-batch with msgpack columns in and/or out (columnar.py)"""
+    if not MSGPACK_AVAILABLE:
+        status = 415 if is_columnar(request.content_type) else 406
+        return jsonify({'success': False, 'error': 'msgpack is not installed on this server'}), status
+    try:
+        if is_columnar(request.content_type):
+            meals, meal_types, deadline_ms = decode_request(request.get_data())
+        else:
+            data = request.get_json()
+            if not isinstance(data, dict) or not isinstance(data.get('items'), list):
+                return jsonify({'success': False, 'error': 'Missing items list'}), 400
+            meals, meal_types = items_to_columns(data['items'])
+            deadline_ms = data.get('deadline_ms')
+        
+        if len(meals) > MAX_BATCH_SIZE:
+            return jsonify({'success': False, 'error': f'Too many items (max {MAX_BATCH_SIZE})'}), 400
+        
+        macros, sources, errors = predict_columns(meals, meal_types, request_deadline({'deadline_ms': deadline_ms}))
+        return Response(encode_response(macros, sources, errors), mimetype=CONTENT_TYPE)
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+# Streaming bulk scoring: NDJSON lines of {meal, meal_type[, id]} in, one
+# NDJSON result per line out, predicted STREAM_CHUNK_SIZE lines at a time.
+# ?meal_type= sets the type for lines without one. Results are not cached.
+@app.route('/predict-stream', methods=['POST'])
+def predict_stream():
+    default_meal_type = request.args.get('meal_type')
+    stream_class = admission.classes['stream'] if admission is not None else None
+    if stream_class is not None:
+        try:
+            stream_class.acquire()
+        except Overloaded as e:
+            return overloaded_response(e)
+    start = time.perf_counter()
+    
+    def generate():
+        try:
+            for chunk in read_chunks(request.stream, STREAM_CHUNK_SIZE, MAX_STREAM_LINE_BYTES):
+                items = [item if isinstance(item, dict) else {} for _, item in chunk]
+                if default_meal_type:
+                    for item in items:
+                        item.setdefault('meal_type', default_meal_type)
+                
+                lines = []
+                for (number, item), result in zip(chunk, predict_batch(items, cache=False)):
+                    if isinstance(item, str):
+                        result = {'success': False, 'error': item}
+                    if isinstance(item, dict) and 'id' in item:
+                        result = {'id': item['id'], **result}
+                    lines.append(dumps_line({'line': number, **result}))
+                yield ''.join(lines)
+        except Exception as e:
+            yield dumps_line({'success': False, 'error': f'Stream aborted: {str(e)}'})
+    
+    response = Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+    if stream_class is not None:
+        # Runs when the server is done with the response, even if the client went away
+        response.call_on_close(lambda: stream_class.release(time.perf_counter() - start))
+    return response
+
+# Whole-plan scoring: per-meal macros plus day and week totals
+@app.route('/score-plan', methods=['POST'])
+@admitted('bulk')
+def score_plan_endpoint():
+    try:
+        data = request.get_json()
+        if not isinstance(data, dict) or not isinstance(data.get('plan'), dict):
+            return jsonify({'success': False, 'error': 'Missing plan'}), 400
+        
+        plan = data['plan']
+        n_meals = sum(len(meals) for meals in plan.values() if isinstance(meals, dict))
+        if n_meals > MAX_BATCH_SIZE:
+            return jsonify({'success': False, 'error': f'Too many meals (max {MAX_BATCH_SIZE})'}), 400
+        
+        scored = score_plan(plan, request_deadline(data))
+        return jsonify({'success': True, **scored}), 200
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+# Reload retrained models in this worker: ?meal_type= for one type, else all.
+# Cache entries are keyed by model version, so the old set's entries just stop matching.
+@app.route('/admin/reload', methods=['POST'])
+def admin_reload():
+    if not ADMIN_TOKEN:
+        return jsonify({'success': False, 'error': 'Admin endpoints are disabled (ADMIN_TOKEN is not set)'}), 403
+    if not hmac.compare_digest(request.headers.get('X-Admin-Token', ''), ADMIN_TOKEN):
+        return jsonify({'success': False, 'error': 'Invalid admin token'}), 403
+    
+    meal_types = model_types
+    if request.args.get('meal_type'):
+        meal_type = normalize_meal_type(request.args['meal_type'], model_types)
+        if meal_type is None:
+            return jsonify({'success': False, 'error': f'Invalid meal_type. Must be one of: {model_types}'}), 400
+        meal_types = [meal_type]
+    
+    results = {meal_type: registry.reload(meal_type) for meal_type in meal_types}
+    return jsonify({
+        'success': all(result['reloaded'] for result in results.values()),
+        'worker': os.getpid(),
+        'results': results
+    }), 200
+
 if __name__ == '__main__':
+    start_model_watcher()
     port = int(os.environ.get('PORT', 5000))
     app.run(host='0.0.0.0', port=port, debug=False)
\ No newline at end of file
@@ -0,0 +1,70 @@
+import json
+import os
+import sys
+import time
+import msgpack
+import numpy as np
+import pandas as pd
+from pathlib import Path
+
+# Run from ml-service/: python benchmarks/bench_columnar.py
+# JSON items vs msgpack columns on /predict-batch, in-process through the
+# Flask test client: client encode, request, response decode. Every request
+# is a fresh prediction, so the gap is protocol overhead on top of the same
+# model work ("predict only" times predict_columns on its own).
+ML_SERVICE = Path(__file__).parent.parent
+sys.path.insert(0, str(ML_SERVICE))
+
+os.environ['LOOKUP_INDEX'] = '0'
+os.environ['PREDICTION_CACHE_SIZE'] = '0'
+os.environ['ADMISSION_CONTROL'] = '0'
+
+import app
+from columnar import CONTENT_TYPE, decode_response
+
+SIZES = [10, 100, 500]
+REPEATS = 20
+
+def median_ms(call):
+    times = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        call()
+        times.append(time.perf_counter() - start)
+    return float(np.median(times)) * 1000
+
+def json_batch(client, meals, meal_types):
+    items = [{'meal': meal, 'meal_type': meal_type} for meal, meal_type in zip(meals, meal_types)]
+    response = client.post('/predict-batch', data=json.dumps({'items': items}), content_type='application/json')
+    results = json.loads(response.data)['results']
+    return np.array([[r['predictions'][t] for t in app.MACRO_TARGETS] for r in results], dtype=np.float32)
+
+def columnar_batch(client, meals, meal_types):
+    response = client.post('/predict-batch', data=msgpack.packb({'meals': meals, 'meal_types': meal_types}),
+                           content_type=CONTENT_TYPE)
+    columns, _, _ = decode_response(response.data)
+    return np.column_stack([columns[t] for t in app.MACRO_TARGETS])
+
+if __name__ == "__main__":
+    app.MAX_BATCH_SIZE = max(SIZES)
+    client = app.app.test_client()
+    meal_types = ['breakfast', 'lunch', 'dinner', 'snacks', 'desserts']
+    pool = [
+        (description, meal_type) for meal_type in meal_types
+        for description in pd.read_csv(ML_SERVICE / meal_type / 'data' / 'training_data.csv')['description'][:200]
+    ]
+
+    print("📦 /predict-batch: JSON items vs msgpack columns (mixed meal types)")
+    print("="*70)
+    print(f"{'Meals':>8}{'predict only':>15}{'JSON':>12}{'msgpack':>12}{'speedup':>10}")
+    for n in SIZES:
+        rows = [pool[(i * 7) % len(pool)] for i in range(n)]
+        meals, types = [m for m, _ in rows], [t for _, t in rows]
+
+        # Same numbers either way (JSON rounds to 0.1, so do the float32 columns)
+        assert np.allclose(json_batch(client, meals, types), columnar_batch(client, meals, types), atol=1e-4)
+
+        predict_ms = median_ms(lambda: app.predict_columns(meals, types))
+        json_ms = median_ms(lambda: json_batch(client, meals, types))
+        columnar_ms = median_ms(lambda: columnar_batch(client, meals, types))
+        print(f"{n:>8}{predict_ms:>13.2f}ms{json_ms:>10.2f}ms{columnar_ms:>10.2f}ms{json_ms / columnar_ms:>9.2f}x")
@@ -0,0 +1,65 @@
+import sys
+import time
+import numpy as np
+import pandas as pd
+from pathlib import Path
+
+# Run from ml-service/: python benchmarks/bench_components.py
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from components import ComponentTable
+from inference import MACRO_TARGETS, predict_macro_matrix, transform_descriptions
+from model_registry import load_model_set
+
+MEAL_TYPES = ['breakfast', 'lunch', 'dinner', 'snacks', 'desserts']
+
+def held_out_rows(n_rows):
+    """The test rows of train_model.py's train_test_split(test_size=0.2, random_state=42)"""
+    from sklearn.model_selection import train_test_split
+    return train_test_split(np.arange(n_rows), test_size=0.2, random_state=42)
+
+def mae(predicted, actual):
+    return np.abs(predicted - actual).mean(axis=0)
+
+def per_call_ms(fn, descriptions):
+    start = time.perf_counter()
+    for description in descriptions:
+        fn(description)
+    return (time.perf_counter() - start) / len(descriptions) * 1000
+
+if __name__ == "__main__":
+    print("🧩 Component table vs whole-description ensembles (MAE: calories / protein / carbs / fat)")
+    print("="*100)
+    print(f"{'Meal type':<11}{'Rows':<10}{'Parsed':>8}{'Ensembles':>28}{'Components':>28}{'ms/meal':>16}")
+    
+    for meal_type in MEAL_TYPES:
+        data = pd.read_csv(f'{meal_type}/data/training_data.csv')
+        descriptions = list(data['description'])
+        actual = data[MACRO_TARGETS].values
+        models = load_model_set(meal_type)
+        ensembles = predict_macro_matrix(models, transform_descriptions(models, descriptions))
+        
+        train_rows, test_rows = held_out_rows(len(data))
+        splits = [
+            # Fit on train_model.py's training rows, score its test rows
+            ('held-out', ComponentTable.fit(f'{meal_type}/data/nutrition_data.csv',
+                                            f'{meal_type}/data/training_data.csv', rows=train_rows), test_rows),
+            # Fit and score on every training meal, as served
+            ('all', ComponentTable.fit(f'{meal_type}/data/nutrition_data.csv',
+                                       f'{meal_type}/data/training_data.csv'), np.arange(len(data)))
+        ]
+        
+        for name, table, rows in splits:
+            predicted = [table.predict(descriptions[i]) for i in rows]
+            parsed = [i for i, row in zip(rows, predicted) if row is not None]
+            components = np.array([row for row in predicted if row is not None])
+            
+            ensemble_mae = ' / '.join(f'{v:.1f}' for v in mae(ensembles[parsed], actual[parsed]))
+            component_mae = ' / '.join(f'{v:.1f}' for v in mae(components, actual[parsed]))
+            timing = ''
+            if name == 'all':
+                sample = descriptions[:200]
+                one_row = lambda d: predict_macro_matrix(models, transform_descriptions(models, [d]))
+                timing = f"{per_call_ms(one_row, sample):.3f} → {per_call_ms(table.predict, sample):.3f}"
+            print(f"{meal_type:<11}{name:<10}{len(parsed) / len(rows):>8.0%}{ensemble_mae:>28}"
+                  f"{component_mae:>28}{timing:>16}")
@@ -0,0 +1,71 @@
+import sys
+import time
+import numpy as np
+import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+# Run from ml-service/: python benchmarks/bench_inference_threads.py
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import inference
+import model_registry
+from inference import predict_macro_matrix, transform_descriptions
+from model_registry import load_joblib_models
+
+# snacks' forests were trained (and pickled) with n_jobs=-1
+MEAL_TYPE = 'snacks'
+CLIENTS = [1, 4, 8]
+DURATION = 2.0
+
+def load(evaluator, pickled_n_jobs=False):
+    model_registry.TREE_EVALUATOR = evaluator
+    models = load_joblib_models(f'{MEAL_TYPE}/models')
+    models['calorie_mode'], models['calorie_factor'] = 'derived', 1.0
+    models.pop('calories', None)
+    if pickled_n_jobs:
+        # Undo the load-time override to time the models as trained
+        for key in ['protein', 'carbs', 'fat']:
+            if hasattr(models[key], 'n_jobs'):
+                models[key].n_jobs = -1
+    return models
+
+def throughput(models, X, clients):
+    """Rows/second and median latency with `clients` threads predicting back to back"""
+    def client(_):
+        latencies, rows = [], 0
+        stop = time.perf_counter() + DURATION
+        while time.perf_counter() < stop:
+            start = time.perf_counter()
+            predict_macro_matrix(models, X)
+            latencies.append(time.perf_counter() - start)
+            rows += X.shape[0]
+        return latencies, rows
+    
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        results = list(pool.map(client, range(clients)))
+    latencies = [t for latency, _ in results for t in latency]
+    return sum(rows for _, rows in results) / DURATION, float(np.median(latencies)) * 1000
+
+if __name__ == "__main__":
+    descriptions = list(pd.read_csv(f'{MEAL_TYPE}/data/training_data.csv')['description'])
+    settings = [
+        ('sklearn, n_jobs as pickled', load('sklearn', pickled_n_jobs=True), 1),
+        ('sklearn, n_jobs=1', load('sklearn'), 1),
+        ('native, serial', load('native'), 1),
+        ('native, 4 batch threads', load('native'), 4)
+    ]
+    X_one = transform_descriptions(settings[0][1], descriptions[:1])
+    X_batch = transform_descriptions(settings[0][1], (descriptions * 2)[:500])
+    
+    print(f"⏱️  {MEAL_TYPE} predict throughput under concurrent load ({DURATION:.0f}s per cell)")
+    print("="*80)
+    print(f"{'Setting':<30}{'Clients':>8}{'1-row rows/s':>14}{'p50':>9}{'500-row rows/s':>16}{'p50':>9}")
+    
+    for name, models, threads in settings:
+        inference.INFERENCE_THREADS = threads
+        for clients in CLIENTS:
+            single_rate, single_p50 = throughput(models, X_one, clients)
+            batch_rate, batch_p50 = throughput(models, X_batch, clients)
+            print(f"{name:<30}{clients:>8}{single_rate:>14.0f}{single_p50:>7.2f}ms"
+                  f"{batch_rate:>16.0f}{batch_p50:>7.1f}ms")
@@ -0,0 +1,95 @@
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+from pathlib import Path
+
+# Run from ml-service/: python benchmarks/bench_memory.py [workers]
+# Linux only: reads proportional set size (PSS) from /proc/<pid>/smaps_rollup.
+ML_SERVICE = Path(__file__).parent.parent
+
+LAYOUTS = [
+    ('joblib, no preload', {'MODEL_FORMAT': 'joblib', 'GUNICORN_PRELOAD': '0', 'MODEL_MMAP': '0'}),
+    ('joblib, preload', {'MODEL_FORMAT': 'joblib', 'GUNICORN_PRELOAD': '1', 'MODEL_MMAP': '0'}),
+    ('bundle, no preload', {'MODEL_FORMAT': 'bundle', 'GUNICORN_PRELOAD': '0', 'MODEL_MMAP': '0'}),
+    ('bundle, preload', {'MODEL_FORMAT': 'bundle', 'GUNICORN_PRELOAD': '1', 'MODEL_MMAP': '0'}),
+    ('bundle, mmap', {'MODEL_FORMAT': 'bundle', 'GUNICORN_PRELOAD': '0', 'MODEL_MMAP': '1'}),
+    ('bundle, preload + mmap', {'MODEL_FORMAT': 'bundle', 'GUNICORN_PRELOAD': '1', 'MODEL_MMAP': '1'}),
+]
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+def pss_kb(pid):
+    with open(f'/proc/{pid}/smaps_rollup') as f:
+        for line in f:
+            if line.startswith('Pss:'):
+                return int(line.split()[1])
+    return 0
+
+def child_pids(pid):
+    children = []
+    for entry in os.listdir('/proc'):
+        if entry.isdigit():
+            try:
+                with open(f'/proc/{entry}/stat') as f:
+                    if int(f.read().rsplit(')', 1)[1].split()[1]) == pid:
+                        children.append(int(entry))
+            except (FileNotFoundError, ProcessLookupError):
+                pass
+    return children
+
+def post(port, path, payload):
+    request = urllib.request.Request(
+        f'http://127.0.0.1:{port}{path}', data=json.dumps(payload).encode(),
+        headers={'Content-Type': 'application/json'}
+    )
+    return urllib.request.urlopen(request, timeout=30).read()
+
+def measure(env, workers):
+    port = free_port()
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'app:app',
+         '--bind', f'127.0.0.1:{port}', '--workers', str(workers)],
+        cwd=ML_SERVICE, env=dict(os.environ, **env),
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        deadline = time.time() + 120
+        while time.time() < deadline:
+            try:
+                urllib.request.urlopen(f'http://127.0.0.1:{port}/health', timeout=1)
+                if len(child_pids(server.pid)) >= workers:
+                    break
+            except OSError:
+                time.sleep(0.2)
+        
+        # Exercise every model set in (very likely) every worker
+        items = [{'meal': 'Chicken with rice and broccoli', 'meal_type': t}
+                 for t in ['breakfast', 'lunch', 'dinner', 'snacks', 'desserts']]
+        for _ in range(workers * 10):
+            post(port, '/predict-batch', {'items': items})
+        
+        workers_kb = [pss_kb(pid) for pid in child_pids(server.pid)]
+        return pss_kb(server.pid), workers_kb
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+if __name__ == "__main__":
+    workers = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+    
+    print(f"🧠 Proportional set size with {workers} gunicorn workers")
+    print("="*70)
+    print(f"{'Layout':<26}{'master':>10}{'per worker':>13}{'total':>11}")
+    
+    for label, env in LAYOUTS:
+        master_kb, workers_kb = measure(env, workers)
+        per_worker = sum(workers_kb) / max(len(workers_kb), 1)
+        total = master_kb + sum(workers_kb)
+        print(f"{label:<26}{master_kb / 1024:>8.1f}MB{per_worker / 1024:>11.1f}MB{total / 1024:>9.1f}MB")
@@ -0,0 +1,68 @@
+import os
+import sys
+import time
+import numpy as np
+import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+# Run from ml-service/: python benchmarks/bench_microbatch.py
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+# Time the models, not the stored-value lookup
+os.environ['LOOKUP_INDEX'] = '0'
+
+import app
+from microbatch import MicroBatcher
+
+MEAL_TYPE = 'lunch'
+CLIENTS = [1, 8, 32]
+WINDOWS_MS = [0, 1, 2, 5]
+MAX_ITEMS = 32
+DURATION = 2.0
+
+def run(predict, descriptions, clients):
+    """Requests/second, p50 and p99 latency with `clients` threads sending single meals back to back"""
+    def client(offset):
+        latencies = []
+        stop = time.perf_counter() + DURATION
+        while time.perf_counter() < stop:
+            description = descriptions[(offset + len(latencies) * clients) % len(descriptions)]
+            start = time.perf_counter()
+            predict(description)
+            latencies.append(time.perf_counter() - start)
+        return latencies
+
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        latencies = np.array([t for result in pool.map(client, range(clients)) for t in result]) * 1000
+    return len(latencies) / DURATION, np.percentile(latencies, 50), np.percentile(latencies, 99)
+
+if __name__ == "__main__":
+    # No cache hits: every request is a fresh prediction
+    app.prediction_cache.max_entries = 0
+    descriptions = list(pd.read_csv(f'{MEAL_TYPE}/data/training_data.csv')['description'])
+
+    settings = [('direct', lambda description: app.predict_for_meal_type(description, MEAL_TYPE), None)]
+    for window_ms in WINDOWS_MS:
+        batcher = MicroBatcher(
+            lambda meal_type, meal_descriptions: app.predict_many_for_meal_type(meal_descriptions, meal_type),
+            window_ms=window_ms, max_items=MAX_ITEMS
+        )
+        settings.append((f'window {window_ms}ms, max {MAX_ITEMS}',
+                         lambda description, batcher=batcher: batcher.submit(MEAL_TYPE, description).result(),
+                         batcher))
+
+    print(f"⏱️  {MEAL_TYPE} single-meal requests, coalesced vs direct ({DURATION:.0f}s per cell, "
+          f"{os.cpu_count()} CPUs)")
+    print("="*80)
+    print(f"{'Setting':<24}{'Clients':>8}{'req/s':>9}{'p50':>10}{'p99':>10}{'mean batch':>12}")
+
+    for name, predict, batcher in settings:
+        for clients in CLIENTS:
+            before = (batcher.batches, batcher.items) if batcher else None
+            rate, p50, p99 = run(predict, descriptions, clients)
+            mean_batch = ''
+            if batcher:
+                batches, items = batcher.batches - before[0], batcher.items - before[1]
+                mean_batch = f'{items / batches:.1f}' if batches else '-'
+            print(f"{name:<24}{clients:>8}{rate:>9.0f}{p50:>8.2f}ms{p99:>8.2f}ms{mean_batch:>12}")
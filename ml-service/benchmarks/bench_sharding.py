@@ -0,0 +1,140 @@
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+import numpy as np
+import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+# Run from ml-service/: python benchmarks/bench_sharding.py [layout]
+# Compares one gunicorn serving every meal type with meal-type shards behind
+# shard_router.py, on the same total worker count, under skewed traffic.
+# Linux only (PSS from /proc, as in bench_memory.py).
+ML_SERVICE = Path(__file__).parent.parent
+sys.path.insert(0, str(ML_SERVICE))
+
+from bench_memory import child_pids, free_port, pss_kb
+from shard_router import DEFAULT_LAYOUT, format_shard_urls, parse_layout, start_router, start_shards
+
+# Share of requests per meal type: meal generation mostly asks for lunch and dinner
+TRAFFIC = {'lunch': 0.4, 'dinner': 0.4, 'breakfast': 0.1, 'snacks': 0.05, 'desserts': 0.05}
+CLIENTS = 8
+DURATION = 5.0
+
+# Every request is a fresh prediction: no caches, no stored-value lookup
+ENV = dict(os.environ, PREDICTION_CACHE_SIZE='0', LOOKUP_INDEX='0')
+
+def get(port, path):
+    return urllib.request.urlopen(f'http://127.0.0.1:{port}{path}', timeout=30).status
+
+def post(port, path, payload):
+    request = urllib.request.Request(
+        f'http://127.0.0.1:{port}{path}', data=json.dumps(payload).encode(),
+        headers={'Content-Type': 'application/json'}
+    )
+    return urllib.request.urlopen(request, timeout=30).read()
+
+def wait_ready(port, timeout=120):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            if get(port, '/health/ready') == 200:
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f'Server on port {port} never became ready')
+
+def consecutive_free_ports(n):
+    """First of n consecutive ports that can all be bound right now"""
+    while True:
+        base = free_port()
+        try:
+            for offset in range(n):
+                with socket.socket() as s:
+                    s.bind(('127.0.0.1', base + offset))
+            return base
+        except OSError:
+            continue
+
+def process_tree(pid):
+    pids = [pid]
+    for child in child_pids(pid):
+        pids += process_tree(child)
+    return pids
+
+def load_test(port, meals):
+    """Requests/second and per-meal-type latencies (ms) with CLIENTS threads for DURATION seconds"""
+    rng = np.random.RandomState(0)
+    schedule = rng.choice(list(TRAFFIC), size=100000, p=list(TRAFFIC.values()))
+
+    def client(offset):
+        latencies = []
+        stop = time.perf_counter() + DURATION
+        i = offset
+        while time.perf_counter() < stop:
+            meal_type = schedule[i % len(schedule)]
+            meal = meals[meal_type][i % len(meals[meal_type])]
+            start = time.perf_counter()
+            post(port, f'/predict-{meal_type}', {'meal': meal})
+            latencies.append((meal_type, (time.perf_counter() - start) * 1000))
+            i += CLIENTS
+        return latencies
+
+    with ThreadPoolExecutor(max_workers=CLIENTS) as pool:
+        latencies = [entry for result in pool.map(client, range(CLIENTS)) for entry in result]
+    return len(latencies) / DURATION, latencies
+
+def report(label, port, roots, meals):
+    rate, latencies = load_test(port, meals)
+    total_mb = sum(pss_kb(pid) for root in roots for pid in process_tree(root)) / 1024
+    everything = np.array([ms for _, ms in latencies])
+    hot = np.array([ms for meal_type, ms in latencies if meal_type in ('lunch', 'dinner')])
+    cold = np.array([ms for meal_type, ms in latencies if meal_type not in ('lunch', 'dinner')])
+    print(f"{label:<34}{total_mb:>8.0f}MB{rate:>8.0f}{np.percentile(everything, 50):>7.1f}ms"
+          f"{np.percentile(everything, 99):>7.1f}ms{np.percentile(hot, 99):>9.1f}ms{np.percentile(cold, 99):>9.1f}ms")
+
+if __name__ == "__main__":
+    groups = parse_layout(sys.argv[1] if len(sys.argv) > 1 else DEFAULT_LAYOUT)
+    workers = sum(n for _, n in groups)
+    meals = {
+        meal_type: list(pd.read_csv(ML_SERVICE / meal_type / 'data' / 'training_data.csv')['description'])
+        for meal_type in TRAFFIC
+    }
+
+    print(f"🔀 All-in-one vs sharded serving, {workers} model workers, {CLIENTS} clients, "
+          f"{DURATION:.0f}s, {os.cpu_count()} CPUs")
+    print(f"   traffic: {', '.join(f'{t} {share:.0%}' for t, share in TRAFFIC.items())}")
+    print("="*86)
+    print(f"{'Layout':<34}{'PSS':>10}{'req/s':>8}{'p50':>9}{'p99':>9}{'hot p99':>11}{'cold p99':>11}")
+
+    port = free_port()
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'app:app',
+         '--bind', f'127.0.0.1:{port}', '--workers', str(workers)],
+        cwd=ML_SERVICE, env=ENV, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        wait_ready(port)
+        report(f'all-in-one ({workers} workers)', port, [server.pid], meals)
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+    base_port = consecutive_free_ports(len(groups))
+    port = free_port()
+    shards = start_shards(groups, base_port, env=ENV, quiet=True)
+    router = start_router(format_shard_urls(groups, '127.0.0.1', base_port), port, env=ENV, quiet=True)
+    try:
+        wait_ready(port)
+        layout = ' '.join(f"{','.join(meal_types)}:{n}" for meal_types, n in groups)
+        report('sharded + router', port, [router.pid] + [shard.pid for shard in shards], meals)
+        print(f"  layout: {layout}")
+    finally:
+        for process in shards + [router]:
+            process.terminate()
+        for process in shards + [router]:
+            process.wait(timeout=30)
@@ -0,0 +1,40 @@
+import os
+import subprocess
+import sys
+import time
+import numpy as np
+from pathlib import Path
+
+# Run from ml-service/: python benchmarks/bench_startup.py
+ML_SERVICE = Path(__file__).parent.parent
+
+PROBE = """
+import sys, time
+start = time.perf_counter()
+from app import app
+elapsed = time.perf_counter() - start
+# stderr, since a background model load may still be printing to stdout
+print(f"{elapsed:.4f} {'sklearn' in sys.modules}", file=sys.stderr)
+"""
+
+def run(model_format, model_loading='eager', repeats=5):
+    walls, imports = [], []
+    for _ in range(repeats):
+        env = dict(os.environ, MODEL_FORMAT=model_format, MODEL_LOADING=model_loading)
+        start = time.perf_counter()
+        out = subprocess.run([sys.executable, '-c', PROBE], cwd=ML_SERVICE, env=env,
+                             capture_output=True, text=True, check=True).stderr
+        walls.append(time.perf_counter() - start)
+        import_seconds, sklearn_loaded = out.strip().splitlines()[-1].split()
+        imports.append(float(import_seconds))
+    return float(np.median(walls)), float(np.median(imports)), sklearn_loaded
+
+if __name__ == "__main__":
+    print("⏱️  Service startup: joblib artifacts vs model bundles, eager vs deferred loading")
+    print("="*78)
+    print(f"{'Format':<10}{'Loading':<12}{'process start':>16}{'from app import app':>22}{'sklearn loaded':>17}")
+    
+    for model_format in ['joblib', 'bundle']:
+        for model_loading in ['eager', 'background', 'lazy']:
+            wall, imported, sklearn_loaded = run(model_format, model_loading)
+            print(f"{model_format:<10}{model_loading:<12}{wall:>15.2f}s{imported:>21.2f}s{sklearn_loaded:>17}")
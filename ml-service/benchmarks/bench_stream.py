@@ -0,0 +1,111 @@
+import http.client
+import json
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+import pandas as pd
+from pathlib import Path
+
+# Run from ml-service/: python benchmarks/bench_stream.py
+# Streams N meals through /predict-stream (chunked upload, NDJSON back) on a
+# fresh one-worker gunicorn per N, and reports rows/second and the worker's
+# peak resident memory (VmHWM), which should not grow with N.
+ML_SERVICE = Path(__file__).parent.parent
+sys.path.insert(0, str(ML_SERVICE))
+
+from bench_memory import child_pids, free_port
+
+SIZES = [1000, 10000, 100000]
+MEAL_TYPE = 'lunch'
+
+def peak_rss_mb(pid):
+    with open(f'/proc/{pid}/status') as f:
+        for line in f:
+            if line.startswith('VmHWM:'):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+def body(descriptions, n):
+    """NDJSON lines, generated lazily so the client doesn't hold the input either"""
+    for i in range(n):
+        yield (json.dumps({'meal': f'{descriptions[i % len(descriptions)]} {i}', 'id': i}) + '\n').encode()
+
+def stream(port, descriptions, n):
+    """Upload from a thread while reading results: the server answers while the body is still arriving.
+
+    Uses a bare socket because http.client reopens the connection when a
+    send happens after it has started reading the response.
+    """
+    sock = socket.create_connection(('127.0.0.1', port), timeout=600)
+    sock.sendall(
+        f'POST /predict-stream?meal_type={MEAL_TYPE} HTTP/1.1\r\nHost: 127.0.0.1\r\n'
+        'Content-Type: application/x-ndjson\r\nTransfer-Encoding: chunked\r\n\r\n'.encode()
+    )
+
+    def send_chunk(block):
+        data = b''.join(block)
+        sock.sendall(b'%x\r\n%s\r\n' % (len(data), data))
+
+    def upload():
+        # ~64KB HTTP chunks, as a file or pipe upload would send them
+        block, size = [], 0
+        for line in body(descriptions, n):
+            block.append(line)
+            size += len(line)
+            if size >= 65536:
+                send_chunk(block)
+                block, size = [], 0
+        if block:
+            send_chunk(block)
+        sock.sendall(b'0\r\n\r\n')
+
+    sender = threading.Thread(target=upload)
+    sender.start()
+    response = http.client.HTTPResponse(sock)
+    response.begin()
+    lines = sum(1 for _ in response)
+    sender.join()
+    sock.close()
+    return lines
+
+def run(descriptions, n):
+    port = free_port()
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'app:app',
+         '--bind', f'127.0.0.1:{port}', '--workers', '1', '--timeout', '600'],
+        cwd=ML_SERVICE, env=dict(os.environ, LOOKUP_INDEX='0'),
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        deadline = time.time() + 120
+        while time.time() < deadline:
+            try:
+                http.client.HTTPConnection('127.0.0.1', port, timeout=1).request('GET', '/health/ready')
+                if child_pids(server.pid):
+                    break
+            except OSError:
+                time.sleep(0.2)
+        worker = child_pids(server.pid)[0]
+        before = peak_rss_mb(worker)
+
+        start = time.perf_counter()
+        lines = stream(port, descriptions, n)
+        elapsed = time.perf_counter() - start
+        return lines, elapsed, before, peak_rss_mb(worker)
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+if __name__ == "__main__":
+    descriptions = list(pd.read_csv(ML_SERVICE / MEAL_TYPE / 'data' / 'training_data.csv')['description'])
+
+    print(f"🌊 /predict-stream, {MEAL_TYPE}, one gunicorn worker")
+    print("="*70)
+    print(f"{'Lines':>10}{'rows/s':>10}{'seconds':>10}{'peak RSS before':>18}{'after':>10}")
+    for n in SIZES:
+        lines, elapsed, before, after = run(descriptions, n)
+        assert lines == n, f'{lines} result lines for {n} meals'
+        print(f"{n:>10}{n / elapsed:>10.0f}{elapsed:>10.1f}{before:>16.1f}MB{after:>8.1f}MB")
@@ -0,0 +1,40 @@
+import sys
+import time
+import joblib
+import numpy as np
+import pandas as pd
+from pathlib import Path
+
+# Run from ml-service/: python benchmarks/bench_tfidf.py
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from fast_tfidf import CompiledTfidf
+
+MEAL_TYPES = ['breakfast', 'lunch', 'dinner', 'snacks', 'desserts']
+
+def median_us(fn, repeats):
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return float(np.median(times)) * 1e6
+
+if __name__ == "__main__":
+    print("⏱️  TfidfVectorizer.transform vs CompiledTfidf.transform")
+    print("="*78)
+    print(f"{'Meal type':<11}{'Rows':>6}{'sklearn':>13}{'compiled':>13}{'speedup':>10}{'max |diff|':>14}")
+    
+    for meal_type in MEAL_TYPES:
+        vectorizer = joblib.load(f'{meal_type}/models/vectorizer.joblib')
+        compiled = CompiledTfidf.from_vectorizer(vectorizer)
+        descriptions = list(pd.read_csv(f'{meal_type}/data/training_data.csv')['description'])
+        
+        max_diff = np.abs(vectorizer.transform(descriptions).toarray() - compiled.transform(descriptions)).max()
+        
+        for rows, repeats in [(1, 500), (35, 100), (len(descriptions), 5)]:
+            batch = descriptions[:rows]
+            sklearn_us = median_us(lambda: vectorizer.transform(batch), repeats)
+            compiled_us = median_us(lambda: compiled.transform(batch), repeats)
+            print(f"{meal_type:<11}{rows:>6}{sklearn_us:>11.0f}us{compiled_us:>11.0f}us"
+                  f"{sklearn_us / compiled_us:>9.1f}x{max_diff:>14.1e}")
@@ -0,0 +1,66 @@
+import sys
+import os
+import time
+import joblib
+import numpy as np
+import pandas as pd
+from pathlib import Path
+
+# Run from ml-service/: python benchmarks/bench_tree_ensemble.py
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from tree_ensemble import TreeEnsemble, as_float32_rows
+
+MEAL_TYPES = ['breakfast', 'lunch', 'dinner', 'snacks', 'desserts']
+TARGETS = ['calories', 'protein', 'carbs', 'fat']
+
+def median_ms(fn, repeats):
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return float(np.median(times)) * 1000
+
+def load_targets(meal_type):
+    models = {}
+    for target in TARGETS:
+        path = f'{meal_type}/models/{target}_model.joblib'
+        if os.path.exists(path):
+            models[target] = joblib.load(path)
+    return models
+
+if __name__ == "__main__":
+    print("⏱️  sklearn predict vs array-backed TreeEnsemble")
+    print("="*72)
+    print(f"{'Meal type':<11}{'Models':>7}{'sklearn 1 row':>15}{'native 1 row':>14}"
+          f"{'sklearn 35':>12}{'native 35':>11}{'equal':>7}")
+    
+    for meal_type in MEAL_TYPES:
+        vectorizer = joblib.load(f'{meal_type}/models/vectorizer.joblib')
+        descriptions = pd.read_csv(f'{meal_type}/data/training_data.csv')['description']
+        X_all = as_float32_rows(vectorizer.transform(descriptions))
+        X_one, X_batch = X_all[:1], X_all[:35]
+        
+        sklearn_models = load_targets(meal_type)
+        native_models = {t: TreeEnsemble.from_sklearn(m) for t, m in sklearn_models.items()}
+        
+        # Bit-for-bit check against sklearn's serial predict
+        equal = True
+        for target, model in sklearn_models.items():
+            n_jobs = getattr(model, 'n_jobs', None)
+            if n_jobs is not None:
+                model.n_jobs = 1
+            equal &= np.array_equal(model.predict(X_all), native_models[target].predict(X_all))
+            if n_jobs is not None:
+                model.n_jobs = n_jobs   # time them as pickled
+        
+        def run(models, X):
+            return [model.predict(X) for model in models.values()]
+        
+        print(f"{meal_type:<11}{len(sklearn_models):>7}"
+              f"{median_ms(lambda: run(sklearn_models, X_one), 50):>13.2f}ms"
+              f"{median_ms(lambda: run(native_models, X_one), 200):>12.2f}ms"
+              f"{median_ms(lambda: run(sklearn_models, X_batch), 20):>10.2f}ms"
+              f"{median_ms(lambda: run(native_models, X_batch), 50):>9.2f}ms"
+              f"{'yes' if equal else 'NO':>7}")
@@ -2,10 +2,19 @@ import pandas as pd
 import numpy as np
 from sklearn.model_selection import train_test_split
 from sklearn.ensemble import RandomForestRegressor, GradientBoostingRegressor
+from sklearn.compose import TransformedTargetRegressor
+from sklearn.preprocessing import StandardScaler
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
 import joblib
 import os
+import sys
+import time
+
+# The shared ml-service modules (distill.py, model_bundle.py) live one level up
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from distill import export_distilled
+from model_bundle import export_from_joblib
 
 def load_training_data(filename='data/training_data.csv'):
     """Load the synthetic meal data"""
@@ -110,6 +119,69 @@ def evaluate_model(model, X, y_true, target_name):
         'mape': mape
     }
 
+def train_joint_model(X, Y):
+    """Train one multi-output forest that predicts all four macros together"""
+    
+    # Same split as train_models so the comparison uses the same test rows
+    X_train, X_test, Y_train, Y_test = train_test_split(
+        X, Y, test_size=0.2, random_state=42
+    )
+    
+    print("\nTraining joint model for all macros...")
+    print(f"  Training set: {X_train.shape[0]} samples")
+    
+    # Scale targets so calories don't dominate the split criterion
+    model = TransformedTargetRegressor(
+        regressor=RandomForestRegressor(
+            n_estimators=100,
+            max_depth=20,
+            min_samples_leaf=3,  # keeps the shared trees compact
+            random_state=42,
+            n_jobs=-1
+        ),
+        transformer=StandardScaler()
+    )
+    model.fit(X_train, Y_train)
+    
+    return model, X_test, Y_test
+
+def time_predict(predict, X, repeats=50):
+    """Median seconds for one predict call"""
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        predict(X)
+        times.append(time.perf_counter() - start)
+    return float(np.median(times))
+
+def compare_joint_model(joint_model, models, X_test, Y_test, targets):
+    """Side-by-side accuracy and latency of the joint model vs per-target models"""
+    print("\nJoint vs per-target models (held-out test set):")
+    print(f"  {'Target':<10}{'Per-target MAE':>16}{'Joint MAE':>12}")
+    
+    joint_pred = joint_model.predict(X_test)
+    for i, target in enumerate(targets):
+        separate_mae = mean_absolute_error(Y_test[:, i], models[target].predict(X_test))
+        joint_mae = mean_absolute_error(Y_test[:, i], joint_pred[:, i])
+        print(f"  {target.capitalize():<10}{separate_mae:>16.2f}{joint_mae:>12.2f}")
+    
+    def predict_separate(X):
+        return [models[target].predict(X) for target in targets]
+    
+    print(f"\n  {'Latency':<10}{'Per-target':>16}{'Joint':>12}")
+    for label, rows in [('1 row', X_test[:1]), (f'{X_test.shape[0]} rows', X_test)]:
+        separate_ms = time_predict(predict_separate, rows) * 1000
+        joint_ms = time_predict(joint_model.predict, rows) * 1000
+        print(f"  {label:<10}{separate_ms:>14.2f}ms{joint_ms:>10.2f}ms")
+    
+    separate_nodes = sum(
+        estimator.tree_.node_count
+        for target in targets
+        for estimator in np.ravel(models[target].estimators_)
+    )
+    joint_nodes = sum(estimator.tree_.node_count for estimator in joint_model.regressor_.estimators_)
+    print(f"\n  Tree nodes: per-target={separate_nodes}, joint={joint_nodes}")
+
 def save_models(models, vectorizer, output_dir='models'):
     """Save trained models and vectorizer"""
     os.makedirs(output_dir, exist_ok=True)
@@ -120,6 +192,13 @@ def save_models(models, vectorizer, output_dir='models'):
         joblib.dump(model, filename)
         print(f"  Saved {name} model to {filename}")
     
+    # A joint model left by an earlier --joint run would be served instead of
+    # the per-target models just saved
+    stale_joint = f"{output_dir}/macros_model.joblib"
+    if 'macros' not in models and os.path.exists(stale_joint):
+        os.remove(stale_joint)
+        print(f"  Removed stale joint model {stale_joint}")
+    
     # Save vectorizer
     vectorizer_file = f"{output_dir}/vectorizer.joblib"
     joblib.dump(vectorizer, vectorizer_file)
@@ -140,7 +219,9 @@ if __name__ == "__main__":
     models = {}
     metrics = {}
     
-    for target in ['calories', 'protein', 'carbs', 'fat']:
+    targets = ['calories', 'protein', 'carbs', 'fat']
+    
+    for target in targets:
         y = df[target].values
         model, score = train_models(X, y, target)
         models[target] = model
@@ -148,12 +229,26 @@ if __name__ == "__main__":
         # Full evaluation on all data
         metrics[target] = evaluate_model(model, X, y, target)
     
+    # Optionally train one multi-output model for all four macros.
+    # app.py serves macros_model.joblib in place of the per-target models.
+    if '--joint' in sys.argv:
+        joint_model, X_test, Y_test = train_joint_model(X, df[targets].values)
+        compare_joint_model(joint_model, models, X_test, Y_test, targets)
+        models['macros'] = joint_model
+    
     # Save models
     print("\n" + "="*60)
     print("Saving Models")
     print("="*60)
     save_models(models, vectorizer)
     
+    # Export the compact serving bundle app.py loads without scikit-learn
+    meal_type = os.path.basename(os.path.dirname(os.path.abspath(__file__)))
+    export_from_joblib('models', meal_type)
+    
+    # Fit the distilled fast tier app.py falls back to under tight deadlines
+    export_distilled('models', 'data/training_data.csv', meal_type)
+    
     
     print("\n" + "="*60)
     print("✅ Model Training Complete!")
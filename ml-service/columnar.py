@@ -0,0 +1,72 @@
+import numpy as np
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+from inference import MACRO_TARGETS
+
+# Columnar msgpack batches for high-volume /predict-batch callers.
+#
+# Request (Content-Type: application/msgpack):
+#   {'meals': [str, ...], 'meal_types': [str, ...] | 'meal_type': str, 'deadline_ms'?: int}
+#
+# Response (sent when the request is msgpack or Accept asks for it):
+#   {'count': n, 'columns': MACRO_TARGETS,
+#    'calories' / 'protein' / 'carbs' / 'fat': n little-endian float32 (bytes),
+#    'source': [str | None, ...], 'errors': {row: message}}
+#
+# Rows listed in errors are NaN in every column. A client reads a column with
+# np.frombuffer(response['protein'], dtype='<f4').
+
+CONTENT_TYPE = 'application/msgpack'
+CONTENT_TYPES = (CONTENT_TYPE, 'application/x-msgpack')
+
+# msgpack is optional: without it the service answers columnar requests with 415/406
+MSGPACK_AVAILABLE = msgpack is not None
+
+def is_columnar(content_type):
+    return (content_type or '').split(';')[0].strip().lower() in CONTENT_TYPES
+
+def wants_columnar(content_type, accept):
+    """Whether a request sent msgpack or asked for it back"""
+    return is_columnar(content_type) or any(t in (accept or '').lower() for t in CONTENT_TYPES)
+
+def decode_request(body):
+    """(meals, meal_types, deadline_ms) from a msgpack request body; ValueError if malformed"""
+    try:
+        data = msgpack.unpackb(body, raw=False)
+    except Exception as e:
+        raise ValueError(f'Invalid msgpack body: {str(e)}')
+    if not isinstance(data, dict) or not isinstance(data.get('meals'), list):
+        raise ValueError('Missing meals column')
+
+    meals = data['meals']
+    meal_types = data.get('meal_types', data.get('meal_type'))
+    if isinstance(meal_types, str) or meal_types is None:
+        meal_types = [meal_types] * len(meals)
+    elif not isinstance(meal_types, list) or len(meal_types) != len(meals):
+        raise ValueError('meal_types must be one string or a list as long as meals')
+    return meals, meal_types, data.get('deadline_ms')
+
+def items_to_columns(items):
+    """(meals, meal_types) from a JSON items list, for JSON requests that want a columnar answer"""
+    meals = [item.get('meal') if isinstance(item, dict) else None for item in items]
+    meal_types = [item.get('meal_type') if isinstance(item, dict) else None for item in items]
+    return meals, meal_types
+
+def encode_response(macros, sources, errors):
+    """msgpack bytes for an (n, 4) float32 macro array, per-row sources and {row: error}"""
+    macros = np.asarray(macros, dtype='<f4')
+    response = {'count': len(macros), 'columns': MACRO_TARGETS, 'source': sources,
+                'errors': {int(row): message for row, message in errors.items()}}
+    for i, target in enumerate(MACRO_TARGETS):
+        response[target] = np.ascontiguousarray(macros[:, i]).tobytes()
+    return msgpack.packb(response, use_bin_type=True)
+
+def decode_response(body):
+    """Client side: ({macro: float32 array}, sources, {row: error}) from a columnar response"""
+    data = msgpack.unpackb(body, raw=False, strict_map_key=False)
+    columns = {target: np.frombuffer(data[target], dtype='<f4') for target in data['columns']}
+    return columns, data['source'], data['errors']
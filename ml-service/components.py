@@ -0,0 +1,145 @@
+import csv
+import numpy as np
+
+from prediction_cache import canonical_description
+
+# Compositional macro estimates for "<food> with <food> and <food> with <food>".
+#
+# generate_meals.py builds every training meal by joining foods from
+# nutrition_data.csv with " with " / " and " and summing their per-100g
+# macros scaled by a serving size that depends on the food's slot (protein,
+# carb, vegetable, fat...). ComponentTable reverses that: it splits a
+# description back into known foods, looks up each (slot, food) pair's
+# macro contribution and adds them up, with no ensemble pass at all.
+#
+# Contributions are fit on the training meals: first one serving scale per
+# slot and macro (least squares over per-100g macros), then a ridge-
+# regularized correction per (slot, food) pair seen in training. Pairs never
+# seen in training fall back to per-100g macros times the slot's scale.
+
+MACRO_COLUMNS = ['calories', 'protein', 'carbs', 'fat']
+SEPARATORS = ('with', 'and')
+
+def read_macros(filename):
+    """[(description, [calories, protein, carbs, fat])] rows of a nutrition or training CSV"""
+    with open(filename, newline='') as f:
+        return [
+            (row['description'], [float(row[column]) for column in MACRO_COLUMNS])
+            for row in csv.DictReader(f)
+        ]
+
+class ComponentTable:
+    """Known foods and their per-slot macro contributions for one meal type"""
+
+    def __init__(self, foods, contributions, slot_scales):
+        self.foods = foods                  # canonical food -> per-100g macros
+        self.contributions = contributions  # (slot, canonical food) -> macros
+        self.slot_scales = slot_scales      # slot -> per-macro serving scale
+
+    @classmethod
+    def fit(cls, nutrition_file, training_file, ridge=1.0, rows=None):
+        """Fit contributions on a meal type's training meals (optionally only some rows)"""
+        foods = {}
+        for description, macros in read_macros(nutrition_file):
+            foods.setdefault(canonical_description(description), np.array(macros))
+        table = cls(foods, {}, {})
+
+        meals = read_macros(training_file)
+        if rows is not None:
+            meals = [meals[i] for i in rows]
+        parsed = [(table.parse(description), macros) for description, macros in meals]
+        parsed = [(components, macros) for components, macros in parsed if components]
+        Y = np.array([macros for _, macros in parsed])
+
+        # One serving scale per slot and macro: Y ~ sum over slots of scale * per-100g macros
+        slots = sorted({slot for components, _ in parsed for slot, _ in components})
+        per_slot = np.zeros((len(parsed), len(slots), len(MACRO_COLUMNS)))
+        for i, (components, _) in enumerate(parsed):
+            for slot, food in components:
+                per_slot[i, slots.index(slot)] += foods[food]
+        scales = np.column_stack([
+            np.linalg.lstsq(per_slot[:, :, m], Y[:, m], rcond=None)[0]
+            for m in range(len(MACRO_COLUMNS))
+        ])
+        table.slot_scales = dict(zip(slots, scales))
+
+        # Ridge correction per (slot, food), shrunk towards the scaled prior
+        pairs = sorted({pair for components, _ in parsed for pair in components})
+        column = {pair: j for j, pair in enumerate(pairs)}
+        prior = np.array([foods[food] * table.slot_scales[slot] for slot, food in pairs])
+        A = np.zeros((len(parsed), len(pairs)))
+        for i, (components, _) in enumerate(parsed):
+            for pair in components:
+                A[i, column[pair]] += 1
+        correction = np.linalg.solve(A.T @ A + ridge * np.eye(len(pairs)), A.T @ (Y - A @ prior))
+        table.contributions = {pair: prior[j] + correction[j] for pair, j in column.items()}
+
+        return table
+
+    def parse(self, description):
+        """[(slot, food)] for a description made only of known foods, else None.
+
+        Splits happen at "with"/"and" words, preferring the fewest (longest)
+        foods, since food names can contain those words themselves. A slot
+        is the separator before the food plus how often it has occurred:
+        '' for the first food, then 'with1', 'and1', 'with2', ...
+        """
+        tokens = canonical_description(description).split()
+        n = len(tokens)
+        if n == 0:
+            return None
+
+        # best[end] = (foods so far, start of the last food) for tokens[:end]
+        starts = [0] + [i + 1 for i in range(n) if tokens[i] in SEPARATORS]
+        best = {0: (0, None)}
+        for start in starts:
+            # A food after a separator needs a food right before the separator
+            previous = 0 if start == 0 else start - 1
+            if start > 0 and (previous == 0 or previous not in best):
+                continue
+            for end in range(start + 1, n + 1):
+                if end < n and tokens[end] not in SEPARATORS:
+                    continue
+                if ' '.join(tokens[start:end]) in self.foods:
+                    candidate = (best[previous][0] + 1, start)
+                    if end not in best or candidate[0] < best[end][0]:
+                        best[end] = candidate
+        if n not in best:
+            return None
+
+        pieces = []
+        end = n
+        while end > 0:
+            start = best[end][1]
+            separator = tokens[start - 1] if start > 0 else ''
+            pieces.append((separator, ' '.join(tokens[start:end])))
+            end = start - 1 if start > 0 else 0
+        pieces.reverse()
+
+        counts = {}
+        components = []
+        for separator, food in pieces:
+            counts[separator] = counts.get(separator, 0) + 1
+            components.append((f'{separator}{counts[separator]}' if separator else '', food))
+        return components
+
+    def contribution(self, slot, food):
+        """Macros one food adds in one slot (None for a slot never seen in training)"""
+        macros = self.contributions.get((slot, food))
+        if macros is None and slot in self.slot_scales:
+            macros = self.contributions[(slot, food)] = self.foods[food] * self.slot_scales[slot]
+        return macros
+
+    def predict(self, description):
+        """Summed (calories, protein, carbs, fat) array, or None if the description doesn't parse"""
+        components = self.parse(description)
+        if components is None:
+            return None
+
+        total = np.zeros(len(MACRO_COLUMNS))
+        for slot, food in components:
+            macros = self.contribution(slot, food)
+            if macros is None:
+                return None
+            total += macros
+        return np.maximum(total, 0.0)
@@ -0,0 +1,178 @@
+import json
+import os
+import sys
+import time
+import numpy as np
+
+from inference import MACRO_TARGETS, derive_calories, predict_rows, transform_descriptions
+from model_bundle import sha256_file
+from tree_ensemble import as_float32_rows
+
+# Distilled fast tier: one linear map from a meal type's TF-IDF features to
+# all four macros, fit to the ensembles' own predictions (not the labels).
+#
+#   <meal_type>/models/distilled.npz
+#       coef        (n_features, 4) float64
+#       intercept   (4,) float64
+#       alpha       ridge penalty picked on held-out agreement with the ensembles
+#       sources     JSON {joblib file: sha256} of the ensembles it was fit to
+#
+# A predict is one (n_rows, 200) x (200, 4) product, so app.py answers with
+# it when a request's deadline leaves no room for the full ensembles.
+# Training descriptions are augmented with shorter variants (one component
+# dropped) so the student also sees the ensembles on partial meals.
+
+DISTILLED_FILE = 'distilled.npz'
+RIDGE_ALPHAS = [0.01, 0.03, 0.1, 0.3, 1.0]
+SEPARATOR_WORDS = (' with ', ' and ')
+
+class DistilledModel:
+    """Linear student of a meal type's ensembles, predicting (n_rows, 4) macros"""
+
+    def __init__(self, coef, intercept, alpha=None, sources=None):
+        self.coef = np.asarray(coef, dtype=np.float64)
+        self.intercept = np.asarray(intercept, dtype=np.float64)
+        self.alpha = alpha
+        self.sources = sources or {}
+
+    @property
+    def n_features(self):
+        return self.coef.shape[0]
+
+    def predict(self, X):
+        return as_float32_rows(X) @ self.coef + self.intercept
+
+    def save(self, path):
+        np.savez(path, coef=self.coef, intercept=self.intercept, alpha=np.float64(self.alpha),
+                 sources=np.array(json.dumps(self.sources, sort_keys=True)))
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as archive:
+            return cls(archive['coef'], archive['intercept'], float(archive['alpha']),
+                       json.loads(str(archive['sources'])))
+
+def predict_distilled(models, X):
+    """(n_rows, 4) macros from the distilled model, with calories derived the way the full tier derives them"""
+    macros = np.maximum(models['distilled'].predict(X), 0.0)
+    if models['calorie_mode'] != 'model':
+        macros[:, 0] = derive_calories(macros[:, 1], macros[:, 2], macros[:, 3], models['calorie_factor'])
+    return macros
+
+def fit_ridge(X, Y, alpha):
+    """Closed-form ridge with an unpenalized intercept"""
+    x_mean, y_mean = X.mean(axis=0), Y.mean(axis=0)
+    Xc = X - x_mean
+    coef = np.linalg.solve(Xc.T @ Xc + alpha * np.eye(X.shape[1]), Xc.T @ (Y - y_mean))
+    return coef, y_mean - x_mean @ coef
+
+def augment(descriptions, seed=0):
+    """The descriptions plus one shorter variant each (a random " with"/" and" component dropped)"""
+    rng = np.random.RandomState(seed)
+    variants = list(descriptions)
+    for description in descriptions:
+        pieces = [description]
+        for separator in SEPARATOR_WORDS:
+            pieces = [part for piece in pieces for part in piece.split(separator)]
+        if len(pieces) > 1:
+            del pieces[rng.randint(len(pieces))]
+            variants.append(' with '.join(pieces))
+    return variants
+
+def teacher_models(model_dir):
+    """The ensembles to distill, with calories predicted when a calories model exists, else derived"""
+    from model_registry import load_joblib_models
+
+    models = load_joblib_models(model_dir)
+    has_calories = 'calories' in models or 'macros' in models
+    models['calorie_mode'], models['calorie_factor'] = ('model', None) if has_calories else ('derived', 1.0)
+    return models
+
+def distill(teacher, descriptions, seed=0):
+    """Fit a DistilledModel to the teacher's predictions on (augmented) descriptions"""
+    X = as_float32_rows(transform_descriptions(teacher, augment(descriptions, seed))).astype(np.float64)
+    Y = predict_rows(teacher, X.astype(np.float32))
+
+    # Pick the penalty on held-out agreement with the teacher, then refit on everything
+    order = np.random.RandomState(seed).permutation(len(X))
+    held_out, fit_rows = order[:len(X) // 5], order[len(X) // 5:]
+    def disagreement(alpha):
+        coef, intercept = fit_ridge(X[fit_rows], Y[fit_rows], alpha)
+        return np.abs(X[held_out] @ coef + intercept - Y[held_out]).mean()
+    alpha = min(RIDGE_ALPHAS, key=disagreement)
+
+    coef, intercept = fit_ridge(X, Y, alpha)
+    return DistilledModel(coef, intercept, alpha)
+
+def export_distilled(model_dir, training_file, meal_type):
+    """Fit and save model_dir/distilled.npz for the ensembles in model_dir"""
+    # pandas only for training: the app imports this module for serving
+    import pandas as pd
+    teacher = teacher_models(model_dir)
+    student = distill(teacher, list(pd.read_csv(training_file)['description']))
+    student.sources = {
+        name: sha256_file(os.path.join(model_dir, name))
+        for name in sorted(os.listdir(model_dir)) if name.endswith('.joblib')
+    }
+    student.save(os.path.join(model_dir, DISTILLED_FILE))
+    print(f"  Saved {meal_type} distilled model to {model_dir}/{DISTILLED_FILE} (alpha={student.alpha})")
+    return student
+
+def time_call(predict, repeats=200):
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        predict()
+        times.append(time.perf_counter() - start)
+    return float(np.median(times))
+
+def tier_report(meal_type):
+    """Held-out accuracy of the full and fast tiers against the labels, and their 1-row latency"""
+    import pandas as pd
+    teacher = teacher_models(f'{meal_type}/models')
+    df = pd.read_csv(f'{meal_type}/data/training_data.csv')
+
+    # The split train_model.py evaluates on (test_size=0.2, random_state=42)
+    from sklearn.model_selection import train_test_split
+    train, test = train_test_split(df, test_size=0.2, random_state=42)
+    student = distill(teacher, list(train['description']))
+    teacher['distilled'] = student
+
+    X = transform_descriptions(teacher, list(test['description']))
+    full = predict_rows(teacher, as_float32_rows(X))
+    fast = predict_distilled(teacher, X)
+    truth = test[MACRO_TARGETS].values
+
+    print(f"\n{meal_type} ({len(test)} held-out meals, alpha={student.alpha})")
+    print(f"  {'Macro':<10}{'Full MAE':>10}{'Fast MAE':>10}{'Gap':>8}{'Fast vs full':>14}")
+    for i, target in enumerate(MACRO_TARGETS):
+        full_mae = np.abs(full[:, i] - truth[:, i]).mean()
+        fast_mae = np.abs(fast[:, i] - truth[:, i]).mean()
+        agreement = np.abs(fast[:, i] - full[:, i]).mean()
+        print(f"  {target.capitalize():<10}{full_mae:>10.2f}{fast_mae:>10.2f}{fast_mae - full_mae:>+8.2f}{agreement:>14.2f}")
+
+    meal = [test['description'].iloc[0]]
+    X_one = transform_descriptions(teacher, meal)
+    full_ms = time_call(lambda: predict_rows(teacher, as_float32_rows(X_one))) * 1000
+    fast_ms = time_call(lambda: predict_distilled(teacher, X_one)) * 1000
+    transform_ms = time_call(lambda: transform_descriptions(teacher, meal)) * 1000
+    print(f"  1-row predict: full {full_ms:.3f}ms, fast {fast_ms:.3f}ms (+ {transform_ms:.3f}ms transform)")
+
+if __name__ == "__main__":
+    # Run from ml-service/:
+    #   python distill.py [meal_type ...]            fit and save distilled.npz
+    #   python distill.py --report [meal_type ...]   offline tier accuracy report
+    report = '--report' in sys.argv
+    meal_types = [arg for arg in sys.argv[1:] if arg != '--report'] or \
+        ['breakfast', 'lunch', 'dinner', 'snacks', 'desserts']
+
+    if report:
+        print("📊 Full vs fast tier accuracy")
+        print("="*60)
+        for meal_type in meal_types:
+            tier_report(meal_type)
+    else:
+        print("🧪 Distilling fast-tier models")
+        print("="*60)
+        for meal_type in meal_types:
+            export_distilled(f'{meal_type}/models', f'{meal_type}/data/training_data.csv', meal_type)
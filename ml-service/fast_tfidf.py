@@ -0,0 +1,146 @@
+import re
+import numpy as np
+
+# Serving-time TF-IDF transformer compiled from a fitted TfidfVectorizer.
+#
+# The vectorizer's vocabulary is folded into a term -> column table and the
+# analyzer is reduced to a regex findall, a stop-word filter and n-gram
+# joins. transform() counts columns for the whole batch with one bincount,
+# applies idf as one vector multiply and writes dense float64 rows directly
+# instead of going through scipy sparse matrices.
+# Output matches vectorizer.transform(...).toarray() to within floating-
+# point rounding (the l2 norm is summed in a different order).
+
+class CompiledTfidf:
+    """Lean word n-gram TF-IDF transformer with a precomputed term table"""
+
+    def __init__(self, terms, idf, token_pattern, lowercase=True, stop_words=(),
+                 ngram_range=(1, 1), norm='l2', sublinear_tf=False):
+        self.terms = list(terms)
+        self.idf = np.asarray(idf, dtype=np.float64)
+        self.token_pattern = token_pattern
+        self.lowercase = bool(lowercase)
+        self.stop_words = frozenset(stop_words)
+        self.ngram_range = (int(ngram_range[0]), int(ngram_range[1]))
+        self.norm = norm
+        self.sublinear_tf = bool(sublinear_tf)
+
+        self._findall = re.compile(token_pattern).findall
+        self.table = {term: column for column, term in enumerate(self.terms)}
+
+        # Only n-grams that are actually in the vocabulary matter for
+        # transform(), so skip building the ones that can't be: an n-gram
+        # is only joined when its first token starts some vocabulary n-gram
+        self._ngram_starts = frozenset(term.split(' ')[0] for term in self.terms if ' ' in term)
+
+        # Transformers with equal signatures produce the same terms for any text
+        self.analyzer_signature = (self.token_pattern, self.lowercase,
+                                   tuple(sorted(self.stop_words)), self.ngram_range)
+
+    @property
+    def n_features(self):
+        return len(self.terms)
+
+    @classmethod
+    def from_vectorizer(cls, vectorizer):
+        params = vectorizer.get_params()
+        unsupported = [
+            name for name, ok in [
+                ('analyzer', params['analyzer'] == 'word'),
+                ('preprocessor', params['preprocessor'] is None),
+                ('tokenizer', params['tokenizer'] is None),
+                ('strip_accents', params['strip_accents'] is None),
+                ('input', params['input'] == 'content'),
+                ('norm', params['norm'] in ('l1', 'l2', None)),
+                ('use_idf', params['use_idf'])
+            ] if not ok
+        ]
+        if unsupported:
+            raise TypeError(f'Unsupported vectorizer settings: {unsupported}')
+
+        terms = [None] * len(vectorizer.vocabulary_)
+        for term, column in vectorizer.vocabulary_.items():
+            terms[column] = term
+
+        return cls(
+            terms=terms,
+            idf=vectorizer.idf_,
+            token_pattern=params['token_pattern'],
+            lowercase=params['lowercase'],
+            stop_words=vectorizer.get_stop_words() or (),
+            ngram_range=params['ngram_range'],
+            norm=params['norm'],
+            sublinear_tf=params['sublinear_tf']
+        )
+
+    def extract_terms(self, text):
+        """Tokens and n-grams for one text, as the vectorizer's analyzer would produce"""
+        if self.lowercase:
+            text = text.lower()
+        tokens = [token for token in self._findall(text) if token not in self.stop_words]
+
+        min_n, max_n = self.ngram_range
+        if max_n == 1:
+            return tokens
+
+        terms = tokens[:] if min_n == 1 else []
+        for n in range(max(min_n, 2), max_n + 1):
+            terms.extend(' '.join(tokens[i:i + n]) for i in range(len(tokens) - n + 1))
+        return terms
+
+    def _columns(self, text):
+        """Vocabulary columns hit by one text (with repeats), skipping dead n-grams"""
+        if self.lowercase:
+            text = text.lower()
+        tokens = [token for token in self._findall(text) if token not in self.stop_words]
+        table = self.table
+        starts = self._ngram_starts
+        min_n, max_n = self.ngram_range
+
+        columns = [table[token] for token in tokens if token in table] if min_n == 1 else []
+        for n in range(max(min_n, 2), max_n + 1):
+            for i in range(len(tokens) - n + 1):
+                if tokens[i] in starts:
+                    column = table.get(' '.join(tokens[i:i + n]))
+                    if column is not None:
+                        columns.append(column)
+        return columns
+
+    def _weight(self, counts):
+        """Turn an (n_rows, n_features) count matrix into normalized TF-IDF in place"""
+        if self.sublinear_tf:
+            nonzero = counts > 0
+            np.log(counts, out=counts, where=nonzero)
+            counts[nonzero] += 1
+        counts *= self.idf
+
+        if self.norm == 'l2':
+            norms = np.sqrt(np.einsum('ij,ij->i', counts, counts))
+        elif self.norm == 'l1':
+            norms = np.abs(counts).sum(axis=1)
+        else:
+            return counts
+        norms[norms == 0] = 1.0
+        counts /= norms[:, None]
+        return counts
+
+    def project(self, terms):
+        """TF-IDF row (1, n_features) for terms already produced by extract_terms"""
+        counts = np.zeros((1, self.n_features))
+        table = self.table
+        for term in terms:
+            column = table.get(term)
+            if column is not None:
+                counts[0, column] += 1
+        return self._weight(counts)
+
+    def transform(self, texts):
+        """Dense (n_texts, n_features) float64 TF-IDF matrix"""
+        n_features = self.n_features
+        flat = []
+        for i, text in enumerate(texts):
+            offset = i * n_features
+            flat.extend(offset + column for column in self._columns(text))
+
+        counts = np.bincount(flat, minlength=len(texts) * n_features).astype(np.float64)
+        return self._weight(counts.reshape(len(texts), n_features))
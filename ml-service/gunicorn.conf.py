@@ -0,0 +1,44 @@
+import gc
+import os
+import sys
+
+# gunicorn -c gunicorn.conf.py app:app
+#
+# With preload_app the master imports app.py (and loads every model set)
+# once before forking, so workers share the model arrays copy-on-write
+# instead of each loading a private copy. Combine with MODEL_MMAP=1 to also
+# share the pages with other processes mapping the same bundles.
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '5000')}"
+workers = int(os.environ.get('WEB_CONCURRENCY', 2))
+# More than one thread switches gunicorn to gthread workers, which lets
+# MICROBATCH=1 coalesce concurrent requests within a worker and gives
+# admission control (ADMISSION_CONTROL, on by default) concurrent requests
+# to limit: a sync worker serves one request at a time, so it never sheds
+threads = int(os.environ.get('GUNICORN_THREADS', 1))
+preload_app = os.environ.get('GUNICORN_PRELOAD', '1') == '1'
+
+# Threads don't survive fork, so a background load started in the master
+# would never finish in the workers: load eagerly before forking instead
+if preload_app and os.environ.get('MODEL_LOADING') == 'background':
+    os.environ['MODEL_LOADING'] = 'eager'
+
+def when_ready(server):
+    if threads == 1 and os.environ.get('ADMISSION_CONTROL', '1') == '1':
+        server.log.warning("Admission control is on but workers are single-threaded: it will never queue "
+                           "or shed requests (set GUNICORN_THREADS > 1 to use it)")
+    if preload_app:
+        # Move everything loaded so far out of the collector's reach, so
+        # garbage collection in the workers doesn't write to (and un-share)
+        # the pages holding the preloaded objects
+        gc.collect()
+        gc.freeze()
+        server.log.info(f"Preloaded app; froze {gc.get_freeze_count()} objects before forking")
+
+def post_worker_init(worker):
+    # Model file watching runs in each worker only: a thread started in the
+    # master wouldn't survive the fork, and the master serves no requests.
+    # The worker has imported app.py by now (preloaded or not).
+    service = sys.modules.get('app')
+    if hasattr(service, 'start_model_watcher'):
+        service.start_model_watcher()
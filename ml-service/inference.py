@@ -0,0 +1,124 @@
+import os
+import threading
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+
+from tree_ensemble import as_float32_rows
+
+# Prediction core shared by app.py, score_cli.py and the model registry's warmup:
+# description text -> TF-IDF rows -> (n_rows, 4) macro matrix.
+
+MACRO_TARGETS = ['calories', 'protein', 'carbs', 'fat']
+
+# Transform requests with the compiled TF-IDF table (fast_tfidf.py)
+# instead of the sklearn vectorizer
+FAST_TFIDF = os.environ.get('FAST_TFIDF', '1') == '1'
+
+# Every predict runs serially on the request's own thread, except batches
+# of at least PARALLEL_BATCH_ROWS rows, which are split into row chunks
+# across INFERENCE_THREADS threads (1 disables this). Keep
+# INFERENCE_THREADS * gunicorn workers near the core count.
+INFERENCE_THREADS = int(os.environ.get('INFERENCE_THREADS', min(4, os.cpu_count() or 1)))
+PARALLEL_BATCH_ROWS = int(os.environ.get('PARALLEL_BATCH_ROWS', 256))
+
+_inference_pool = None
+_inference_pool_lock = threading.Lock()
+
+def inference_pool():
+    """Shared thread pool for large batches, created on first use (after any fork)"""
+    global _inference_pool
+    with _inference_pool_lock:
+        if _inference_pool is None:
+            _inference_pool = ThreadPoolExecutor(max_workers=INFERENCE_THREADS, thread_name_prefix='inference')
+        return _inference_pool
+
+def round_macros(values):
+    """Turn a length-4 macro vector into a rounded {macro: value} dict"""
+    return {target: round(float(value), 1) for target, value in zip(MACRO_TARGETS, values)}
+
+def derive_calories(protein, carbs, fat, factor=1.0):
+    """Calories from macros using 4/4/9 kcal per gram"""
+    return factor * (4*protein + 4*carbs + 9*fat)
+
+def predict_macro_matrix(models, X):
+    """Predict an (n_rows, 4) array of macros in MACRO_TARGETS order"""
+    # Dense float32 rows once, instead of a sparse conversion per model
+    X = as_float32_rows(X)
+
+    # Rows are predicted independently, so chunking doesn't change results;
+    # the tree gathers (and sklearn's tree predict) release the GIL
+    if INFERENCE_THREADS > 1 and X.shape[0] >= PARALLEL_BATCH_ROWS:
+        chunks = np.array_split(X, INFERENCE_THREADS)
+        return np.concatenate(list(inference_pool().map(lambda rows: predict_rows(models, rows), chunks)))
+
+    return predict_rows(models, X)
+
+def predict_rows(models, X):
+    """Serial predict of float32 rows, one pass per model"""
+    if 'macros' in models:
+        # Joint model: all four macros in one pass over the trees
+        macros = np.array(models['macros'].predict(X), dtype=float).reshape(X.shape[0], len(MACRO_TARGETS))
+    else:
+        macros = np.empty((X.shape[0], len(MACRO_TARGETS)))
+        for i, target in enumerate(MACRO_TARGETS[1:], start=1):
+            macros[:, i] = models[target].predict(X)
+        if models['calorie_mode'] == 'model':
+            macros[:, 0] = models['calories'].predict(X)
+
+    if models['calorie_mode'] != 'model':
+        macros[:, 0] = derive_calories(macros[:, 1], macros[:, 2], macros[:, 3], models['calorie_factor'])
+
+    return macros
+
+def predict_from_features(models, X):
+    """Run each macro model once over a feature matrix and return rounded per-row dicts"""
+    return [round_macros(row) for row in predict_macro_matrix(models, X)]
+
+def predict_components(models, meal_descriptions):
+    """Macro rows from the component table, None for descriptions it can't split"""
+    rows = [models['components'].predict(description) for description in meal_descriptions]
+    if models['calorie_mode'] != 'model':
+        for row in rows:
+            if row is not None:
+                row[0] = derive_calories(row[1], row[2], row[3], models['calorie_factor'])
+    return rows
+
+def predict_descriptions(models, meal_descriptions):
+    """{'predictions', 'source'} per description: component table first (if loaded), then the models"""
+    results = [None] * len(meal_descriptions)
+    pending = list(range(len(meal_descriptions)))
+
+    if 'components' in models:
+        for i, row in enumerate(predict_components(models, meal_descriptions)):
+            if row is not None:
+                results[i] = {'predictions': round_macros(row), 'source': 'components'}
+        pending = [i for i in pending if results[i] is None]
+
+    if pending:
+        # Transform everything left at once
+        X = transform_descriptions(models, [meal_descriptions[i] for i in pending])
+        for i, predictions in zip(pending, predict_from_features(models, X)):
+            results[i] = {'predictions': predictions, 'source': 'model'}
+
+    return results
+
+def lookup_entry(models, meal_description, near=True):
+    """Stored macros for a (near-)verbatim training meal or single food, else None"""
+    if 'lookup' not in models:
+        return None
+    hit = models['lookup'].lookup(meal_description, near=near)
+    return None if hit is None else {'predictions': round_macros(hit[0]), 'source': 'lookup'}
+
+def score_descriptions(models, meal_descriptions):
+    """What app.py answers for uncached meals: stored macros (lookup index, if loaded), else predict_descriptions"""
+    results = [lookup_entry(models, description) for description in meal_descriptions]
+    pending = [i for i, result in enumerate(results) if result is None]
+    for i, entry in zip(pending, predict_descriptions(models, [meal_descriptions[i] for i in pending])):
+        results[i] = entry
+    return results
+
+def transform_descriptions(models, meal_descriptions):
+    """TF-IDF features via the compiled transformer, or the sklearn vectorizer"""
+    if FAST_TFIDF or 'vectorizer' not in models:
+        return models['tfidf'].transform(meal_descriptions)
+    return models['vectorizer'].transform(meal_descriptions)
@@ -0,0 +1,152 @@
+import zlib
+import numpy as np
+
+from components import SEPARATORS, read_macros
+from prediction_cache import canonical_description
+
+# Stored-value lookup for descriptions that (nearly) repeat the data the
+# models were trained on.
+#
+#   exact       canonical description of a training meal, or of a single
+#               food from nutrition_data.csv
+#   token set   same words in a different order or with repeats
+#   near        MinHash/LSH over word 1- and 2-gram shingles, confirmed by
+#               the exact Jaccard similarity (>= threshold)
+#
+# Training meals that repeat a description (with different portions) are
+# averaged. A single food is served as one main-slot serving: its per-100g
+# macros times the component table's serving scale for the first slot.
+#
+# The near-duplicate threshold is deliberately strict: at 0.8, training
+# meals matched to a *different* meal were less accurate than the models,
+# while no two distinct training meals reach 0.9.
+
+NUM_PERMUTATIONS = 32
+BANDS = 8                   # 8 bands of 4 rows: pairs at 0.9 are candidates >99.9% of the time
+MERSENNE_PRIME = (1 << 61) - 1
+
+def shingles(tokens):
+    """Word 1- and 2-grams; bare "with"/"and" are left out since nearly every meal shares them"""
+    return {t for t in tokens if t not in SEPARATORS} | {f'{a} {b}' for a, b in zip(tokens, tokens[1:])}
+
+def jaccard(a, b):
+    return len(a & b) / len(a | b) if a or b else 0.0
+
+class LookupIndex:
+    """Canonical, token-set and MinHash indexes over one meal type's stored macros"""
+
+    def __init__(self, entries, threshold=0.9, seed=0):
+        self.threshold = float(threshold)
+        self.entries = entries          # canonical description -> (macros, origin)
+        self.hits = {'exact': 0, 'token_set': 0, 'near': 0}
+
+        rng = np.random.RandomState(seed)
+        self._a = rng.randint(1, 1 << 30, size=NUM_PERMUTATIONS).astype(np.int64)
+        self._b = rng.randint(0, 1 << 30, size=NUM_PERMUTATIONS).astype(np.int64)
+
+        self._token_sets = {}
+        self._shingles = {}
+        for canonical in entries:
+            tokens = canonical.split()
+            key = ' '.join(sorted(set(tokens)))
+            # A token set shared by different entries is ambiguous: skip it
+            self._token_sets[key] = None if key in self._token_sets else canonical
+            self._shingles[canonical] = shingles(tokens)
+
+        self._buckets = {}
+        indexed = [canonical for canonical, shingle_set in self._shingles.items() if shingle_set]
+        if indexed:
+            signatures = self._signatures([self._shingles[canonical] for canonical in indexed])
+            for canonical, signature in zip(indexed, signatures):
+                for band in self._bands(signature):
+                    self._buckets.setdefault(band, []).append(canonical)
+
+    @classmethod
+    def build(cls, training_file, nutrition_file=None, serving_macros=None, threshold=0.9):
+        """Index training meals, plus single foods when serving_macros(food) can size them"""
+        totals = {}
+        for description, macros in read_macros(training_file):
+            canonical = canonical_description(description)
+            if canonical:
+                total, count = totals.get(canonical, (0.0, 0))
+                totals[canonical] = (total + np.array(macros), count + 1)
+        entries = {canonical: (total / count, 'training') for canonical, (total, count) in totals.items()}
+
+        if nutrition_file is not None and serving_macros is not None:
+            for description, _ in read_macros(nutrition_file):
+                canonical = canonical_description(description)
+                if canonical and canonical not in entries:
+                    macros = serving_macros(canonical)
+                    if macros is not None:
+                        entries[canonical] = (np.asarray(macros, dtype=float), 'nutrition')
+
+        return cls(entries, threshold=threshold)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def _signatures(self, shingle_sets):
+        """MinHash signatures (n_sets, NUM_PERMUTATIONS) of non-empty shingle sets, in one pass"""
+        hashes = np.array([zlib.crc32(s.encode()) for shingle_set in shingle_sets for s in shingle_set],
+                          dtype=np.int64)
+        starts = np.cumsum([0] + [len(shingle_set) for shingle_set in shingle_sets[:-1]])
+        permuted = (hashes[:, None] * self._a + self._b) % MERSENNE_PRIME
+        return np.minimum.reduceat(permuted, starts, axis=0)
+
+    def _bands(self, signature):
+        rows = NUM_PERMUTATIONS // BANDS
+        return [(band, signature[band*rows:(band + 1)*rows].tobytes()) for band in range(BANDS)]
+
+    def lookup(self, description, near=True):
+        """(macros, match, similarity) for a stored description close enough, else None.
+
+        near=False only tries the exact and token-set matches (a few dict lookups).
+        """
+        canonical = canonical_description(description)
+        if not canonical:
+            return None
+
+        entry = self.entries.get(canonical)
+        if entry is not None:
+            self.hits['exact'] += 1
+            return entry[0], 'exact', 1.0
+
+        tokens = canonical.split()
+        match = self._token_sets.get(' '.join(sorted(set(tokens))))
+        if match is not None:
+            self.hits['token_set'] += 1
+            return self.entries[match][0], 'token_set', 1.0
+
+        if not near:
+            return None
+
+        query = shingles(tokens)
+        if not query:
+            return None
+        candidates = set()
+        for band in self._bands(self._signatures([query])[0]):
+            candidates.update(self._buckets.get(band, ()))
+
+        # Jaccard >= t needs t <= |A| / |B| <= 1/t, so most candidates are
+        # rejected on size before the set intersection
+        low, high = len(query) * self.threshold, len(query) / self.threshold
+        best, best_similarity = None, self.threshold
+        for candidate in candidates:
+            other = self._shingles[candidate]
+            if low <= len(other) <= high:
+                similarity = jaccard(query, other)
+                if similarity >= best_similarity:
+                    best, best_similarity = candidate, similarity
+        if best is None:
+            return None
+
+        self.hits['near'] += 1
+        return self.entries[best][0], 'near', round(best_similarity, 3)
+
+    def stats(self):
+        return {
+            'entries': len(self.entries),
+            'training_entries': sum(origin == 'training' for _, origin in self.entries.values()),
+            'threshold': self.threshold,
+            'hits': dict(self.hits)
+        }
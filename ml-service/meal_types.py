@@ -0,0 +1,18 @@
+# Meal types the service has models for, and the spellings callers may use.
+# Shared by app.py, score_cli.py and shard_router.py so they accept the same names.
+
+MEAL_TYPES = ['breakfast', 'lunch', 'dinner', 'snacks', 'desserts']
+
+# Meal type spellings used by the JS callers
+MEAL_TYPE_ALIASES = {
+    'dessert': 'desserts',
+    'snack': 'snacks'
+}
+
+def normalize_meal_type(meal_type, served=MEAL_TYPES):
+    """Map a caller-supplied meal type onto one of `served` (or None)"""
+    if not isinstance(meal_type, str):
+        return None
+    meal_type = meal_type.strip().lower()
+    meal_type = MEAL_TYPE_ALIASES.get(meal_type, meal_type)
+    return meal_type if meal_type in served else None
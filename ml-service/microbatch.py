@@ -0,0 +1,100 @@
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+# Request coalescing for single-meal predictions.
+#
+# A 1-row predict costs nearly as much per call as a 30-row one: the fixed
+# overhead (transform setup, one pass per model, Python glue) dominates. With
+# many concurrent requests in a threaded worker, MicroBatcher parks each
+# single prediction in a per-meal-type queue; a dispatcher thread per meal
+# type waits up to window_ms after the first item (or until max_items are
+# queued), predicts everything collected as one batch and hands each waiting
+# request its own result.
+#
+# Only threads inside one worker process are coalesced, so this pays off
+# with gunicorn's gthread workers (GUNICORN_THREADS > 1), not one-thread sync
+# workers, where requests never overlap.
+
+class MicroBatcher:
+    """Per-key queues whose items are predicted together by predict_many(key, items)"""
+
+    def __init__(self, predict_many, window_ms=2.0, max_items=32):
+        self.predict_many = predict_many
+        self.window = float(window_ms) / 1000
+        self.max_items = max(1, int(max_items))
+        self.batches = 0
+        self.items = 0
+        self.full_batches = 0
+        self.wait_seconds = 0.0
+        self.largest_batch = 0
+        self._queues = {}
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def _queue(self, key):
+        """The key's queue, starting its dispatcher on first use (and again after a fork)"""
+        with self._lock:
+            if self._pid != os.getpid():
+                # Dispatcher threads don't survive fork: start over in the child
+                self._queues = {}
+                self._pid = os.getpid()
+            pending = self._queues.get(key)
+            if pending is None:
+                pending = self._queues[key] = queue.Queue()
+                threading.Thread(target=self._dispatch, args=(key, pending),
+                                 name=f'microbatch-{key}', daemon=True).start()
+            return pending
+
+    def submit(self, key, item):
+        """Queue one item; the Future resolves to its entry of predict_many's result"""
+        future = Future()
+        self._queue(key).put((item, future, time.perf_counter()))
+        return future
+
+    def _collect(self, pending):
+        """Block for a first item, then gather more until the window closes or the batch is full"""
+        batch = [pending.get()]
+        deadline = time.perf_counter() + self.window
+        while len(batch) < self.max_items:
+            remaining = deadline - time.perf_counter()
+            try:
+                batch.append(pending.get(timeout=remaining) if remaining > 0 else pending.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _dispatch(self, key, pending):
+        while True:
+            batch = self._collect(pending)
+            start = time.perf_counter()
+            with self._lock:
+                self.batches += 1
+                self.items += len(batch)
+                self.full_batches += len(batch) == self.max_items
+                self.largest_batch = max(self.largest_batch, len(batch))
+                self.wait_seconds += sum(start - queued for _, _, queued in batch)
+
+            try:
+                results = self.predict_many(key, [item for item, _, _ in batch])
+            except Exception as e:
+                for _, future, _ in batch:
+                    future.set_exception(e)
+                continue
+
+            for position, (_, future, _) in enumerate(batch):
+                future.set_result(results[position] if results else None)
+
+    def stats(self):
+        return {
+            'window_ms': self.window * 1000,
+            'max_items': self.max_items,
+            'batches': self.batches,
+            'items': self.items,
+            'mean_batch_size': round(self.items / self.batches, 2) if self.batches else None,
+            'largest_batch': self.largest_batch,
+            'full_batches': self.full_batches,
+            'mean_wait_ms': round(self.wait_seconds / self.items * 1000, 3) if self.items else None
+        }
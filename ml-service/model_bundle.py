@@ -0,0 +1,231 @@
+import hashlib
+import json
+import os
+import struct
+import sys
+import time
+import zipfile
+import numpy as np
+
+from fast_tfidf import CompiledTfidf
+from tree_ensemble import TreeEnsemble
+
+# Compact, sklearn-free model bundle: one directory per meal type
+#
+#   <meal_type>/models/bundle/
+#       trees.npz         every model's node arrays, uncompressed, typed
+#       vocabulary.json   TF-IDF terms, idf weights and analyzer settings
+#       manifest.json     format version, model metadata, sha256 checksums
+#
+# Loading a bundle only needs NumPy, so app.py can start without
+# unpickling (and importing) scikit-learn.
+
+BUNDLE_FORMAT_VERSION = 1
+BUNDLE_DIR = 'bundle'
+TREE_ARRAYS = ['feature', 'threshold', 'children', 'value', 'roots']
+
+def sha256_file(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def export_bundle(models, tfidf, output_dir, meal_type, source_files=()):
+    """Write models ({name: TreeEnsemble or sklearn model}) and a tfidf/vectorizer as a bundle"""
+    bundle_dir = os.path.join(output_dir, BUNDLE_DIR)
+    os.makedirs(bundle_dir, exist_ok=True)
+
+    if not isinstance(tfidf, CompiledTfidf):
+        tfidf = CompiledTfidf.from_vectorizer(tfidf)
+
+    arrays = {}
+    model_meta = {}
+    for name, model in models.items():
+        if not isinstance(model, TreeEnsemble):
+            model = TreeEnsemble.from_sklearn(model)
+
+        arrays[f'{name}.feature'] = model.feature.astype(np.int32)
+        arrays[f'{name}.threshold'] = model.threshold.astype(np.float64)
+        arrays[f'{name}.children'] = model.children.astype(np.int32)
+        arrays[f'{name}.value'] = model.value.astype(np.float64)
+        arrays[f'{name}.roots'] = model.roots.astype(np.int32)
+        model_meta[name] = {
+            'kind': model.kind,
+            'scale': model.scale,
+            'base': None if model.base is None else [float(b) for b in model.base],
+            'max_depth': model.max_depth,
+            'n_features': model.n_features,
+            'n_trees': model.n_trees,
+            'n_nodes': int(len(model.feature)),
+            'target_mean': None if model.target_mean is None else [float(m) for m in model.target_mean],
+            'target_scale': None if model.target_scale is None else [float(s) for s in model.target_scale]
+        }
+
+    # Uncompressed so arrays can be read (or memory-mapped) without inflating
+    trees_file = os.path.join(bundle_dir, 'trees.npz')
+    np.savez(trees_file, **arrays)
+
+    vocabulary_file = os.path.join(bundle_dir, 'vocabulary.json')
+    with open(vocabulary_file, 'w') as f:
+        json.dump({
+            'terms': tfidf.terms,
+            'idf': [float(w) for w in tfidf.idf],
+            'token_pattern': tfidf.token_pattern,
+            'lowercase': tfidf.lowercase,
+            'stop_words': sorted(tfidf.stop_words),
+            'ngram_range': list(tfidf.ngram_range),
+            'norm': tfidf.norm,
+            'sublinear_tf': tfidf.sublinear_tf
+        }, f)
+
+    manifest = {
+        'format_version': BUNDLE_FORMAT_VERSION,
+        'meal_type': meal_type,
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        'models': model_meta,
+        'files': {
+            'trees.npz': sha256_file(trees_file),
+            'vocabulary.json': sha256_file(vocabulary_file)
+        },
+        # Lets the loader spot a bundle that is older than the joblib files
+        'sources': {os.path.basename(path): sha256_file(path) for path in source_files}
+    }
+    manifest_file = os.path.join(bundle_dir, 'manifest.json')
+    with open(manifest_file, 'w') as f:
+        json.dump(manifest, f, indent=2)
+
+    print(f"  Saved {meal_type} bundle to {bundle_dir} ({len(models)} models)")
+    return manifest
+
+def read_manifest(bundle_dir):
+    with open(os.path.join(bundle_dir, 'manifest.json')) as f:
+        return json.load(f)
+
+def bundle_is_stale(bundle_dir, model_dir):
+    """True if any joblib file the bundle was exported from has changed or disappeared"""
+    manifest = read_manifest(bundle_dir)
+    for name, checksum in manifest.get('sources', {}).items():
+        path = os.path.join(model_dir, name)
+        if not os.path.exists(path) or sha256_file(path) != checksum:
+            return True
+    return False
+
+def mmap_npz(path):
+    """Memory-map every array of an uncompressed .npz read-only, without copying.
+
+    np.load ignores mmap_mode for .npz archives, but np.savez stores members
+    uncompressed, so each .npy member is a contiguous byte range in the file.
+    Pages are shared by every process that maps the same file.
+    """
+    arrays = {}
+    with zipfile.ZipFile(path) as archive, open(path, 'rb') as f:
+        for info in archive.infolist():
+            if info.compress_type != zipfile.ZIP_STORED:
+                raise ValueError(f'{info.filename} in {path} is compressed and cannot be memory-mapped')
+
+            # Local file header: 30 fixed bytes, then the name and extra field
+            f.seek(info.header_offset)
+            header = f.read(30)
+            name_length, extra_length = struct.unpack('<HH', header[26:30])
+            f.seek(info.header_offset + 30 + name_length + extra_length)
+
+            version = np.lib.format.read_magic(f)
+            if version == (1, 0):
+                shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(f)
+            else:
+                shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(f)
+
+            array = np.memmap(path, dtype=dtype, mode='r', offset=f.tell(), shape=shape,
+                              order='F' if fortran_order else 'C')
+            arrays[info.filename[:-len('.npy')]] = array.view(np.ndarray)
+    return arrays
+
+def load_bundle(bundle_dir, skip=(), verify=True, mmap=False):
+    """Load a bundle as {name: TreeEnsemble, 'tfidf': CompiledTfidf, 'manifest': dict}.
+
+    With mmap=True the tree arrays stay memory-mapped from trees.npz (and
+    keep their stored int32 indices) instead of being copied into memory.
+    """
+    manifest = read_manifest(bundle_dir)
+    if manifest.get('format_version') != BUNDLE_FORMAT_VERSION:
+        raise ValueError(f"Unsupported bundle format {manifest.get('format_version')} in {bundle_dir}")
+
+    if verify:
+        for name, checksum in manifest['files'].items():
+            if sha256_file(os.path.join(bundle_dir, name)) != checksum:
+                raise ValueError(f'Checksum mismatch for {name} in {bundle_dir}')
+
+    with open(os.path.join(bundle_dir, 'vocabulary.json')) as f:
+        vocabulary = json.load(f)
+
+    bundle = {
+        'tfidf': CompiledTfidf(
+            terms=vocabulary['terms'],
+            idf=vocabulary['idf'],
+            token_pattern=vocabulary['token_pattern'],
+            lowercase=vocabulary['lowercase'],
+            stop_words=vocabulary['stop_words'],
+            ngram_range=vocabulary['ngram_range'],
+            norm=vocabulary['norm'],
+            sublinear_tf=vocabulary['sublinear_tf']
+        ),
+        'manifest': manifest
+    }
+
+    trees_file = os.path.join(bundle_dir, 'trees.npz')
+    if mmap:
+        trees = mmap_npz(trees_file)
+        index_dtype = None   # converting would copy the mapped pages
+    else:
+        with np.load(trees_file) as archive:
+            trees = {name: archive[name] for name in archive.files}
+        index_dtype = np.intp
+
+    for name, meta in manifest['models'].items():
+        if name in skip:
+            continue
+        arrays = {key: trees[f'{name}.{key}'] for key in TREE_ARRAYS}
+        if index_dtype is not None:
+            for key in ['feature', 'children', 'roots']:
+                arrays[key] = arrays[key].astype(index_dtype)
+        bundle[name] = TreeEnsemble(
+            feature=arrays['feature'],
+            threshold=arrays['threshold'],
+            children=arrays['children'],
+            value=arrays['value'],
+            roots=arrays['roots'],
+            max_depth=meta['max_depth'],
+            n_features=meta['n_features'],
+            kind=meta['kind'],
+            scale=meta['scale'],
+            base=None if meta['base'] is None else np.array(meta['base']),
+            target_mean=None if meta['target_mean'] is None else np.array(meta['target_mean']),
+            target_scale=None if meta['target_scale'] is None else np.array(meta['target_scale'])
+        )
+
+    return bundle
+
+def export_from_joblib(model_dir, meal_type):
+    """Build a bundle from the joblib artifacts already in model_dir"""
+    import joblib
+
+    sources = sorted(
+        os.path.join(model_dir, name) for name in os.listdir(model_dir)
+        if name.endswith('.joblib')
+    )
+    models = {
+        os.path.basename(path)[:-len('_model.joblib')]: joblib.load(path)
+        for path in sources if path.endswith('_model.joblib')
+    }
+    vectorizer = joblib.load(os.path.join(model_dir, 'vectorizer.joblib'))
+    return export_bundle(models, vectorizer, model_dir, meal_type, source_files=sources)
+
+if __name__ == "__main__":
+    # Run from ml-service/: python model_bundle.py [meal_type ...]
+    meal_types = sys.argv[1:] or ['breakfast', 'lunch', 'dinner', 'snacks', 'desserts']
+
+    print("📦 Exporting model bundles")
+    print("="*60)
+    for meal_type in meal_types:
+        export_from_joblib(f'{meal_type}/models', meal_type)
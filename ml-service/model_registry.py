@@ -0,0 +1,451 @@
+import csv
+import hashlib
+import json
+import os
+import threading
+import time
+import weakref
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+
+from components import ComponentTable
+from distill import DISTILLED_FILE, DistilledModel
+from fast_tfidf import CompiledTfidf
+from lookup_index import LookupIndex
+from inference import MACRO_TARGETS, predict_macro_matrix, transform_descriptions
+from model_bundle import BUNDLE_DIR, bundle_is_stale, load_bundle, read_manifest, sha256_file
+from tree_ensemble import TreeEnsemble
+
+# Loading of the per-meal-type model sets served by app.py.
+#
+# ModelRegistry loads meal types concurrently (one thread each; unpickling,
+# checksumming and array reads overlap), can defer a meal type until it is
+# first requested, and runs a warmup predict before marking it ready so the
+# first real request doesn't pay for lazy initialization.
+
+# How calories are produced:
+#   auto    - use calories_model.joblib when present, otherwise derive
+#   model   - require calories_model.joblib (meal types without one fail to load)
+#   derived - always derive from macros (4P + 4C + 9F), skipping the fourth ensemble
+CALORIES_MODE = os.environ.get('CALORIES_MODE', 'auto')
+
+# Scale derived calories by a per-meal-type factor fit on the training data
+CALORIE_CORRECTION = os.environ.get('CALORIE_CORRECTION', '0') == '1'
+
+# 'native' serves trees from flat NumPy arrays (tree_ensemble.py);
+# 'sklearn' calls the unpickled estimators' predict directly
+TREE_EVALUATOR = os.environ.get('TREE_EVALUATOR', 'native')
+
+# Where models are loaded from:
+#   auto    - models/bundle/ (model_bundle.py) when present and current, else joblib
+#   bundle  - require the bundle; never imports scikit-learn
+#   joblib  - always unpickle the joblib artifacts
+MODEL_FORMAT = os.environ.get('MODEL_FORMAT', 'auto')
+
+# Memory-map bundle arrays read-only instead of copying them, so every
+# worker process shares one physical copy through the page cache
+MODEL_MMAP = os.environ.get('MODEL_MMAP', '0') == '1'
+
+# Answer "<food> with <food> and ..." descriptions made of known foods by
+# summing per-food contributions (components.py) instead of the ensembles
+COMPONENT_MODE = os.environ.get('COMPONENT_MODE', '0') == '1'
+
+# Answer (near-)verbatim training meals and single foods with their stored
+# macros (lookup_index.py); NEAR_DUPLICATE_THRESHOLD is the minimum Jaccard
+# similarity for a near-duplicate match
+LOOKUP_INDEX = os.environ.get('LOOKUP_INDEX', '1') == '1'
+NEAR_DUPLICATE_THRESHOLD = float(os.environ.get('NEAR_DUPLICATE_THRESHOLD', 0.9))
+
+# Load the distilled fast tier (distill.py) when models/distilled.npz exists;
+# app.py answers with it when a request's deadline is too short for the ensembles
+DISTILLED_TIER = os.environ.get('DISTILLED_TIER', '1') == '1'
+
+# Reloads (ModelRegistry.reload) must pass a smoke test before they are
+# swapped in: finite, non-negative macros for the first SMOKE_TEST_SIZE
+# training meals, with a mean absolute error against their labels at most
+# SMOKE_TEST_TOLERANCE times that of the models being replaced
+SMOKE_TEST_SIZE = int(os.environ.get('SMOKE_TEST_SIZE', 200))
+SMOKE_TEST_TOLERANCE = float(os.environ.get('SMOKE_TEST_TOLERANCE', 1.5))
+
+# Load states reported on /health
+PENDING, LOADING, READY, FAILED = 'pending', 'loading', 'ready', 'failed'
+
+# Descriptions pushed through each model set before it is marked ready
+WARMUP_MEALS = ['Scrambled eggs with toast and orange juice', 'Grilled chicken with rice and broccoli']
+
+def fit_calorie_factor(training_file):
+    """Least-squares factor k so that calories ~ k * (4P + 4C + 9F) on the training data"""
+    listed, derived = [], []
+    with open(training_file, newline='') as f:
+        for row in csv.DictReader(f):
+            listed.append(float(row['calories']))
+            derived.append(4*float(row['protein']) + 4*float(row['carbs']) + 9*float(row['fat']))
+
+    listed, derived = np.array(listed), np.array(derived)
+    return float(np.dot(listed, derived) / np.dot(derived, derived))
+
+def force_serial(model):
+    """Predict on the calling thread: n_jobs=-1 from training is pickled into forests"""
+    for estimator in [model, getattr(model, 'regressor_', None), getattr(model, 'regressor', None)]:
+        if estimator is not None and getattr(estimator, 'n_jobs', None) not in (None, 1):
+            estimator.n_jobs = 1
+    return model
+
+def load_joblib_models(model_dir):
+    """Unpickle a meal type's joblib artifacts (imports scikit-learn)"""
+    import joblib
+
+    models = {'vectorizer': joblib.load(f'{model_dir}/vectorizer.joblib')}
+    models['tfidf'] = CompiledTfidf.from_vectorizer(models['vectorizer'])
+
+    # A joint multi-output model (train_model.py --joint) replaces the
+    # four per-target models when present
+    if os.path.exists(f'{model_dir}/macros_model.joblib'):
+        models['macros'] = joblib.load(f'{model_dir}/macros_model.joblib')
+    else:
+        for target in ['protein', 'carbs', 'fat']:
+            models[target] = joblib.load(f'{model_dir}/{target}_model.joblib')
+
+        if os.path.exists(f'{model_dir}/calories_model.joblib') and CALORIES_MODE != 'derived':
+            models['calories'] = joblib.load(f'{model_dir}/calories_model.joblib')
+
+    for key in MACRO_TARGETS + ['macros']:
+        if key not in models:
+            continue
+        models[key] = force_serial(models[key])
+        if TREE_EVALUATOR == 'native':
+            try:
+                models[key] = TreeEnsemble.from_sklearn(models[key])
+            except TypeError as e:
+                print(f"    {key}: keeping sklearn model ({str(e)})")
+
+    return models
+
+def load_bundle_models(bundle_dir):
+    """Load a meal type's exported bundle (NumPy only, no scikit-learn)"""
+    manifest = read_manifest(bundle_dir)
+    skip = []
+    if 'macros' in manifest['models']:
+        skip += MACRO_TARGETS
+    if CALORIES_MODE == 'derived':
+        skip.append('calories')
+
+    return load_bundle(bundle_dir, skip=skip, mmap=MODEL_MMAP)
+
+def joblib_checksums(model_dir):
+    return {
+        name: sha256_file(os.path.join(model_dir, name))
+        for name in sorted(os.listdir(model_dir)) if name.endswith('.joblib')
+    }
+
+def load_distilled(models, model_dir):
+    """The distilled model fit to these ensembles, or None if missing, stale or mismatched"""
+    path = os.path.join(model_dir, DISTILLED_FILE)
+    if not os.path.exists(path):
+        return None
+
+    distilled = DistilledModel.load(path)
+    current = models['manifest'].get('sources') if models['format'] == 'bundle' else joblib_checksums(model_dir)
+    if distilled.sources != current or distilled.n_features != models['tfidf'].n_features:
+        print(f"    ⚠️  {path} was fit to other models, skipping the fast tier")
+        return None
+    return distilled
+
+def model_version(models, model_dir):
+    """Short content hash of the artifacts (and calorie setup) behind a model set"""
+    if models['format'] == 'bundle':
+        checksums = models['manifest']['files']
+    else:
+        checksums = joblib_checksums(model_dir)
+    identity = json.dumps([checksums, models['calorie_mode'], models['calorie_factor'], 'components' in models],
+                          sort_keys=True)
+    return hashlib.sha256(identity.encode()).hexdigest()[:12]
+
+def load_model_set(meal_type, model_dir=None):
+    """Load one meal type's artifacts, tolerating a missing calories model.
+
+    model_dir overrides <meal_type>/models (e.g. candidate models for shadow
+    evaluation); data files always come from <meal_type>/data.
+    """
+    model_dir = model_dir or f'{meal_type}/models'
+    bundle_dir = f'{model_dir}/{BUNDLE_DIR}'
+
+    use_bundle = MODEL_FORMAT != 'joblib' and os.path.exists(f'{bundle_dir}/manifest.json')
+    if use_bundle and MODEL_FORMAT == 'auto' and bundle_is_stale(bundle_dir, model_dir):
+        print(f"    ⚠️  {bundle_dir} is older than the joblib files, loading joblib")
+        use_bundle = False
+    if MODEL_FORMAT == 'bundle' and not use_bundle:
+        raise FileNotFoundError(f'{bundle_dir}/manifest.json (MODEL_FORMAT=bundle)')
+
+    models = load_bundle_models(bundle_dir) if use_bundle else load_joblib_models(model_dir)
+    models['format'] = 'bundle' if use_bundle else 'joblib'
+
+    if CALORIES_MODE == 'model' and 'calories' not in models and 'macros' not in models:
+        raise FileNotFoundError(f'{model_dir}/calories_model.joblib (CALORIES_MODE=model)')
+
+    if ('macros' in models and CALORIES_MODE != 'derived') or 'calories' in models:
+        models['calorie_mode'] = 'model'
+        models['calorie_factor'] = None
+    elif CALORIE_CORRECTION:
+        models['calorie_mode'] = 'derived+correction'
+        models['calorie_factor'] = fit_calorie_factor(f'{meal_type}/data/training_data.csv')
+    else:
+        models['calorie_mode'] = 'derived'
+        models['calorie_factor'] = 1.0
+
+    if DISTILLED_TIER:
+        distilled = load_distilled(models, model_dir)
+        if distilled is not None:
+            models['distilled'] = distilled
+
+    data_dir = f'{meal_type}/data'
+    has_data = all(os.path.exists(f'{data_dir}/{name}') for name in ['nutrition_data.csv', 'training_data.csv'])
+    if (COMPONENT_MODE or LOOKUP_INDEX) and has_data:
+        # The lookup index sizes single foods with the table's serving scales
+        components = ComponentTable.fit(f'{data_dir}/nutrition_data.csv', f'{data_dir}/training_data.csv')
+        if COMPONENT_MODE:
+            models['components'] = components
+        if LOOKUP_INDEX:
+            models['lookup'] = LookupIndex.build(
+                f'{data_dir}/training_data.csv', f'{data_dir}/nutrition_data.csv',
+                serving_macros=lambda food: components.contribution('', food),
+                threshold=NEAR_DUPLICATE_THRESHOLD
+            )
+
+    models['version'] = model_version(models, model_dir)
+    return models
+
+def warmup_model_set(models):
+    """Run a small predict so first-call setup happens before real traffic.
+
+    Also times the full tier (transform + ensembles) for 1 and 16 rows, as
+    the fixed and per-row cost deadline-aware requests are planned with.
+    """
+    X = transform_descriptions(models, WARMUP_MEALS)
+    predict_macro_matrix(models, X)
+    predict_macro_matrix(models, X[:1])
+
+    def full_seconds(meals, repeats=5):
+        times = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            predict_macro_matrix(models, transform_descriptions(models, meals))
+            times.append(time.perf_counter() - start)
+        return float(np.median(times))
+
+    one, many = full_seconds(WARMUP_MEALS[:1]), full_seconds(WARMUP_MEALS * 8)
+    per_row = max(many - one, 0.0) / (len(WARMUP_MEALS) * 8 - 1)
+    models['full_cost'] = (max(one - per_row, 0.0), per_row)
+
+def smoke_corpus(meal_type):
+    """(descriptions, (n, 4) labels) of the first SMOKE_TEST_SIZE training meals; warmup meals and None without data"""
+    training_file = f'{meal_type}/data/training_data.csv'
+    if not os.path.exists(training_file):
+        return WARMUP_MEALS, None
+    descriptions, labels = [], []
+    with open(training_file, newline='') as f:
+        for row in csv.DictReader(f):
+            if len(descriptions) >= SMOKE_TEST_SIZE:
+                break
+            descriptions.append(row['description'])
+            labels.append([float(row[target]) for target in MACRO_TARGETS])
+    return descriptions, np.array(labels)
+
+def smoke_test(meal_type, models, current=None):
+    """Raise ValueError if a freshly loaded model set shouldn't replace `current`"""
+    descriptions, labels = smoke_corpus(meal_type)
+    predictions = predict_macro_matrix(models, transform_descriptions(models, descriptions))
+    if not np.isfinite(predictions).all() or (predictions < 0).any():
+        raise ValueError('Smoke test: non-finite or negative predictions')
+
+    if labels is not None and current is not None:
+        error = np.abs(predictions - labels).mean()
+        current_error = np.abs(predict_macro_matrix(current, transform_descriptions(current, descriptions)) - labels).mean()
+        if error > SMOKE_TEST_TOLERANCE * current_error:
+            raise ValueError(f'Smoke test: MAE {error:.2f} vs {current_error:.2f} for the models being served')
+
+def model_files_signature(meal_type):
+    """(path, size, mtime) of every file under the meal type's models directory"""
+    signature = []
+    for root, _, files in os.walk(f'{meal_type}/models'):
+        for name in files:
+            try:
+                stat = os.stat(os.path.join(root, name))
+            except FileNotFoundError:
+                continue    # replaced while we were listing; the next check sees the new file
+            signature.append((os.path.join(root, name), stat.st_size, stat.st_mtime_ns))
+    return sorted(signature)
+
+class ModelRegistry:
+    """Per-meal-type model sets with concurrent, optionally deferred loading.
+
+    Load modes:
+      eager       - load every meal type concurrently before start() returns
+      background  - start() returns at once; meal types load concurrently
+                    in a background thread
+      lazy        - nothing loads until a meal type is first requested
+    In every mode get() loads (or waits for) a meal type that isn't ready yet.
+
+    reload() (on demand, or from watch() when a models directory changes)
+    loads a new set in the background of serving, smoke-tests it and swaps
+    it in with one dict store. Requests that already hold the old set
+    finish on it.
+    """
+
+    LOAD_MODES = ('eager', 'background', 'lazy')
+
+    def __init__(self, meal_types, loader=load_model_set, warmup=True, max_workers=None,
+                 validate=smoke_test, signature=model_files_signature):
+        self.meal_types = list(meal_types)
+        self.models = {}
+        self.status = {
+            meal_type: {'state': PENDING, 'load_seconds': None, 'warmup_seconds': None, 'error': None,
+                        'reloads': 0, 'reloaded_at': None, 'reload_error': None}
+            for meal_type in self.meal_types
+        }
+        self.load_mode = None
+        self._loader = loader
+        self._warmup = warmup
+        self._validate = validate
+        self._signature = signature
+        self._max_workers = max_workers or len(self.meal_types)
+        self._locks = {meal_type: threading.Lock() for meal_type in self.meal_types}
+        # Model files as of the last (re)load attempt, for watch()
+        self._signatures = {}
+        self._watch_interval = None
+        self._watcher_pid = None
+
+        # A fork (gunicorn workers) can happen while another thread holds a
+        # meal type's lock mid-load; that thread doesn't exist in the child
+        registry = weakref.ref(self)
+        os.register_at_fork(after_in_child=lambda: registry() and registry()._after_fork())
+
+    def _after_fork(self):
+        self._locks = {meal_type: threading.Lock() for meal_type in self.meal_types}
+        for status in self.status.values():
+            if status['state'] == LOADING:
+                status['state'] = PENDING
+
+    def load(self, meal_type):
+        """Load and warm up one meal type (once); returns its models or None if it failed"""
+        status = self.status[meal_type]
+        with self._locks[meal_type]:
+            if status['state'] in (READY, FAILED):
+                return self.models.get(meal_type)
+
+            status['state'] = LOADING
+            start = time.perf_counter()
+            self._signatures[meal_type] = self._signature(meal_type)
+            try:
+                models = self._loader(meal_type)
+                loaded = time.perf_counter()
+                if self._warmup:
+                    warmup_model_set(models)
+            except Exception as e:
+                # Keep serving the other meal types
+                status.update(state=FAILED, error=str(e), load_seconds=round(time.perf_counter() - start, 3))
+                print(f"  ⚠️  Could not load {meal_type} models: {str(e)}")
+                return None
+
+            self.models[meal_type] = models
+            status.update(
+                state=READY,
+                load_seconds=round(loaded - start, 3),
+                warmup_seconds=round(time.perf_counter() - loaded, 3) if self._warmup else None
+            )
+            print(f"    {meal_type}: {models['format']}, calories: {models['calorie_mode']}, "
+                  f"{status['load_seconds']:.2f}s")
+            return models
+
+    def reload(self, meal_type):
+        """Load a meal type's models again and swap them in if they pass the smoke test.
+
+        Returns {'reloaded', 'version', 'previous_version', 'error'}; on any
+        failure the current models keep serving.
+        """
+        status = self.status[meal_type]
+        with self._locks[meal_type]:
+            current = self.models.get(meal_type)
+            result = {'reloaded': False, 'version': None, 'error': None,
+                      'previous_version': current.get('version') if current else None}
+            start = time.perf_counter()
+            self._signatures[meal_type] = self._signature(meal_type)
+            try:
+                models = self._loader(meal_type)
+                if self._warmup:
+                    warmup_model_set(models)
+                self._validate(meal_type, models, current)
+            except Exception as e:
+                status['reload_error'] = result['error'] = str(e)
+                print(f"  ⚠️  Kept the current {meal_type} models: {str(e)}")
+                return result
+
+            # A single store: readers see either the old set or the new one
+            self.models[meal_type] = models
+            status.update(state=READY, error=None, reload_error=None, reloads=status['reloads'] + 1,
+                          reloaded_at=time.time(), load_seconds=round(time.perf_counter() - start, 3))
+            result.update(reloaded=True, version=models.get('version'))
+            print(f"  🔄 Reloaded {meal_type} models: {result['previous_version']} -> {result['version']}")
+            return result
+
+    def watch(self, interval):
+        """Reload meal types whose model files changed, checking every interval seconds.
+
+        A change is only acted on once the files have stayed the same for a
+        whole interval (training writes several files). Call it in the
+        process that serves requests (a gunicorn worker), not in a master
+        that only preloads models before forking.
+        """
+        self._watch_interval = interval
+        if self._watcher_pid != os.getpid():
+            self._watcher_pid = os.getpid()
+            threading.Thread(target=self._watch, name='model-watcher', daemon=True).start()
+
+    def _watch(self):
+        changed = {}
+        while True:
+            time.sleep(self._watch_interval)
+            for meal_type in self.meal_types:
+                if meal_type not in self._signatures:
+                    continue    # never loaded (lazy): the first load reads the new files anyway
+                signature = self._signature(meal_type)
+                if signature == self._signatures[meal_type]:
+                    changed.pop(meal_type, None)
+                elif changed.get(meal_type) != signature:
+                    changed[meal_type] = signature
+                else:
+                    del changed[meal_type]
+                    self.reload(meal_type)
+
+    def load_all(self):
+        """Load every meal type concurrently and wait for all of them"""
+        with ThreadPoolExecutor(max_workers=self._max_workers) as pool:
+            list(pool.map(self.load, self.meal_types))
+
+    def start(self, load_mode='eager'):
+        if load_mode not in self.LOAD_MODES:
+            raise ValueError(f'Unknown load mode {load_mode!r}, expected one of {self.LOAD_MODES}')
+        self.load_mode = load_mode
+
+        if load_mode == 'eager':
+            self.load_all()
+        elif load_mode == 'background':
+            threading.Thread(target=self.load_all, name='model-loader', daemon=True).start()
+
+    def get(self, meal_type):
+        """A meal type's models, loading them first if needed (None if loading failed)"""
+        models = self.models.get(meal_type)
+        if models is None and meal_type in self.status:
+            models = self.load(meal_type)
+        return models
+
+    @property
+    def ready(self):
+        """True once no meal type is still waiting to load and at least one is usable.
+
+        Lazy registries are ready immediately: loading is deferred by design.
+        """
+        if self.load_mode == 'lazy':
+            return True
+        states = [status['state'] for status in self.status.values()]
+        return READY in states and all(state in (READY, FAILED) for state in states)
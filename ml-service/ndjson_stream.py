@@ -0,0 +1,61 @@
+import json
+
+# Incremental newline-delimited JSON input for /predict-stream.
+#
+# The request body is read incrementally and handed out in chunks of
+# at most chunk_size parsed lines, so a job can stream any number of meals
+# while the service only ever holds one chunk (and its results) in memory.
+
+def read_lines(stream, max_line_bytes, block_size=65536):
+    """(line number, bytes) per non-blank line; lines over max_line_bytes come back as None.
+
+    Reads fixed-size blocks and splits them itself, so an oversized line is
+    dropped as it arrives instead of being buffered whole.
+    """
+    number = 0
+    pending = b''
+    skipping = False    # inside a line already reported as too long
+    while True:
+        block = stream.read(block_size)
+        if not block:
+            break
+        *lines, pending = (pending + block).split(b'\n')
+        for line in lines:
+            number += 1
+            if skipping or len(line) > max_line_bytes:
+                skipping = False
+                yield number, None
+            elif line.strip():
+                yield number, line
+        if len(pending) > max_line_bytes:
+            # Don't buffer the rest of an oversized line
+            pending, skipping = b'', True
+
+    if skipping or len(pending) > max_line_bytes:
+        yield number + 1, None
+    elif pending.strip():
+        yield number + 1, pending
+
+def parse_line(line):
+    """A JSON object from one line, or a string describing why it isn't one"""
+    if line is None:
+        return 'Line too long'
+    try:
+        item = json.loads(line)
+    except ValueError as e:
+        return f'Invalid JSON: {str(e)}'
+    return item if isinstance(item, dict) else 'Each line must be a JSON object'
+
+def read_chunks(stream, chunk_size, max_line_bytes=65536):
+    """Lists of up to chunk_size (line number, item dict or error string)"""
+    chunk = []
+    for number, line in read_lines(stream, max_line_bytes):
+        chunk.append((number, parse_line(line)))
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def dumps_line(result):
+    return json.dumps(result, separators=(',', ':')) + '\n'
@@ -0,0 +1,185 @@
+import os
+import sqlite3
+import threading
+import time
+
+# Shared, restart-proof prediction cache in a local SQLite file (WAL mode).
+#
+# Sits behind the in-process LRU (prediction_cache.py): every gunicorn
+# worker reads and writes the same file, so a meal scored by one worker is
+# a hit for the others, and the entries outlive deploys and worker recycles.
+# Rows are namespaced by model version (a checksum of the artifacts), so
+# new models never read old predictions; stale rows are the first to go
+# when the size cap evicts least recently used rows.
+#
+# The cache is best-effort: a locked or broken database is counted as an
+# error and the prediction is simply computed.
+
+MACRO_COLUMNS = ['calories', 'protein', 'carbs', 'fat']
+
+# A hit only rewrites last_used when it is older than this, so reads
+# don't turn into a write per request
+TOUCH_INTERVAL_SECONDS = 600
+
+# Check the size cap after this many inserts from one process (so the
+# table can run over the cap by up to this many rows per process)
+EVICTION_CHECK_EVERY = 256
+
+# Bumped whenever the table changes; an older file is simply emptied
+SCHEMA_VERSION = 2
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS predictions (
+    version TEXT NOT NULL,
+    meal_type TEXT NOT NULL,
+    description TEXT NOT NULL,
+    {', '.join(f'{column} REAL NOT NULL' for column in MACRO_COLUMNS)},
+    source TEXT NOT NULL,
+    last_used INTEGER NOT NULL,
+    PRIMARY KEY (version, meal_type, description)
+);
+CREATE INDEX IF NOT EXISTS predictions_last_used ON predictions (last_used);
+"""
+
+class PersistentCache:
+    """SQLite-backed prediction cache shared by every process using the same file"""
+
+    def __init__(self, path, max_entries=200000, busy_timeout_ms=50):
+        self.path = path
+        self.max_entries = int(max_entries)
+        self.busy_timeout_ms = int(busy_timeout_ms)
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evictions = 0
+        self.errors = 0
+        self._inserts_since_check = 0
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        conn = self._connect()
+        conn.execute('BEGIN IMMEDIATE')
+        if conn.execute('PRAGMA user_version').fetchone()[0] != SCHEMA_VERSION:
+            conn.execute('DROP TABLE IF EXISTS predictions')
+            conn.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
+        for statement in SCHEMA.split(';'):
+            if statement.strip():
+                conn.execute(statement)
+        conn.execute('COMMIT')
+        conn.close()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=self.busy_timeout_ms / 1000, isolation_level=None)
+        conn.execute('PRAGMA journal_mode=WAL')
+        # WAL + NORMAL: commits don't fsync; a crash can lose only the last
+        # few cache writes, never corrupt the file
+        conn.execute('PRAGMA synchronous=NORMAL')
+        return conn
+
+    def _connection(self):
+        """One connection per thread and process (connections don't survive fork)"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = self._local.conn = self._connect()
+            self._local.pid = os.getpid()
+        return conn
+
+    def get_many(self, keys):
+        """{key: {macro: value, 'source': ...}} for the (version, meal_type, description) keys that are cached"""
+        found = {}
+        try:
+            conn = self._connection()
+            now = int(time.time())
+            stale = []
+            for key in keys:
+                row = conn.execute(
+                    f"SELECT {', '.join(MACRO_COLUMNS)}, source, last_used FROM predictions "
+                    "WHERE version = ? AND meal_type = ? AND description = ?", key
+                ).fetchone()
+                if row is None:
+                    continue
+                found[key] = dict(zip(MACRO_COLUMNS + ['source'], row[:-1]))
+                if row[-1] < now - TOUCH_INTERVAL_SECONDS:
+                    stale.append((now,) + tuple(key))
+            if stale:
+                conn.executemany(
+                    "UPDATE predictions SET last_used = ? WHERE version = ? AND meal_type = ? AND description = ?",
+                    stale
+                )
+        except sqlite3.Error as e:
+            self._error(e)
+        with self._lock:
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+        return found
+
+    def put_many(self, items):
+        """Store [(key, {macro: value, 'source': ...})] in one transaction"""
+        if not items or self.max_entries <= 0:
+            return
+        now = int(time.time())
+        rows = [tuple(key) + tuple(float(value[column]) for column in MACRO_COLUMNS)
+                + (value.get('source', 'model'), now)
+                for key, value in items]
+        try:
+            conn = self._connection()
+            with conn:
+                conn.execute('BEGIN')
+                conn.executemany(
+                    f"INSERT OR REPLACE INTO predictions VALUES ({', '.join('?' * len(rows[0]))})", rows
+                )
+            with self._lock:
+                self.writes += len(rows)
+                self._inserts_since_check += len(rows)
+                check = self._inserts_since_check >= EVICTION_CHECK_EVERY
+                if check:
+                    self._inserts_since_check = 0
+            if check:
+                self.evict()
+        except sqlite3.Error as e:
+            self._error(e)
+
+    def evict(self):
+        """Delete least recently used rows beyond max_entries"""
+        conn = self._connection()
+        with conn:
+            conn.execute('BEGIN IMMEDIATE')
+            excess = conn.execute('SELECT COUNT(*) FROM predictions').fetchone()[0] - self.max_entries
+            if excess > 0:
+                conn.execute(
+                    "DELETE FROM predictions WHERE rowid IN "
+                    "(SELECT rowid FROM predictions ORDER BY last_used LIMIT ?)", (excess,)
+                )
+                with self._lock:
+                    self.evictions += excess
+
+    def clear(self):
+        conn = self._connection()
+        with conn:
+            conn.execute('BEGIN IMMEDIATE')
+            conn.execute('DELETE FROM predictions')
+
+    def _error(self, error):
+        with self._lock:
+            self.errors += 1
+        print(f"Persistent cache error: {str(error)}")
+
+    def stats(self):
+        try:
+            entries = self._connection().execute('SELECT COUNT(*) FROM predictions').fetchone()[0]
+        except sqlite3.Error:
+            entries = None
+        lookups = self.hits + self.misses
+        return {
+            'path': self.path,
+            'entries': entries,
+            'max_entries': self.max_entries,
+            'hits': self.hits,
+            'misses': self.misses,
+            'writes': self.writes,
+            'evictions': self.evictions,
+            'errors': self.errors,
+            'hit_rate': round(self.hits / lookups, 4) if lookups else None
+        }
@@ -0,0 +1,70 @@
+import re
+import threading
+from collections import OrderedDict
+
+# Bounded, thread-safe LRU cache for per-meal predictions.
+#
+# Keys are (model version, meal_type, canonical description). The version
+# changes whenever a meal type's artifacts change, so entries from old
+# models are never returned and simply age out of the LRU order.
+
+_words = re.compile(r'\w+').findall
+
+def canonical_description(text):
+    """Lowercased words joined by single spaces.
+
+    Case, whitespace and punctuation never reach the TF-IDF analyzer
+    (lowercase=True, word-character tokens), so descriptions that differ
+    only in those get the same prediction and can share an entry.
+    """
+    return ' '.join(_words(text.lower()))
+
+class PredictionCache:
+    """LRU map of prediction keys to macro dicts, with hit/miss/eviction counters"""
+
+    def __init__(self, max_entries):
+        self.max_entries = int(max_entries)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        """Cached value (a copy) or None; a hit moves the entry to most recently used"""
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return dict(value)
+
+    def put(self, key, value):
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = dict(value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'max_entries': self.max_entries,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': round(self.hits / lookups, 4) if lookups else None
+        }
@@ -0,0 +1,205 @@
+import argparse
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+# Parallelism comes from the process pool; threads inside each process would
+# only contend for the same cores (set before inference.py reads it)
+os.environ.setdefault('INFERENCE_THREADS', '1')
+
+import numpy as np
+import pandas as pd
+
+from inference import MACRO_TARGETS, score_descriptions
+from meal_types import MEAL_TYPES, normalize_meal_type
+from model_registry import load_model_set
+
+# Offline bulk scoring with the artifacts app.py serves, without the app.
+#
+#   python score_cli.py meals.csv scored.csv [--workers N] [--chunk-size ROWS] [--meal-type TYPE]
+#
+# Input is CSV or Parquet with a description column and a meal_type column
+# (or --meal-type for all rows). The input is read CHUNK_SIZE rows at a time,
+# chunks are scored across a pool of worker processes (each loads a meal
+# type's models the first time it sees one) and results are written in input
+# order as chunks finish, so memory stays bounded by the chunks in flight.
+#
+# Output columns: description, meal_type, calories, protein, carbs, fat,
+# source (lookup / components / model) and error (empty on success).
+# Answers match the API's for uncached meals; no deadlines, no fast tier.
+# model_registry.py's settings (LOOKUP_INDEX, COMPONENT_MODE, ...) apply as
+# they do in the app.
+# Parquet in or out needs pyarrow.
+
+ML_SERVICE = Path(__file__).parent
+OUTPUT_COLUMNS = ['description', 'meal_type'] + MACRO_TARGETS + ['source', 'error']
+
+CHUNK_SIZE = 10000
+
+# This process's model sets (or the exception loading one raised), by meal type
+_models = {}
+
+def worker_models(meal_type):
+    if meal_type not in _models:
+        try:
+            _models[meal_type] = load_model_set(meal_type)
+        except Exception as e:
+            _models[meal_type] = e
+    if isinstance(_models[meal_type], Exception):
+        raise _models[meal_type]
+    return _models[meal_type]
+
+def score_chunk(descriptions, meal_types):
+    """A DataFrame of OUTPUT_COLUMNS for one chunk, in input order.
+
+    Repeated (description, meal type) pairs within the chunk are scored once.
+    """
+    macros = np.full((len(descriptions), len(MACRO_TARGETS)), np.nan)
+    sources = [''] * len(descriptions)
+    errors = [''] * len(descriptions)
+    groups = {}
+
+    for i, (description, meal_type) in enumerate(zip(descriptions, meal_types)):
+        normalized = normalize_meal_type(meal_type)
+        if not isinstance(description, str) or not description.strip():
+            errors[i] = 'Missing meal description'
+        elif normalized is None:
+            errors[i] = f'Invalid meal_type. Must be one of: {MEAL_TYPES}'
+        else:
+            groups.setdefault(normalized, {}).setdefault(description, []).append(i)
+
+    for meal_type, rows_by_description in groups.items():
+        unique = list(rows_by_description)
+        try:
+            entries = score_descriptions(worker_models(meal_type), unique)
+        except Exception as e:
+            for rows in rows_by_description.values():
+                for i in rows:
+                    errors[i] = f'Prediction failed: {str(e)}'
+            continue
+        for description, entry in zip(unique, entries):
+            rows = rows_by_description[description]
+            macros[rows] = [entry['predictions'][target] for target in MACRO_TARGETS]
+            for i in rows:
+                sources[i] = entry['source']
+
+    frame = pd.DataFrame({'description': descriptions, 'meal_type': meal_types})
+    for i, target in enumerate(MACRO_TARGETS):
+        frame[target] = macros[:, i]
+    frame['source'] = sources
+    frame['error'] = errors
+    return frame
+
+def is_parquet(path):
+    return str(path).lower().endswith(('.parquet', '.pq'))
+
+def require_pyarrow():
+    try:
+        import pyarrow.parquet
+    except ImportError:
+        sys.exit('❌ Parquet files need pyarrow (pip install pyarrow)')
+    return pyarrow.parquet
+
+def read_chunks(path, chunk_size):
+    """DataFrames of up to chunk_size input rows"""
+    if is_parquet(path):
+        parquet = require_pyarrow()
+        for batch in parquet.ParquetFile(path).iter_batches(batch_size=chunk_size):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, chunksize=chunk_size, dtype=str, keep_default_na=False)
+
+class ResultWriter:
+    """Appends scored chunks to a CSV or Parquet file"""
+
+    def __init__(self, path):
+        self.path = path
+        self.parquet_writer = None
+        self.rows = 0
+
+    def write(self, frame):
+        if is_parquet(self.path):
+            parquet = require_pyarrow()
+            import pyarrow
+            table = pyarrow.Table.from_pandas(frame, preserve_index=False)
+            if self.parquet_writer is None:
+                self.parquet_writer = parquet.ParquetWriter(self.path, table.schema)
+            self.parquet_writer.write_table(table)
+        else:
+            frame.to_csv(self.path, mode='w' if self.rows == 0 else 'a', header=self.rows == 0,
+                         index=False, float_format='%.1f')
+        self.rows += len(frame)
+
+    def close(self):
+        if self.parquet_writer is not None:
+            self.parquet_writer.close()
+
+def chunk_columns(frame, default_meal_type):
+    if 'description' not in frame.columns:
+        sys.exit(f"❌ Input needs a description column (found: {', '.join(frame.columns)})")
+    if 'meal_type' in frame.columns:
+        meal_types = frame['meal_type'].tolist()
+    elif default_meal_type:
+        meal_types = [default_meal_type] * len(frame)
+    else:
+        sys.exit('❌ Input has no meal_type column; pass --meal-type')
+    return frame['description'].tolist(), meal_types
+
+def score_file(input_path, output_path, workers, chunk_size=CHUNK_SIZE, default_meal_type=None, progress=True):
+    """Score input_path into output_path; returns (rows, seconds).
+
+    workers=0 scores in this process.
+    """
+    writer = ResultWriter(output_path)
+    start = time.perf_counter()
+
+    def report():
+        if progress:
+            elapsed = time.perf_counter() - start
+            print(f"\r  {writer.rows:>12,} rows  {writer.rows / max(elapsed, 1e-9):>10,.0f} rows/s  {elapsed:>8.1f}s",
+                  end='', file=sys.stderr, flush=True)
+
+    try:
+        if workers == 0:
+            for frame in read_chunks(input_path, chunk_size):
+                writer.write(score_chunk(*chunk_columns(frame, default_meal_type)))
+                report()
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                # A couple of chunks queued per worker keeps them busy without reading the whole input
+                pending = deque()
+                for frame in read_chunks(input_path, chunk_size):
+                    pending.append(pool.submit(score_chunk, *chunk_columns(frame, default_meal_type)))
+                    if len(pending) >= 2 * workers:
+                        writer.write(pending.popleft().result())
+                        report()
+                while pending:
+                    writer.write(pending.popleft().result())
+                    report()
+    finally:
+        writer.close()
+        if progress:
+            print(file=sys.stderr)
+
+    return writer.rows, time.perf_counter() - start
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Score a CSV/Parquet of meal descriptions with the trained models')
+    parser.add_argument('input', help='CSV or Parquet with description[, meal_type] columns')
+    parser.add_argument('output', help='CSV or Parquet to write (overwritten)')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help='scoring processes (default: one per core; 0 scores in this process)')
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE, help='rows per chunk')
+    parser.add_argument('--meal-type', help='meal type for inputs without a meal_type column')
+    args = parser.parse_args()
+
+    # Model paths are relative to ml-service/; the file arguments are relative to where we were run
+    input_path, output_path = os.path.abspath(args.input), os.path.abspath(args.output)
+    os.chdir(ML_SERVICE)
+
+    print(f"🧮 Scoring {args.input} -> {args.output} ({args.workers} workers, {args.chunk_size:,}-row chunks)")
+    rows, seconds = score_file(input_path, output_path, args.workers, args.chunk_size, args.meal_type)
+    print(f"✅ {rows:,} rows in {seconds:.1f}s ({rows / max(seconds, 1e-9):,.0f} rows/s)")
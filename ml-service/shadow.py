@@ -0,0 +1,208 @@
+import os
+import queue
+import random
+import threading
+import time
+from collections import deque
+import numpy as np
+
+from inference import MACRO_TARGETS, predict_descriptions
+from model_registry import smoke_corpus
+
+# Shadow evaluation: candidate model sets score a sample of live traffic
+# off the request path, so a retrain can be judged on real meals before
+# it is promoted.
+#
+# Requests only offer the predictions they computed themselves, not cache
+# or lookup hits (one random draw, then a non-blocking put); a full queue
+# drops the sample. prepare() loads each meal type's candidate set and warms
+# it on the smoke corpus before traffic starts (otherwise that happens on
+# first use, once no request is in progress). One background thread per
+# process re-scores the sampled meals and records the per-macro difference
+# from what was served and the candidate's per-meal latency. The thread runs
+# at the lowest CPU priority, predicts in small serial chunks (never
+# through the inference pool) and, given a busy() check, only starts a
+# chunk while no live request is being served, so it doesn't hold the GIL
+# or a core while a response is being computed.
+
+# Served predictions worth comparing against: the ensembles (or component
+# table), not stored lookups or the distilled tier
+COMPARED_SOURCES = ('model', 'components')
+
+# Meals per shadow predict: well below inference.PARALLEL_BATCH_ROWS, and
+# short enough (a few ms) that a request arriving mid-chunk barely waits
+CHUNK_ROWS = 16
+
+# How often a waiting shadow thread checks whether live requests are done
+IDLE_POLL_SECONDS = 0.001
+
+# Per-meal latencies kept for the percentiles on /health
+LATENCY_WINDOW = 1000
+
+class ShadowEvaluator:
+    """Re-scores a sample of served predictions with candidate models in a background thread"""
+
+    def __init__(self, loader, meal_types, sample_rate=0.05, max_queue=100, nice=19, busy=None, seed=None):
+        self.loader = loader
+        self.busy = busy
+        self.meal_types = set(meal_types)
+        self.sample_rate = float(sample_rate)
+        self.max_queue = max(1, int(max_queue))    # Queue(0) would be unbounded
+        self.nice = nice
+        self.offered = 0
+        self.queued = 0
+        self.dropped = 0
+        self._random = random.Random(seed)
+        self._models = {}
+        self._results = {meal_type: self._empty_result() for meal_type in self.meal_types}
+        self._queue = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _empty_result():
+        return {'scored': 0, 'errors': 0, 'last_error': None, 'version': None,
+                'abs_delta_sum': np.zeros(len(MACRO_TARGETS)), 'max_abs_delta': np.zeros(len(MACRO_TARGETS)),
+                'latencies_ms': deque(maxlen=LATENCY_WINDOW)}
+
+    def _pending(self):
+        """The queue, starting the worker on first use (and again after a fork)"""
+        with self._lock:
+            if self._pid != os.getpid():
+                # The worker thread doesn't survive fork: start over in the child
+                self._queue = queue.Queue(maxsize=self.max_queue)
+                self._pid = os.getpid()
+                threading.Thread(target=self._run, args=(self._queue,), name='shadow', daemon=True).start()
+            return self._queue
+
+    def offer(self, meal_type, meal_descriptions, entries):
+        """Maybe queue a request's served predictions for shadow scoring; never blocks.
+
+        Returns whether they were queued.
+        """
+        if meal_type not in self.meal_types or self._random.random() >= self.sample_rate:
+            return False
+        sample = [
+            (description, entry['predictions'])
+            for description, entry in zip(meal_descriptions, entries)
+            if entry is not None and entry['source'] in COMPARED_SOURCES
+        ]
+        if not sample:
+            return False
+
+        pending = self._pending()
+        try:
+            pending.put_nowait((meal_type, sample))
+            queued = True
+        except queue.Full:
+            queued = False
+        with self._lock:
+            self.offered += 1
+            self.queued += queued
+            self.dropped += not queued
+        return queued
+
+    def _run(self, pending):
+        if self.nice:
+            try:
+                # On Linux this lowers just this thread's priority
+                os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), self.nice)
+            except (AttributeError, OSError):
+                pass
+        while True:
+            meal_type, sample = pending.get()
+            try:
+                self._score(meal_type, sample)
+            except Exception as e:
+                result = self._results[meal_type]
+                result['errors'] += 1
+                result['last_error'] = str(e)
+            finally:
+                pending.task_done()
+
+    def prepare(self):
+        """Load and warm every candidate set now; meal types that fail to load stop being sampled"""
+        for meal_type in sorted(self.meal_types):
+            try:
+                self._candidate(meal_type)
+            except Exception:
+                pass
+
+    def _candidate(self, meal_type):
+        models = self._models.get(meal_type)
+        if models is None:
+            # Loading can't be split into chunks: start it at an idle moment at least
+            self._wait_idle()
+            try:
+                models = self._models[meal_type] = self.loader(meal_type)
+            except Exception as e:
+                # Stop sampling a meal type whose candidate can't be loaded
+                self.meal_types.discard(meal_type)
+                print(f"  ⚠️  No shadow {meal_type} models: {str(e)}")
+                raise
+            self._results[meal_type]['version'] = models.get('version')
+            # First predicts pay one-off setup; keep it out of the latency samples
+            descriptions, _ = smoke_corpus(meal_type)
+            for start in range(0, len(descriptions), CHUNK_ROWS):
+                self._predict(models, descriptions[start:start + CHUNK_ROWS])
+        return models
+
+    def _wait_idle(self):
+        while self.busy is not None and self.busy():
+            time.sleep(IDLE_POLL_SECONDS)
+
+    def _predict(self, models, descriptions):
+        """predict_descriptions once no live request is being served"""
+        self._wait_idle()
+        return predict_descriptions(models, descriptions)
+
+    def _score(self, meal_type, sample):
+        models = self._candidate(meal_type)
+        result = self._results[meal_type]
+        for start in range(0, len(sample), CHUNK_ROWS):
+            chunk = sample[start:start + CHUNK_ROWS]
+            self._wait_idle()
+            began = time.perf_counter()
+            candidate = predict_descriptions(models, [description for description, _ in chunk])
+            per_meal_ms = (time.perf_counter() - began) * 1000 / len(chunk)
+
+            served = np.array([[predictions[target] for target in MACRO_TARGETS] for _, predictions in chunk])
+            delta = np.abs(np.array([[entry['predictions'][target] for target in MACRO_TARGETS]
+                                     for entry in candidate]) - served)
+            result['scored'] += len(chunk)
+            result['abs_delta_sum'] += delta.sum(axis=0)
+            result['max_abs_delta'] = np.maximum(result['max_abs_delta'], delta.max(axis=0))
+            result['latencies_ms'].extend([per_meal_ms] * len(chunk))
+
+    def wait(self):
+        """Block until everything queued so far has been scored (for tests and benchmarks)"""
+        if self._queue is not None and self._pid == os.getpid():
+            self._queue.join()
+
+    def stats(self):
+        by_meal_type = {}
+        for meal_type, result in self._results.items():
+            scored = result['scored']
+            latencies = np.array(list(result['latencies_ms']))
+            by_meal_type[meal_type] = {
+                'version': result['version'],
+                'scored': scored,
+                'errors': result['errors'],
+                'last_error': result['last_error'],
+                'mean_abs_delta': {target: round(float(value / scored), 3) if scored else None
+                                   for target, value in zip(MACRO_TARGETS, result['abs_delta_sum'])},
+                'max_abs_delta': {target: round(float(value), 3)
+                                  for target, value in zip(MACRO_TARGETS, result['max_abs_delta'])},
+                'latency_ms_per_meal': {
+                    'p50': round(float(np.percentile(latencies, 50)), 3) if len(latencies) else None,
+                    'p99': round(float(np.percentile(latencies, 99)), 3) if len(latencies) else None
+                }
+            }
+        return {
+            'sample_rate': self.sample_rate,
+            'offered': self.offered,
+            'queued': self.queued,
+            'dropped': self.dropped,
+            'queue_depth': self._queue.qsize() if self._queue is not None else 0,
+            'meal_types': by_meal_type
+        }
@@ -0,0 +1,314 @@
+from flask import Flask, request, jsonify
+from flask_cors import CORS
+import json
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from columnar import is_columnar, wants_columnar
+from meal_types import MEAL_TYPES, normalize_meal_type
+
+# Meal-type-sharded serving: a thin router in front of one app.py instance
+# per group of meal types.
+#
+# Each shard is a normal gunicorn + app.py started with MEAL_TYPES set to
+# its group, so it only loads (and keeps hot in cache) those model sets
+# and its worker count is sized for that group's traffic. The router holds
+# no models: it forwards /predict-<type> and /predict-macros to the shard
+# serving the type, splits /predict-batch into one sub-batch per shard
+# (sent concurrently) and puts the results back in input order.
+#
+#   python shard_router.py                       start the shards and the router
+#   SHARD_LAYOUT="lunch,dinner:3 breakfast:1 snacks,desserts:1"
+#                                                groups and their worker counts
+#
+# The router alone (gunicorn shard_router:app) reads the shard addresses
+# from SHARD_URLS="lunch,dinner=http://127.0.0.1:5101;breakfast=...".
+#
+# Not routed (the router answers with an error saying so): /score-plan, since
+# plans span every meal type (score them with /predict-batch); columnar
+# msgpack /predict-batch requests (415) and msgpack answers (406); and
+# /predict-stream (404). Send those to a shard or an all-in-one instance.
+
+DEFAULT_LAYOUT = 'lunch,dinner:2 breakfast:1 snacks,desserts:1'
+MAX_BATCH_SIZE = int(os.environ.get('MAX_BATCH_SIZE', 500))
+SHARD_TIMEOUT = float(os.environ.get('SHARD_TIMEOUT_SECONDS', 30))
+
+# Request headers passed through to the shards
+FORWARDED_HEADERS = ['Content-Type', 'X-Deadline-Ms']
+
+def parse_layout(layout):
+    """[(meal_types, workers)] from "lunch,dinner:2 breakfast:1 ..." (every meal type exactly once)"""
+    groups = []
+    for group in layout.split():
+        names, _, workers = group.partition(':')
+        groups.append((names.split(','), int(workers or 1)))
+
+    served = [meal_type for meal_types, _ in groups for meal_type in meal_types]
+    if sorted(served) != sorted(MEAL_TYPES):
+        raise ValueError(f'Shard layout must list each of {MEAL_TYPES} exactly once, got {served}')
+    return groups
+
+def parse_shard_urls(spec):
+    """{meal_type: base URL} from "lunch,dinner=http://host:port;breakfast=http://..." """
+    urls = {}
+    for group in filter(None, spec.split(';')):
+        names, _, url = group.partition('=')
+        for meal_type in names.split(','):
+            urls[meal_type.strip()] = url.strip().rstrip('/')
+    return urls
+
+def format_shard_urls(groups, host, base_port):
+    return ';'.join(f"{','.join(meal_types)}=http://{host}:{base_port + i}" for i, (meal_types, _) in enumerate(groups))
+
+shard_urls = parse_shard_urls(os.environ.get('SHARD_URLS', ''))
+
+app = Flask(__name__)
+CORS(app, resources={r"/*": {"origins": "*"}})
+
+_fanout_pool = None
+_fanout_pool_lock = threading.Lock()
+
+def fanout_pool():
+    """Threads for concurrent sub-requests, created on first use (after any fork)"""
+    global _fanout_pool
+    with _fanout_pool_lock:
+        if _fanout_pool is None:
+            _fanout_pool = ThreadPoolExecutor(max_workers=16, thread_name_prefix='shard-fanout')
+        return _fanout_pool
+
+def forwarded_headers():
+    """Headers of the current request to pass on (read in the request's thread, not the fan-out pool)"""
+    headers = {name: request.headers[name] for name in FORWARDED_HEADERS if name in request.headers}
+    headers['Content-Type'] = 'application/json'
+    return headers
+
+def call_shard(url, path, payload=None, headers=None):
+    """(status, JSON body, headers) of one shard request; network errors come back as a 502"""
+    headers = headers or {'Content-Type': 'application/json'}
+    data = None if payload is None else json.dumps(payload).encode()
+    try:
+        with urllib.request.urlopen(urllib.request.Request(f'{url}{path}', data=data, headers=headers),
+                                    timeout=SHARD_TIMEOUT) as response:
+            return response.status, json.loads(response.read()), dict(response.headers)
+    except urllib.error.HTTPError as e:
+        try:
+            body = json.loads(e.read())
+        except ValueError:
+            body = {'success': False, 'error': f'Shard {url} answered {e.code}'}
+        return e.code, body, dict(e.headers)
+    except (OSError, ValueError) as e:
+        return 502, {'success': False, 'error': f'Shard {url} unavailable: {str(e)}'}, {}
+
+def relay(status, body, headers):
+    """Flask response for a shard's answer, keeping Retry-After on shed requests"""
+    response = jsonify(body)
+    if 'Retry-After' in headers:
+        response.headers['Retry-After'] = headers['Retry-After']
+    return response, status
+
+def has_meal(data):
+    """Whether a JSON body is an object with a non-empty meal description (as app.py checks)"""
+    return isinstance(data, dict) and isinstance(data.get('meal'), str) and bool(data['meal'].strip())
+
+def forward(meal_type, path, payload):
+    url = shard_urls.get(meal_type)
+    if url is None:
+        return jsonify({'success': False, 'error': f'No shard serves {meal_type}'}), 503
+    return relay(*call_shard(url, path, payload, forwarded_headers()))
+
+@app.route('/', methods=['GET'])
+def root():
+    return jsonify({
+        'status': 'running',
+        'service': 'ML Macro Predictor - Shard Router',
+        'shards': {url: [t for t in MEAL_TYPES if shard_urls.get(t) == url] for url in set(shard_urls.values())}
+    }), 200
+
+def shard_readiness():
+    """{url: {'meal_types', 'ready', 'status'}} from each shard's /health/ready, checked concurrently"""
+    urls = sorted(set(shard_urls.values()))
+    answers = fanout_pool().map(lambda url: call_shard(url, '/health/ready'), urls)
+    return {
+        url: {
+            'meal_types': [t for t in MEAL_TYPES if shard_urls.get(t) == url],
+            'ready': status == 200,
+            'status': body.get('status', body.get('error'))
+        }
+        for url, (status, body, _) in zip(urls, answers)
+    }
+
+@app.route('/health', methods=['GET'])
+def health():
+    shards = shard_readiness()
+    return jsonify({
+        'status': 'healthy',
+        'service': 'ML Macro Predictor router',
+        'ready': bool(shards) and all(shard['ready'] for shard in shards.values()),
+        'unrouted_meal_types': [t for t in MEAL_TYPES if t not in shard_urls],
+        'shards': shards
+    }), 200
+
+@app.route('/health/live', methods=['GET'])
+def health_live():
+    return jsonify({'status': 'alive'}), 200
+
+@app.route('/health/ready', methods=['GET'])
+def health_ready():
+    shards = shard_readiness()
+    ready = len(shard_urls) == len(MEAL_TYPES) and all(shard['ready'] for shard in shards.values())
+    return jsonify({'status': 'ready' if ready else 'loading', 'shards': shards}), 200 if ready else 503
+
+@app.route('/predict-stream', methods=['POST'])
+def predict_stream():
+    error = '/predict-stream is not routed: stream to a shard or an all-in-one instance'
+    return jsonify({'success': False, 'error': error}), 404
+
+@app.route('/predict-<meal_type>', methods=['POST'])
+def predict_meal_type(meal_type):
+    if meal_type not in MEAL_TYPES:
+        return jsonify({'success': False, 'error': f'Unknown endpoint /predict-{meal_type}'}), 404
+    return forward(meal_type, f'/predict-{meal_type}', request.get_json(silent=True) or {})
+
+@app.route('/predict-macros', methods=['POST'])
+def predict_macros():
+    data = request.get_json(silent=True)
+    if not has_meal(data):
+        return jsonify({'success': False, 'error': 'Missing meal description'}), 400
+
+    meal_type = data.get('meal_type', 'dinner')
+    if meal_type != 'all':
+        meal_type = normalize_meal_type(meal_type)
+        if meal_type is None:
+            return jsonify({'success': False, 'error': f'Invalid meal_type. Must be one of: {MEAL_TYPES}'}), 400
+        return forward(meal_type, '/predict-macros', dict(data, meal_type=meal_type))
+
+    # Every shard scores its own meal types; merge the answers
+    urls = sorted(set(shard_urls.values()))
+    headers = forwarded_headers()
+    answers = list(fanout_pool().map(lambda url: call_shard(url, '/predict-macros', data, headers), urls))
+    predictions = {meal_type: None for meal_type in MEAL_TYPES}
+    sources = dict(predictions)
+    for status, body, _ in answers:
+        if status == 200:
+            predictions.update(body['predictions'])
+            sources.update(body['sources'])
+    if not any(predictions.values()):
+        return jsonify({'success': False, 'error': 'Prediction failed'}), 500
+    return jsonify({
+        'success': True,
+        'meal': data['meal'],
+        'meal_type': 'all',
+        'predictions': predictions,
+        'sources': sources
+    }), 200
+
+@app.route('/predict-batch', methods=['POST'])
+def predict_batch():
+    if is_columnar(request.content_type):
+        return jsonify({'success': False, 'error': 'Columnar msgpack batches are not routed: send JSON items'}), 415
+    if wants_columnar(request.content_type, request.headers.get('Accept')):
+        return jsonify({'success': False, 'error': 'Columnar msgpack answers are not routed: accept JSON'}), 406
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict) or not isinstance(data.get('items'), list):
+        return jsonify({'success': False, 'error': 'Missing items list'}), 400
+
+    items = data['items']
+    if len(items) > MAX_BATCH_SIZE:
+        return jsonify({'success': False, 'error': f'Too many items (max {MAX_BATCH_SIZE})'}), 400
+
+    # Validate locally, as app.py would, then group the rest by shard
+    results = [None] * len(items)
+    groups = {}
+    for i, item in enumerate(items):
+        if not has_meal(item):
+            results[i] = {'success': False, 'error': 'Missing meal description'}
+            continue
+        meal_type = normalize_meal_type(item.get('meal_type'))
+        if meal_type is None:
+            results[i] = {'success': False, 'error': f'Invalid meal_type. Must be one of: {MEAL_TYPES}'}
+        elif meal_type not in shard_urls:
+            results[i] = {'success': False, 'meal_type': meal_type, 'error': f'No shard serves {meal_type}'}
+        else:
+            groups.setdefault(shard_urls[meal_type], []).append((i, meal_type))
+
+    headers = forwarded_headers()
+    def sub_batch(url):
+        payload = {key: value for key, value in data.items() if key != 'items'}
+        payload['items'] = [{'meal': items[i]['meal'], 'meal_type': meal_type} for i, meal_type in groups[url]]
+        return call_shard(url, '/predict-batch', payload, headers)
+
+    urls = list(groups)
+    for url, (status, body, _) in zip(urls, fanout_pool().map(sub_batch, urls)):
+        for position, (i, meal_type) in enumerate(groups[url]):
+            if status == 200:
+                results[i] = body['results'][position]
+            else:
+                results[i] = {'success': False, 'meal_type': meal_type,
+                              'error': body.get('error', f'Shard answered {status}')}
+
+    return jsonify({
+        'success': True,
+        'count': len(results),
+        'results': results
+    }), 200
+
+def start_shards(groups, base_port, env=None, host='127.0.0.1', quiet=False):
+    """Start one gunicorn + app.py per group on consecutive ports; returns their Popen objects"""
+    output = subprocess.DEVNULL if quiet else None
+    return [
+        subprocess.Popen(
+            [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'app:app',
+             '--bind', f'{host}:{base_port + i}', '--workers', str(workers)],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            env=dict(env or os.environ, MEAL_TYPES=','.join(meal_types)),
+            stdout=output, stderr=output
+        )
+        for i, (meal_types, workers) in enumerate(groups)
+    ]
+
+def start_router(shard_url_spec, port, threads=16, env=None, quiet=False):
+    """Start the router (one gthread worker: it only waits on the shards)"""
+    output = subprocess.DEVNULL if quiet else None
+    return subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', 'shard_router:app', '--bind', f'0.0.0.0:{port}',
+         '--workers', '1', '--threads', str(threads)],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        env=dict(env or os.environ, SHARD_URLS=shard_url_spec),
+        stdout=output, stderr=output
+    )
+
+if __name__ == "__main__":
+    groups = parse_layout(os.environ.get('SHARD_LAYOUT', DEFAULT_LAYOUT))
+    port = int(os.environ.get('PORT', 5000))
+    base_port = int(os.environ.get('SHARD_BASE_PORT', port + 101))
+
+    print("🔀 Starting meal-type shards")
+    for i, (meal_types, workers) in enumerate(groups):
+        print(f"  {','.join(meal_types)}: {workers} worker(s) on 127.0.0.1:{base_port + i}")
+    processes = start_shards(groups, base_port)
+    processes.append(start_router(format_shard_urls(groups, '127.0.0.1', base_port), port,
+                                  threads=int(os.environ.get('ROUTER_THREADS', 16))))
+    print(f"  router on 0.0.0.0:{port}")
+
+    def stop(*_):
+        for process in processes:
+            process.terminate()
+    signal.signal(signal.SIGTERM, stop)
+
+    try:
+        # Run until any process exits, then take the rest down with it
+        while all(process.poll() is None for process in processes):
+            time.sleep(0.5)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop()
+        for process in processes:
+            process.wait()
@@ -0,0 +1,54 @@
+import threading
+from concurrent.futures import Future
+
+# In-flight deduplication of identical predictions.
+#
+# The first request to need a key becomes its leader and computes it; any
+# request needing the same key before the leader finishes becomes a
+# follower and waits on the leader's Future instead of recomputing. Keys
+# are the prediction cache keys, so they are already canonical and
+# namespaced by model version. Nothing is remembered once a key resolves:
+# that is the prediction cache's job.
+#
+# Works with threaded workers as is, and with gevent workers once the
+# standard library is monkey-patched (the lock and Future then yield to
+# other greenlets instead of blocking the worker).
+
+class SingleFlight:
+    """Leader/follower registry of keys currently being computed"""
+
+    def __init__(self):
+        self.leaders = 0
+        self.followers = 0
+        self._in_flight = {}
+        self._lock = threading.Lock()
+
+    def claim(self, key):
+        """(is_leader, future): leaders must resolve() or fail() the key, followers wait on the future"""
+        with self._lock:
+            future = self._in_flight.get(key)
+            if future is not None:
+                self.followers += 1
+                return False, future
+            future = self._in_flight[key] = Future()
+            self.leaders += 1
+            return True, future
+
+    def resolve(self, key, value):
+        with self._lock:
+            future = self._in_flight.pop(key)
+        future.set_result(value)
+
+    def fail(self, key, error):
+        with self._lock:
+            future = self._in_flight.pop(key)
+        future.set_exception(error)
+
+    def stats(self):
+        computed = self.leaders
+        return {
+            'in_flight': len(self._in_flight),
+            'computed': computed,
+            'deduplicated': self.followers,
+            'saved_ratio': round(self.followers / (computed + self.followers), 4) if computed + self.followers else None
+        }
@@ -0,0 +1,53 @@
+import pytest
+import sys
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from admission import AdmissionClass, AdmissionController, Overloaded
+
+def test_full_queue_sheds_immediately():
+    """Test requests beyond the concurrency limit and queue are shed with a reason"""
+    bulk = AdmissionClass('bulk', max_concurrent=1, max_queue=0, max_wait_ms=1000)
+    bulk.acquire()
+    with pytest.raises(Overloaded) as shed:
+        bulk.acquire()
+    assert shed.value.reason == 'queue_full' and shed.value.retry_after >= 1
+    
+    bulk.release(0.01)
+    bulk.acquire()
+    assert bulk.stats()['admitted'] == 2 and bulk.stats()['shed']['queue_full'] == 1
+
+def test_queued_request_starts_when_a_slot_frees():
+    """Test a queued request waits for a slot, and one that waits too long is shed"""
+    interactive = AdmissionClass('interactive', max_concurrent=1, max_queue=4, max_wait_ms=500)
+    interactive.acquire()
+    threading.Timer(0.05, interactive.release, args=(0.05,)).start()
+    
+    start = time.perf_counter()
+    interactive.acquire()
+    assert 0.04 < time.perf_counter() - start < 0.5
+    
+    impatient = AdmissionClass('interactive', max_concurrent=1, max_queue=4, max_wait_ms=20)
+    impatient.acquire()
+    with pytest.raises(Overloaded) as shed:
+        impatient.acquire()
+    assert shed.value.reason == 'timeout'
+    assert impatient.stats()['queue_depth'] == 0
+
+def test_slow_service_sheds_on_estimated_wait():
+    """Test a request whose estimated wait exceeds max wait fails fast"""
+    controller = AdmissionController([AdmissionClass('bulk', max_concurrent=1, max_queue=8, max_wait_ms=100)])
+    with controller.slot('bulk'):
+        pass
+    controller.classes['bulk'].service_seconds = 2.0
+    
+    with controller.slot('bulk'):
+        start = time.perf_counter()
+        with pytest.raises(Overloaded) as shed:
+            controller.classes['bulk'].acquire()
+        assert time.perf_counter() - start < 0.05
+    assert shed.value.reason == 'wait_estimate' and shed.value.retry_after == 2
+    assert controller.stats()['bulk']['active'] == 0
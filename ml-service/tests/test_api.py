@@ -60,6 +60,18 @@ def test_predict_missing_meal(client):
     assert data['success'] == False
     assert 'error' in data
 
+def test_single_meal_endpoints_validate_like_batch(client):
+    """Test single-meal endpoints reject non-string meals and accept the batch path's meal type spellings"""
+    for path in ('/predict-desserts', '/predict-macros'):
+        for body in ({'meal': None}, {'meal': 123}, {'meal': ' '}, [1]):
+            response = client.post(path, json=body)
+            assert response.status_code == 400 and response.get_json()['success'] == False
+    
+    response = client.post('/predict-macros', json={'meal': 'Chocolate brownie', 'meal_type': 'Dessert'})
+    assert response.status_code == 200
+    assert response.get_json()['meal_type'] == 'desserts'
+    assert client.post('/predict-macros', json={'meal': 'Brownie', 'meal_type': 'brunch'}).status_code == 400
+
 def test_all_endpoints_exist(client):
     """Test that all 5 meal type endpoints exist"""
     endpoints = [
@@ -75,4 +87,388 @@ def test_all_endpoints_exist(client):
                               json={'meal': 'Test meal'},
                               content_type='application/json')
         # Should not be 404
-        assert response.status_code != 404, f"Endpoint {endpoint} not found"
\ No newline at end of file
+        assert response.status_code != 404, f"Endpoint {endpoint} not found"
+
+def test_predict_batch_mixed_meal_types(client):
+    """Test batch prediction keeps input order across meal types"""
+    items = [
+        {'meal': 'Scrambled eggs with spinach and toast', 'meal_type': 'breakfast'},
+        {'meal': 'Grilled chicken salad with vinaigrette', 'meal_type': 'lunch'},
+        {'meal': 'Oatmeal with banana', 'meal_type': 'breakfast'},
+        {'meal': 'Chocolate brownie', 'meal_type': 'dessert'}
+    ]
+    response = client.post('/predict-batch', json={'items': items})
+    
+    assert response.status_code == 200
+    data = json.loads(response.data)
+    assert data['count'] == len(items)
+    
+    for item, result in zip(items, data['results']):
+        assert result['success'] == True
+        assert result['meal'] == item['meal']
+        assert result['predictions']['calories'] > 0
+    assert data['results'][3]['meal_type'] == 'desserts'
+    
+    # Batched results should match the single-meal endpoint
+    single = json.loads(client.post('/predict-breakfast', json={'meal': items[2]['meal']}).data)
+    assert data['results'][2]['predictions'] == single['predictions']
+
+def test_predict_batch_per_item_errors(client):
+    """Test that bad items fail individually, not the whole batch"""
+    items = [
+        {'meal': 'Greek yogurt with berries', 'meal_type': 'breakfast'},
+        {'meal': 'Pizza', 'meal_type': 'brunch'},
+        {'meal_type': 'lunch'}
+    ]
+    response = client.post('/predict-batch', json={'items': items})
+    
+    assert response.status_code == 200
+    results = json.loads(response.data)['results']
+    assert results[0]['success'] == True
+    assert results[1]['success'] == False
+    assert results[2]['success'] == False
+    
+    response = client.post('/predict-batch', json={'meal': 'Not a batch'})
+    assert response.status_code == 400
+    
+    # Valid JSON that isn't an object
+    for body in ([1], 'x'):
+        assert client.post('/predict-batch', json=body).status_code == 400
+
+def test_predict_batch_columnar_matches_json(client):
+    """Test msgpack columns in give the same macros as the JSON batch, as float32 columns out"""
+    msgpack = pytest.importorskip('msgpack')
+    from columnar import CONTENT_TYPE, decode_response
+    
+    meals = ['Oatmeal with banana', 'Grilled chicken salad with vinaigrette', '', 'Chocolate brownie']
+    meal_types = ['breakfast', 'lunch', 'lunch', 'dessert']
+    response = client.post('/predict-batch', content_type=CONTENT_TYPE,
+                           data=msgpack.packb({'meals': meals, 'meal_types': meal_types}))
+    
+    assert response.status_code == 200
+    assert response.content_type == CONTENT_TYPE
+    columns, sources, errors = decode_response(response.data)
+    assert list(errors) == [2]
+    assert columns['protein'].dtype == '<f4' and len(columns['protein']) == len(meals)
+    assert sources[2] is None and sources[0] is not None
+    
+    items = [{'meal': meal, 'meal_type': meal_type} for meal, meal_type in zip(meals, meal_types)]
+    results = json.loads(client.post('/predict-batch', json={'items': items}).data)['results']
+    for i in (0, 1, 3):
+        for target, column in columns.items():
+            assert column[i] == pytest.approx(results[i]['predictions'][target], abs=1e-4)
+    
+    # JSON items in, columns out
+    response = client.post('/predict-batch', json={'items': items}, headers={'Accept': CONTENT_TYPE})
+    assert response.content_type == CONTENT_TYPE
+    assert decode_response(response.data)[0]['fat'][3] == columns['fat'][3]
+    
+    response = client.post('/predict-batch', content_type=CONTENT_TYPE, data=b'\xc1')
+    assert response.status_code == 400
+    response = client.post('/predict-batch', json=[1], headers={'Accept': CONTENT_TYPE})
+    assert response.status_code == 400
+
+def test_score_plan_totals(client):
+    """Test plan scoring returns per-day and per-week totals"""
+    plan = {
+        'Monday': {
+            'breakfast': 'Oatmeal with banana and peanut butter',
+            'lunch': 'Turkey sandwich with apple',
+            'dinner': 'Salmon with quinoa and asparagus',
+            'snacks': 'Greek yogurt with almonds',
+            'dessert': 'Dark chocolate'
+        },
+        'Tuesday': {
+            'breakfast': 'Scrambled eggs with toast',
+            'dinner': 'Chicken stir fry with rice',
+            'snacks': ''
+        }
+    }
+    response = client.post('/score-plan', json={'plan': plan})
+    
+    assert response.status_code == 200
+    data = json.loads(response.data)
+    assert data['meals_scored'] == 7
+    
+    monday = data['days']['Monday']
+    meal_calories = sum(m['predictions']['calories'] for m in monday['meals'].values())
+    assert abs(monday['totals']['calories'] - meal_calories) < 0.5
+    
+    week_calories = data['days']['Monday']['totals']['calories'] + data['days']['Tuesday']['totals']['calories']
+    assert abs(data['week_totals']['calories'] - week_calories) < 0.5
+    assert 'snacks' not in data['days']['Tuesday']['meals']
+    
+    for body in ({'plan': 'Monday'}, [plan], 'x'):
+        assert client.post('/score-plan', json=body).status_code == 400
+
+def test_predict_macros_all_meal_types(client):
+    """Test meal_type=all scores one meal against every model set"""
+    meal = 'Grilled chicken breast with brown rice and broccoli'
+    response = client.post('/predict-macros', json={'meal': meal, 'meal_type': 'all'})
+    
+    assert response.status_code == 200
+    data = json.loads(response.data)
+    assert set(data['predictions']) == {'breakfast', 'lunch', 'dinner', 'snacks', 'desserts'}
+    
+    # Shared tokenization must give the same answer as the per-type endpoint
+    for meal_type, predictions in data['predictions'].items():
+        single = json.loads(client.post(f'/predict-{meal_type}', json={'meal': meal}).data)
+        assert predictions == single['predictions']
+
+def test_predict_macros_all_rejects_bad_meals(client, monkeypatch):
+    """Test meal_type=all answers 400 for missing meals and 500 when no meal type predicts"""
+    import app as app_module
+    
+    for meal in (123, '', '   ', None):
+        response = client.post('/predict-macros', json={'meal': meal, 'meal_type': 'all'})
+        assert response.status_code == 400
+    
+    monkeypatch.setattr(app_module, 'predict_all_meal_types', lambda meal: dict.fromkeys(app_module.model_types))
+    response = client.post('/predict-macros', json={'meal': 'Chicken soup', 'meal_type': 'all'})
+    assert response.status_code == 500 and response.get_json()['success'] == False
+
+def test_health_reports_calorie_modes(client):
+    """Test /health reports how each meal type produces calories"""
+    data = json.loads(client.get('/health').data)
+    
+    for meal_type in ['breakfast', 'lunch', 'dinner', 'snacks', 'desserts']:
+        assert data['models'][meal_type]['loaded'] == True
+        assert data['models'][meal_type]['calorie_mode'] in ('model', 'derived', 'derived+correction')
+
+def test_derived_calories_match_macros(client):
+    """Test meal types without a calories model derive calories from macros"""
+    from app import all_models
+    
+    derived_types = [m for m, models in all_models.items() if models['calorie_mode'] != 'model']
+    for meal_type in derived_types:
+        response = client.post(f'/predict-{meal_type}', json={'meal': 'Chicken with rice and broccoli'})
+        predictions = json.loads(response.data)['predictions']
+        factor = all_models[meal_type]['calorie_factor']
+        expected = factor * (4*predictions['protein'] + 4*predictions['carbs'] + 9*predictions['fat'])
+        assert abs(predictions['calories'] - expected) < 1
+
+def test_liveness_and_readiness(client):
+    """Test /health/live and /health/ready once models are loaded"""
+    assert client.get('/health/live').status_code == 200
+    
+    response = client.get('/health/ready')
+    assert response.status_code == 200
+    data = json.loads(response.data)
+    assert data['status'] == 'ready'
+    for meal_type in ['breakfast', 'lunch', 'dinner', 'snacks', 'desserts']:
+        assert data['models'][meal_type]['state'] == 'ready'
+        assert data['models'][meal_type]['load_seconds'] >= 0
+
+def test_prediction_cache_canonical_hits(client):
+    """Test spelling variants of a meal hit the same cache entry with unchanged predictions"""
+    from app import prediction_cache
+    
+    prediction_cache.clear()
+    plain = json.loads(client.post('/predict-lunch', json={'meal': 'turkey sandwich with chips'}).data)
+    prediction_cache.clear()
+    hits = client.get('/health').get_json()['prediction_cache']['hits']
+    
+    variant = json.loads(client.post('/predict-lunch', json={'meal': 'Turkey  Sandwich, with chips!'}).data)
+    again = json.loads(client.post('/predict-lunch', json={'meal': 'turkey sandwich with chips'}).data)
+    
+    assert variant['predictions'] == plain['predictions'] == again['predictions']
+    assert variant['meal'] == 'Turkey  Sandwich, with chips!'
+    assert client.get('/health').get_json()['prediction_cache']['hits'] == hits + 1
+
+def test_prediction_cache_keyed_by_model_version(client):
+    """Test entries cached for another model version are not returned"""
+    from app import all_models, prediction_cache
+    
+    meal = 'apple slices with peanut butter'
+    prediction_cache.clear()
+    client.post('/predict-snacks', json={'meal': meal})
+    
+    version = all_models['snacks']['version']
+    misses = prediction_cache.misses
+    try:
+        all_models['snacks']['version'] = 'retrained'
+        client.post('/predict-snacks', json={'meal': meal})
+        assert prediction_cache.misses == misses + 1
+    finally:
+        all_models['snacks']['version'] = version
+
+def test_training_meals_answered_by_lookup(client):
+    """Test a verbatim training meal returns its stored macros with source 'lookup'"""
+    import pandas as pd
+    
+    row = pd.read_csv('snacks/data/training_data.csv').iloc[0]
+    data = json.loads(client.post('/predict-snacks', json={'meal': row['description'].upper()}).data)
+    assert data['source'] == 'lookup'
+    assert abs(data['predictions']['protein'] - row['protein']) < 0.5
+    
+    novel = json.loads(client.post('/predict-snacks', json={'meal': 'homemade mystery trail mix'}).data)
+    assert novel['source'] in ('model', 'components')
+
+def test_microbatched_predictions_match_direct(client, monkeypatch):
+    """Test single-meal endpoints give the same result when requests are coalesced"""
+    import app as app_module
+    from microbatch import MicroBatcher
+    
+    meal = 'homemade lentil curry with naan'
+    app_module.prediction_cache.clear()
+    direct = json.loads(client.post('/predict-dinner', json={'meal': meal}).data)
+    app_module.prediction_cache.clear()
+    
+    batcher = MicroBatcher(
+        lambda meal_type, meals: app_module.predict_many_for_meal_type(meals, meal_type), window_ms=1
+    )
+    monkeypatch.setattr(app_module, 'microbatcher', batcher)
+    coalesced = json.loads(client.post('/predict-dinner', json={'meal': meal}).data)
+    
+    assert coalesced['predictions'] == direct['predictions']
+    assert batcher.stats()['items'] == 1
+    assert client.get('/health').get_json()['microbatch']['batches'] == 1
+
+def test_concurrent_identical_requests_predict_once(monkeypatch):
+    """Test simultaneous requests for the same canonical meal share one prediction"""
+    import threading
+    import time
+    from concurrent.futures import ThreadPoolExecutor
+    import app as app_module
+    from inference import predict_descriptions
+    
+    calls = []
+    def slow_predict(models, meals):
+        calls.append(list(meals))
+        time.sleep(0.2)
+        return predict_descriptions(models, meals)
+    
+    monkeypatch.setattr(app_module, 'predict_descriptions', slow_predict)
+    app_module.prediction_cache.clear()
+    saved = app_module.in_flight.stats()['deduplicated']
+    
+    start = threading.Barrier(4)
+    def request(meal):
+        start.wait()
+        return app_module.predict_for_meal_type(meal, 'desserts')
+    
+    meals = ['Warm brownie with vanilla gelato', 'warm brownie, with vanilla gelato'] * 2
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        results = list(pool.map(request, meals))
+    
+    assert len(calls) == 1
+    assert all(result == results[0] for result in results)
+    assert app_module.in_flight.stats()['deduplicated'] == saved + 3
+
+def test_saturated_bulk_class_sheds_without_blocking_interactive(client, monkeypatch):
+    """Test a full bulk class answers 503 with Retry-After while single predictions still run"""
+    import app as app_module
+    from admission import AdmissionClass, AdmissionController
+    
+    controller = AdmissionController([
+        AdmissionClass('interactive', max_concurrent=1, max_queue=0, max_wait_ms=100),
+        AdmissionClass('bulk', max_concurrent=1, max_queue=0, max_wait_ms=100)
+    ])
+    monkeypatch.setattr(app_module, 'admission', controller)
+    controller.classes['bulk'].acquire()
+    
+    response = client.post('/predict-batch', json={'items': [{'meal': 'toast', 'meal_type': 'breakfast'}]})
+    assert response.status_code == 503
+    assert int(response.headers['Retry-After']) >= 1
+    assert client.post('/predict-breakfast', json={'meal': 'toast'}).status_code == 200
+    
+    admission = client.get('/health').get_json()['admission']
+    assert admission['bulk']['shed']['queue_full'] == 1
+    assert admission['interactive']['admitted'] == 1
+
+def test_deadline_selects_tier(client):
+    """Test a deadline too short for the ensembles is answered by the distilled tier, uncached"""
+    import app as app_module
+    
+    meal = 'slow cooked barbecue jackfruit with coleslaw'
+    app_module.prediction_cache.clear()
+    fast = client.post('/predict-dinner', json={'meal': meal, 'deadline_ms': 0}).get_json()
+    assert (fast['source'], fast['tier']) == ('distilled', 'fast')
+    
+    full = client.post('/predict-dinner', json={'meal': meal}, headers={'X-Deadline-Ms': '5000'}).get_json()
+    assert (full['source'], full['tier']) == ('model', 'full')
+    assert client.post('/predict-dinner', json={'meal': meal, 'deadline_ms': 'soon'}).status_code == 400
+    for flag in (True, False):
+        assert client.post('/predict-dinner', json={'meal': meal, 'deadline_ms': flag}).status_code == 400
+    
+    batch = client.post('/predict-batch', json={
+        'items': [{'meal': meal, 'meal_type': 'dinner'}, {'meal': 'vegan chili bowl', 'meal_type': 'lunch'}],
+        'deadline_ms': 0
+    }).get_json()
+    # The cached dinner prediction is still served; only the miss drops to the fast tier
+    assert [item['tier'] for item in batch['results']] == ['full', 'fast']
+    assert client.get('/health').get_json()['models']['lunch']['distilled']
+
+def test_predict_stream_ndjson(client):
+    """Test NDJSON lines stream back one result per line, in order, without filling the cache"""
+    import app as app_module
+    
+    meals = [{'meal': f'Grilled chicken with rice and {vegetable}', 'id': i}
+             for i, vegetable in enumerate(['broccoli', 'peas', 'carrots', 'spinach', 'kale'])]
+    body = '\n'.join(json.dumps(meal) for meal in meals) + '\nnot json\n'
+    body += json.dumps({'meal': 'Brownie', 'meal_type': 'dessert'}) + '\n'
+    
+    app_module.prediction_cache.clear()
+    response = client.post('/predict-stream?meal_type=dinner', data=body, content_type='application/x-ndjson')
+    assert response.status_code == 200 and response.mimetype == 'application/x-ndjson'
+    
+    results = [json.loads(line) for line in response.data.decode().splitlines()]
+    assert [result['line'] for result in results] == list(range(1, 8))
+    assert [result.get('id') for result in results[:5]] == list(range(5))
+    assert all(result['success'] and result['meal_type'] == 'dinner' for result in results[:5])
+    assert not results[5]['success'] and results[6]['meal_type'] == 'desserts'
+    assert len(app_module.prediction_cache) == 0
+    
+    direct = client.post('/predict-dinner', json={'meal': meals[0]['meal']}).get_json()
+    assert direct['predictions'] == results[0]['predictions']
+
+def test_admin_reload_needs_token_and_reports_versions(client, monkeypatch):
+    """Test /admin/reload is off without ADMIN_TOKEN and swaps in a freshly loaded set with it"""
+    import app as app_module
+    
+    assert client.post('/admin/reload').status_code == 403
+    monkeypatch.setattr(app_module, 'ADMIN_TOKEN', 'secret')
+    assert client.post('/admin/reload', headers={'X-Admin-Token': 'wrong'}).status_code == 403
+    
+    before = app_module.registry.get('snacks')
+    response = client.post('/admin/reload?meal_type=snack', headers={'X-Admin-Token': 'secret'})
+    data = response.get_json()
+    
+    assert response.status_code == 200 and data['success']
+    # Same files on disk: a new set, same version
+    assert data['results']['snacks']['version'] == data['results']['snacks']['previous_version'] == before['version']
+    assert app_module.registry.get('snacks') is not before
+    status = client.get('/health').get_json()['models']['snacks']
+    assert status['version'] == before['version'] and status['reloads'] >= 1
+
+def test_shadow_only_offered_new_predictions(monkeypatch):
+    """Test cache hits aren't offered for shadow scoring again"""
+    import app as app_module
+    
+    offers = []
+    class Recorder:
+        def offer(self, meal_type, meal_descriptions, entries):
+            offers.append((meal_type, list(meal_descriptions), [entry['source'] for entry in entries]))
+    
+    monkeypatch.setattr(app_module, 'shadow', Recorder())
+    app_module.prediction_cache.clear()
+    meals = ['Grilled salmon with quinoa and asparagus', 'Turkey club sandwich with fries']
+    app_module.predict_many_for_meal_type(meals[:1], 'dinner')
+    app_module.predict_many_for_meal_type(meals, 'dinner')
+    
+    assert [descriptions for _, descriptions, _ in offers] == [meals[:1], meals[1:]]
+
+def test_active_requests_counted_without_admission(client, monkeypatch):
+    """Test requests in progress are counted (for shadow idle gating) and released afterwards"""
+    import app as app_module
+    
+    seen = []
+    real_predict = app_module.predict_for_meal_type
+    def recording_predict(*args, **kwargs):
+        seen.append(app_module.active_requests)
+        return real_predict(*args, **kwargs)
+    monkeypatch.setattr(app_module, 'predict_for_meal_type', recording_predict)
+    
+    before = app_module.active_requests
+    assert client.post('/predict-snacks', json={'meal': 'Cheese crackers'}).status_code == 200
+    assert seen == [before + 1] and app_module.active_requests == before
@@ -0,0 +1,58 @@
+import numpy as np
+import pandas as pd
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from components import ComponentTable
+from inference import predict_descriptions
+from model_registry import load_model_set
+
+def lunch_table():
+    return ComponentTable.fit('lunch/data/nutrition_data.csv', 'lunch/data/training_data.csv')
+
+def test_parse_foods_containing_separators():
+    """Test foods whose names contain "with"/"and" are kept whole"""
+    table = lunch_table()
+    description = ("Turkey and ham sandwich on wheat with Pasta, vegetable, cooked and "
+                   "Burrito bowl, beef or pork, with beans and rice with Egg, whole, boiled or poached")
+    assert table.parse(description) == [
+        ('', 'turkey and ham sandwich on wheat'),
+        ('with1', 'pasta vegetable cooked'),
+        ('and1', 'burrito bowl beef or pork with beans and rice'),
+        ('with2', 'egg whole boiled or poached')
+    ]
+
+def test_unknown_foods_do_not_parse():
+    """Test descriptions with foods outside nutrition_data.csv are left to the models"""
+    table = lunch_table()
+    assert table.parse('Mystery stew with unicorn bread') is None
+    assert table.parse('and Sushi roll tuna') is None
+    assert table.predict('') is None
+
+def test_components_fit_training_meals():
+    """Test summed contributions track the training meals' macros"""
+    table = lunch_table()
+    data = pd.read_csv('lunch/data/training_data.csv')
+    predicted = np.array([table.predict(d) for d in data['description']])
+    errors = np.abs(predicted - data[['calories', 'protein', 'carbs', 'fat']].values).mean(axis=0)
+    assert errors[0] < 50 and errors[1] < 5
+
+def test_predict_descriptions_mixes_components_and_models():
+    """Test parseable meals come from the table and the rest from the ensembles"""
+    models = load_model_set('dinner')
+    models['components'] = ComponentTable.fit('dinner/data/nutrition_data.csv', 'dinner/data/training_data.csv')
+    known = pd.read_csv('dinner/data/training_data.csv')['description'][0]
+    
+    component, model = predict_descriptions(models, [known, 'Homemade mystery casserole'])
+    without_table = dict(models)
+    del without_table['components']
+    assert model == predict_descriptions(without_table, ['Homemade mystery casserole'])[0]
+    
+    assert (component['source'], model['source']) == ('components', 'model')
+    
+    # dinner derives calories, so component predictions must too
+    macros = component['predictions']
+    expected = 4*macros['protein'] + 4*macros['carbs'] + 9*macros['fat']
+    assert abs(macros['calories'] - expected) < 1
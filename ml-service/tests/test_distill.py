@@ -0,0 +1,43 @@
+import numpy as np
+import subprocess
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from distill import DistilledModel, augment, fit_ridge, predict_distilled
+from inference import predict_macro_matrix, transform_descriptions
+from model_registry import load_model_set
+
+def test_augment_adds_shorter_variants():
+    """Test each multi-component meal gains one variant with a component dropped"""
+    variants = augment(['Oatmeal with berries and honey', 'Banana'])
+    assert variants[:2] == ['Oatmeal with berries and honey', 'Banana']
+    assert len(variants) == 3 and variants[2].count(' with ') == 1
+
+def test_ridge_recovers_a_linear_teacher(tmp_path):
+    """Test the closed-form fit reproduces a linear map and survives a save/load round trip"""
+    rng = np.random.RandomState(0)
+    X = rng.rand(200, 6)
+    coef, intercept = rng.rand(6, 4), rng.rand(4)
+    fitted = DistilledModel(*fit_ridge(X, X @ coef + intercept, alpha=1e-8), alpha=1e-8, sources={'fat_model.joblib': 'abc'})
+    
+    fitted.save(tmp_path / 'distilled.npz')
+    loaded = DistilledModel.load(tmp_path / 'distilled.npz')
+    assert np.allclose(loaded.predict(X), X @ coef + intercept, atol=1e-4)
+    assert loaded.sources == {'fat_model.joblib': 'abc'}
+
+def test_shipped_distilled_model_tracks_the_ensembles():
+    """Test the committed fast tier stays close to the full tier and derives calories like it"""
+    models = load_model_set('dinner')
+    assert 'distilled' in models
+    
+    X = transform_descriptions(models, ['Grilled salmon with rice and asparagus', 'Beef stew with bread'])
+    fast, full = predict_distilled(models, X), predict_macro_matrix(models, X)
+    assert np.all(np.abs(fast[:, 1:] - full[:, 1:]) < 15)
+    assert np.allclose(fast[:, 0], 4*fast[:, 1] + 4*fast[:, 2] + 9*fast[:, 3])
+
+def test_serving_imports_skip_pandas():
+    """Test the app's distill/model_registry imports don't pull in pandas"""
+    code = "import sys, distill, model_registry; assert 'pandas' not in sys.modules"
+    subprocess.run([sys.executable, '-c', code], cwd=Path(__file__).parent.parent, check=True)
@@ -0,0 +1,34 @@
+import pytest
+import joblib
+import numpy as np
+import pandas as pd
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from fast_tfidf import CompiledTfidf
+
+MEAL_TYPES = ['breakfast', 'lunch', 'dinner', 'snacks', 'desserts']
+
+@pytest.mark.parametrize('meal_type', MEAL_TYPES)
+def test_compiled_matches_vectorizer(meal_type):
+    """Test compiled TF-IDF rows match sklearn's within float tolerance"""
+    vectorizer = joblib.load(f'{meal_type}/models/vectorizer.joblib')
+    compiled = CompiledTfidf.from_vectorizer(vectorizer)
+    
+    descriptions = list(pd.read_csv(f'{meal_type}/data/training_data.csv')['description'])
+    descriptions += ['', 'the and of', 'Egg egg EGG toast', 'Crème brûlée with café au lait']
+    
+    expected = vectorizer.transform(descriptions).toarray()
+    assert np.allclose(compiled.transform(descriptions), expected, rtol=0, atol=1e-12)
+    assert np.allclose(compiled.transform(descriptions[:1]), expected[:1], rtol=0, atol=1e-12)
+
+def test_extract_terms_matches_analyzer():
+    """Test term extraction reproduces the vectorizer's analyzer"""
+    vectorizer = joblib.load('lunch/models/vectorizer.joblib')
+    compiled = CompiledTfidf.from_vectorizer(vectorizer)
+    analyzer = vectorizer.build_analyzer()
+    
+    for text in ['Grilled chicken salad with vinaigrette', 'Turkey and Swiss on rye, with the chips']:
+        assert compiled.extract_terms(text) == analyzer(text)
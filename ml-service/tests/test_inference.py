@@ -0,0 +1,23 @@
+import numpy as np
+import pandas as pd
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import inference
+from inference import predict_macro_matrix, transform_descriptions
+from model_registry import load_model_set
+
+def test_threaded_batch_matches_serial(monkeypatch):
+    """Test large batches split across inference threads predict exactly like a serial pass"""
+    models = load_model_set('snacks')
+    descriptions = list(pd.read_csv('snacks/data/training_data.csv')['description'][:300])
+    X = transform_descriptions(models, descriptions)
+    
+    monkeypatch.setattr(inference, 'INFERENCE_THREADS', 1)
+    serial = predict_macro_matrix(models, X)
+    
+    monkeypatch.setattr(inference, 'INFERENCE_THREADS', 3)
+    monkeypatch.setattr(inference, 'PARALLEL_BATCH_ROWS', 100)
+    assert np.array_equal(predict_macro_matrix(models, X), serial)
@@ -0,0 +1,59 @@
+import numpy as np
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from lookup_index import LookupIndex, jaccard, shingles
+
+MEALS = {
+    'grilled chicken with brown rice and steamed broccoli': (np.array([520.0, 45.0, 50.0, 12.0]), 'training'),
+    'turkey and ham sandwich on wheat with apple slices and iced tea': (np.array([610.0, 35.0, 80.0, 14.0]), 'training'),
+    'banana': (np.array([105.0, 1.3, 27.0, 0.4]), 'nutrition')
+}
+
+def test_exact_and_token_set_matches():
+    """Test case/punctuation variants and reordered words return the stored macros"""
+    index = LookupIndex(MEALS)
+    macros, match, similarity = index.lookup('Grilled chicken, with brown rice and steamed broccoli!')
+    assert match == 'exact' and similarity == 1.0
+    assert list(macros) == [520.0, 45.0, 50.0, 12.0]
+
+    macros, match, _ = index.lookup('steamed broccoli and grilled chicken with brown rice')
+    assert match == 'token_set' and macros[0] == 520.0
+    assert index.lookup('Banana')[1] == 'exact'
+
+def test_near_duplicates_respect_threshold():
+    """Test a one-word variant of a long meal is matched and unrelated meals are not"""
+    index = LookupIndex(MEALS, threshold=0.8)
+    query = 'turkey and ham sandwich on wheat with apple slices and iced teas'
+    stored = 'turkey and ham sandwich on wheat with apple slices and iced tea'
+    assert jaccard(shingles(query.split()), shingles(stored.split())) >= 0.8
+
+    macros, match, similarity = index.lookup(query)
+    assert match == 'near' and 0.8 <= similarity < 1.0
+    assert macros[0] == 610.0
+
+    assert index.lookup(query, near=False) is None
+    assert index.lookup('grilled salmon with quinoa') is None
+    assert LookupIndex(MEALS, threshold=0.99).lookup(query) is None
+    assert index.stats()['hits'] == {'exact': 0, 'token_set': 0, 'near': 1}
+
+def test_build_averages_repeated_training_meals(tmp_path):
+    """Test training rows sharing a description are averaged and foods sized by serving_macros"""
+    training = tmp_path / 'training_data.csv'
+    training.write_text('description,calories,protein,carbs,fat\n'
+                        'Oatmeal with berries,300,10,50,6\n'
+                        'oatmeal with Berries,340,12,54,8\n')
+    nutrition = tmp_path / 'nutrition_data.csv'
+    nutrition.write_text('description,calories,protein,carbs,fat\n'
+                         'Oatmeal,68,2.4,12,1.4\n'
+                         'Mystery food,100,1,1,1\n')
+
+    sizes = {'oatmeal': [136.0, 4.8, 24.0, 2.8]}
+    index = LookupIndex.build(training, nutrition, serving_macros=sizes.get)
+
+    assert list(index.lookup('oatmeal with berries')[0]) == [320.0, 11.0, 52.0, 7.0]
+    assert list(index.lookup('OATMEAL')[0]) == [136.0, 4.8, 24.0, 2.8]
+    assert index.lookup('mystery food') is None
+    assert index.stats()['training_entries'] == 1
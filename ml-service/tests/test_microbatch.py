@@ -0,0 +1,51 @@
+import pytest
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from microbatch import MicroBatcher
+
+def test_concurrent_items_share_a_batch():
+    """Test items queued within the window are predicted together and fanned back out in order"""
+    calls = []
+    release = threading.Event()
+    
+    def predict_many(key, items):
+        calls.append((key, list(items)))
+        release.wait(1)
+        return [f'{key}:{item}' for item in items]
+    
+    batcher = MicroBatcher(predict_many, window_ms=50, max_items=4)
+    futures = [batcher.submit('lunch', i) for i in range(4)]
+    release.set()
+    
+    assert [future.result(timeout=2) for future in futures] == ['lunch:0', 'lunch:1', 'lunch:2', 'lunch:3']
+    assert calls == [('lunch', [0, 1, 2, 3])]
+    assert batcher.stats()['full_batches'] == 1
+
+def test_keys_are_batched_separately():
+    """Test each key gets its own batches"""
+    batcher = MicroBatcher(lambda key, items: [(key, item) for item in items], window_ms=5)
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(
+            lambda i: batcher.submit(['snacks', 'dinner'][i % 2], i).result(timeout=2), range(16)
+        ))
+    assert results == [(['snacks', 'dinner'][i % 2], i) for i in range(16)]
+    assert batcher.stats()['items'] == 16
+
+def test_failed_batch_fails_every_waiting_item():
+    """Test an exception in the batch predict reaches every request in it, and later batches still run"""
+    def predict_many(key, items):
+        if 'bad' in items:
+            raise ValueError('broken batch')
+        return items
+    
+    batcher = MicroBatcher(predict_many, window_ms=20)
+    futures = [batcher.submit('dinner', item) for item in ['ok', 'bad']]
+    for future in futures:
+        with pytest.raises(ValueError):
+            future.result(timeout=2)
+    assert batcher.submit('dinner', 'fine').result(timeout=2) == 'fine'
@@ -0,0 +1,68 @@
+import pytest
+import joblib
+import numpy as np
+import pandas as pd
+import subprocess
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from model_bundle import export_bundle, load_bundle, bundle_is_stale
+from tree_ensemble import TreeEnsemble
+
+MEAL_TYPES = ['breakfast', 'lunch', 'dinner', 'snacks', 'desserts']
+
+def test_bundle_round_trip(tmp_path):
+    """Test an exported bundle predicts exactly like the joblib models"""
+    models = {
+        target: joblib.load(f'snacks/models/{target}_model.joblib')
+        for target in ['calories', 'protein', 'carbs', 'fat']
+    }
+    vectorizer = joblib.load('snacks/models/vectorizer.joblib')
+    export_bundle(models, vectorizer, str(tmp_path), 'snacks')
+    
+    bundle = load_bundle(str(tmp_path / 'bundle'))
+    descriptions = list(pd.read_csv('snacks/data/training_data.csv')['description'][:100])
+    
+    X = bundle['tfidf'].transform(descriptions)
+    assert np.allclose(X, vectorizer.transform(descriptions).toarray(), atol=1e-12)
+    for target, model in models.items():
+        expected = TreeEnsemble.from_sklearn(model).predict(X)
+        assert np.array_equal(bundle[target].predict(X), expected)
+
+def test_bundle_checksum_mismatch(tmp_path):
+    """Test a corrupted bundle is rejected"""
+    models = {'fat': joblib.load('lunch/models/fat_model.joblib')}
+    export_bundle(models, joblib.load('lunch/models/vectorizer.joblib'), str(tmp_path), 'lunch')
+    
+    with open(tmp_path / 'bundle' / 'vocabulary.json', 'a') as f:
+        f.write(' ')
+    with pytest.raises(ValueError):
+        load_bundle(str(tmp_path / 'bundle'))
+
+@pytest.mark.parametrize('meal_type', MEAL_TYPES)
+def test_committed_bundles_are_current(meal_type):
+    """Test each shipped bundle was exported from the shipped joblib files"""
+    assert not bundle_is_stale(f'{meal_type}/models/bundle', f'{meal_type}/models')
+
+def test_bundle_loads_without_sklearn():
+    """Test loading bundles never imports scikit-learn"""
+    code = (
+        "import sys; from model_bundle import load_bundle; "
+        "[load_bundle(f'{m}/models/bundle') for m in ['breakfast', 'lunch', 'dinner', 'snacks', 'desserts']]; "
+        "assert 'sklearn' not in sys.modules"
+    )
+    subprocess.run([sys.executable, '-c', code], cwd=Path(__file__).parent.parent, check=True)
+
+def test_mmap_bundle_matches_copy():
+    """Test memory-mapped bundle arrays predict exactly like copied ones"""
+    copied = load_bundle('desserts/models/bundle')
+    mapped = load_bundle('desserts/models/bundle', mmap=True)
+    
+    descriptions = list(pd.read_csv('desserts/data/training_data.csv')['description'][:50])
+    X = copied['tfidf'].transform(descriptions)
+    
+    for target in ['calories', 'protein', 'carbs', 'fat']:
+        assert not mapped[target].threshold.flags.writeable
+        assert np.array_equal(mapped[target].predict(X), copied[target].predict(X))
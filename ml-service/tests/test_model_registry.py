@@ -0,0 +1,194 @@
+import pytest
+import threading
+import time
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from model_registry import ModelRegistry, load_model_set
+
+MEAL_TYPES = ['breakfast', 'lunch', 'dinner', 'snacks', 'desserts']
+
+def slow_loader(delay, failing=()):
+    """Loader that records which threads ran it and fails for some meal types"""
+    threads = set()
+    
+    def load(meal_type):
+        threads.add(threading.get_ident())
+        time.sleep(delay)
+        if meal_type in failing:
+            raise FileNotFoundError(f'{meal_type}/models')
+        return {'meal_type': meal_type, 'format': 'bundle', 'calorie_mode': 'derived'}
+    
+    load.threads = threads
+    return load
+
+def test_eager_loads_concurrently():
+    """Test eager start loads every meal type in parallel threads"""
+    loader = slow_loader(0.2)
+    registry = ModelRegistry(MEAL_TYPES, loader=loader, warmup=False)
+    
+    start = time.perf_counter()
+    registry.start('eager')
+    elapsed = time.perf_counter() - start
+    
+    assert elapsed < 0.2 * len(MEAL_TYPES) / 2
+    assert len(loader.threads) > 1
+    assert registry.ready
+    for meal_type in MEAL_TYPES:
+        assert registry.status[meal_type]['state'] == 'ready'
+        assert registry.status[meal_type]['load_seconds'] >= 0.2
+
+def test_lazy_loads_on_first_request():
+    """Test lazy start defers loading until a meal type is requested"""
+    registry = ModelRegistry(MEAL_TYPES, loader=slow_loader(0), warmup=False)
+    registry.start('lazy')
+    
+    assert registry.models == {}
+    assert registry.get('lunch')['meal_type'] == 'lunch'
+    assert list(registry.models) == ['lunch']
+    assert registry.status['dinner']['state'] == 'pending'
+
+def test_background_readiness():
+    """Test background start reports not ready until every meal type is loaded"""
+    registry = ModelRegistry(MEAL_TYPES, loader=slow_loader(0.3), warmup=False)
+    registry.start('background')
+    
+    assert not registry.ready
+    # get() waits for the background load instead of loading twice
+    assert registry.get('snacks')['meal_type'] == 'snacks'
+    
+    deadline = time.time() + 5
+    while not registry.ready and time.time() < deadline:
+        time.sleep(0.01)
+    assert registry.ready
+
+def test_failed_meal_type_does_not_block_others():
+    """Test a meal type that fails to load is reported without blocking readiness"""
+    registry = ModelRegistry(MEAL_TYPES, loader=slow_loader(0, failing=['dinner']), warmup=False)
+    registry.start('eager')
+    
+    assert registry.ready
+    assert registry.get('dinner') is None
+    assert registry.status['dinner']['state'] == 'failed'
+    assert 'dinner/models' in registry.status['dinner']['error']
+    assert len(registry.models) == len(MEAL_TYPES) - 1
+
+def test_warmup_runs_real_predict():
+    """Test loading a real model set runs and times a warmup predict"""
+    registry = ModelRegistry(['snacks'], loader=load_model_set)
+    registry.start('eager')
+    
+    assert registry.status['snacks']['state'] == 'ready'
+    assert registry.status['snacks']['warmup_seconds'] is not None
+
+def test_unknown_load_mode():
+    """Test an unknown load mode is rejected"""
+    registry = ModelRegistry(MEAL_TYPES, loader=slow_loader(0), warmup=False)
+    with pytest.raises(ValueError):
+        registry.start('sometimes')
+
+def test_sklearn_models_predict_serially(monkeypatch):
+    """Test n_jobs=-1 pickled into the forests is overridden at load time"""
+    import model_registry
+    monkeypatch.setattr(model_registry, 'TREE_EVALUATOR', 'sklearn')
+    
+    models = model_registry.load_joblib_models('snacks/models')
+    for target in ['protein', 'carbs', 'fat']:
+        assert type(models[target]).__name__ == 'RandomForestRegressor'
+        assert models[target].n_jobs == 1
+
+def versioned_loader():
+    """Loader whose every call returns a new version of the meal type's set"""
+    calls = []
+    
+    def load(meal_type):
+        calls.append(meal_type)
+        return {'meal_type': meal_type, 'format': 'bundle', 'calorie_mode': 'derived', 'version': f'v{len(calls)}'}
+    
+    return load
+
+def test_reload_swaps_only_validated_models():
+    """Test reload swaps in a new set, keeps the old one when validation fails, and old holders keep theirs"""
+    rejecting = set()
+    def validate(meal_type, models, current):
+        if models['version'] in rejecting:
+            raise ValueError('Smoke test: bad models')
+    
+    registry = ModelRegistry(['lunch'], loader=versioned_loader(), warmup=False, validate=validate)
+    registry.start('eager')
+    held = registry.get('lunch')
+    
+    result = registry.reload('lunch')
+    assert result == {'reloaded': True, 'version': 'v2', 'previous_version': 'v1', 'error': None}
+    assert registry.get('lunch')['version'] == 'v2' and held['version'] == 'v1'
+    
+    rejecting.add('v3')
+    result = registry.reload('lunch')
+    assert not result['reloaded'] and 'bad models' in result['error']
+    assert registry.get('lunch')['version'] == 'v2'
+    assert registry.status['lunch']['reloads'] == 1
+    assert 'bad models' in registry.status['lunch']['reload_error']
+
+def test_watch_reloads_after_files_settle():
+    """Test the watcher reloads a meal type once its changed files stop changing"""
+    files = {'lunch': ['v1']}
+    registry = ModelRegistry(['lunch'], loader=versioned_loader(), warmup=False,
+                             validate=lambda *args: None, signature=lambda meal_type: list(files[meal_type]))
+    registry.start('eager')
+    registry.watch(0.02)
+    
+    files['lunch'] = ['v2']
+    deadline = time.time() + 5
+    while registry.status['lunch']['reloads'] == 0 and time.time() < deadline:
+        time.sleep(0.01)
+    assert registry.status['lunch']['reloads'] == 1
+    assert registry.get('lunch')['version'] == 'v2'
+    
+    # Nothing changed since: no further reloads
+    time.sleep(0.1)
+    assert registry.status['lunch']['reloads'] == 1
+
+def test_smoke_test_rejects_worse_models():
+    """Test the smoke test accepts the same models and rejects ones much worse on the corpus"""
+    from model_registry import smoke_test
+    
+    models = load_model_set('snacks')
+    smoke_test('snacks', models, current=models)
+    
+    broken = dict(models, calorie_mode='derived', calorie_factor=5.0)
+    with pytest.raises(ValueError, match='Smoke test'):
+        smoke_test('snacks', broken, current=models)
+
+def test_fork_during_reload_does_not_deadlock_child():
+    """Test a child forked while a reload holds a meal type's lock can still reload it"""
+    import os
+    
+    started, release = threading.Event(), threading.Event()
+    loader = versioned_loader()
+    def blocking_loader(meal_type):
+        if started.is_set():
+            release.wait(5)
+        return loader(meal_type)
+    
+    registry = ModelRegistry(['lunch'], loader=blocking_loader, warmup=False, validate=lambda *args: None)
+    registry.start('eager')
+    started.set()
+    reloading = threading.Thread(target=registry.reload, args=('lunch',))
+    reloading.start()
+    time.sleep(0.1)
+    
+    pid = os.fork()
+    if pid == 0:
+        # Child: the parent's reload thread is gone, its lock must not be
+        release.set()
+        results = []
+        child_reload = threading.Thread(target=lambda: results.append(registry.reload('lunch')), daemon=True)
+        child_reload.start()
+        child_reload.join(5)
+        os._exit(0 if results and results[0]['reloaded'] else 1)
+    release.set()
+    reloading.join()
+    _, status = os.waitpid(pid, 0)
+    assert os.WEXITSTATUS(status) == 0
@@ -0,0 +1,20 @@
+import io
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from ndjson_stream import read_chunks
+
+def test_chunks_keep_line_numbers_and_report_bad_lines():
+    """Test lines are chunked in order, blank lines skipped and bad lines reported in place"""
+    body = b'{"meal": "a"}\n\n[1, 2]\nnot json\n' + b'{"meal": "' + b'x' * 100 + b'"}\n{"meal": "b"}'
+    chunks = list(read_chunks(io.BytesIO(body), chunk_size=2, max_line_bytes=64))
+    
+    assert [len(chunk) for chunk in chunks] == [2, 2, 1]
+    lines = [entry for chunk in chunks for entry in chunk]
+    assert [number for number, _ in lines] == [1, 3, 4, 5, 6]
+    assert lines[0][1] == {'meal': 'a'} and lines[4][1] == {'meal': 'b'}
+    assert lines[1][1] == 'Each line must be a JSON object'
+    assert lines[2][1].startswith('Invalid JSON')
+    assert lines[3][1] == 'Line too long'
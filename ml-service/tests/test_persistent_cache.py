@@ -0,0 +1,81 @@
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import persistent_cache
+from persistent_cache import PersistentCache
+
+MACROS = {'calories': 410.5, 'protein': 22.0, 'carbs': 48.3, 'fat': 12.1, 'source': 'model'}
+
+def test_entries_shared_between_instances(tmp_path):
+    """Test a second connection (another worker, or a restart) sees stored predictions"""
+    path = str(tmp_path / 'cache.sqlite')
+    PersistentCache(path).put_many([(('v1', 'lunch', 'turkey sandwich'), MACROS)])
+    
+    other = PersistentCache(path)
+    assert other.get_many([('v1', 'lunch', 'turkey sandwich')]) == {('v1', 'lunch', 'turkey sandwich'): MACROS}
+    assert other.stats()['hits'] == 1
+
+def test_entries_namespaced_by_model_version(tmp_path):
+    """Test predictions stored for one model version are not served to another"""
+    cache = PersistentCache(str(tmp_path / 'cache.sqlite'))
+    cache.put_many([(('v1', 'lunch', 'turkey sandwich'), MACROS)])
+    
+    assert cache.get_many([('v2', 'lunch', 'turkey sandwich')]) == {}
+    assert cache.stats()['misses'] == 1
+
+def test_old_schema_is_replaced(tmp_path):
+    """Test a cache file written with an older table layout is emptied and reused"""
+    import sqlite3
+    path = str(tmp_path / 'cache.sqlite')
+    conn = sqlite3.connect(path)
+    conn.execute('CREATE TABLE predictions (version TEXT, meal_type TEXT, description TEXT)')
+    conn.commit()
+    conn.close()
+    
+    cache = PersistentCache(path)
+    cache.put_many([(('v1', 'lunch', 'turkey sandwich'), MACROS)])
+    assert cache.get_many([('v1', 'lunch', 'turkey sandwich')]) == {('v1', 'lunch', 'turkey sandwich'): MACROS}
+
+def test_size_cap_evicts_least_recently_used(tmp_path, monkeypatch):
+    """Test the table is trimmed to max_entries, dropping the oldest rows"""
+    monkeypatch.setattr(persistent_cache, 'EVICTION_CHECK_EVERY', 1)
+    cache = PersistentCache(str(tmp_path / 'cache.sqlite'), max_entries=3)
+    
+    for i in range(5):
+        cache.put_many([(('v1', 'snacks', f'meal {i}'), MACROS)])
+        # Distinct last_used values so eviction order is deterministic
+        cache._connection().execute('UPDATE predictions SET last_used = ? WHERE description = ?', (i, f'meal {i}'))
+    cache.evict()
+    
+    stats = cache.stats()
+    assert stats['entries'] == 3
+    assert stats['evictions'] == 2
+    remaining = cache.get_many([('v1', 'snacks', f'meal {i}') for i in range(5)])
+    assert sorted(key[2] for key in remaining) == ['meal 2', 'meal 3', 'meal 4']
+
+PROBE = """
+import json
+from app import app
+client = app.test_client()
+response = client.post('/predict-lunch', json={'meal': 'Chicken Caesar salad'}).get_json()
+print(json.dumps({'predictions': response['predictions'],
+                  'cache': client.get('/health').get_json()['persistent_cache']}))
+"""
+
+def test_cache_survives_restart(tmp_path):
+    """Test a restarted service answers from the shared cache"""
+    env = dict(os.environ, PERSISTENT_CACHE_PATH=str(tmp_path / 'cache.sqlite'))
+    runs = [
+        json.loads(subprocess.run([sys.executable, '-c', PROBE], cwd=Path(__file__).parent.parent, env=env,
+                                  capture_output=True, text=True, check=True).stdout.strip().splitlines()[-1])
+        for _ in range(2)
+    ]
+    
+    assert runs[0]['cache']['hits'] == 0 and runs[0]['cache']['writes'] == 1
+    assert runs[1]['cache']['hits'] == 1 and runs[1]['cache']['writes'] == 0
+    assert runs[0]['predictions'] == runs[1]['predictions']
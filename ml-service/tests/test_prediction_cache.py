@@ -0,0 +1,39 @@
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from prediction_cache import PredictionCache, canonical_description
+
+def test_canonical_description():
+    """Test case, whitespace and punctuation variants share a canonical form"""
+    expected = 'grilled chicken with rice broccoli'
+    assert canonical_description('Grilled chicken with rice & broccoli') == expected
+    assert canonical_description('  grilled   CHICKEN with rice,broccoli.\n') == expected
+
+def test_lru_eviction_and_counters():
+    """Test the least recently used entry is evicted and lookups are counted"""
+    cache = PredictionCache(max_entries=2)
+    cache.put('a', {'fat': 1.0})
+    cache.put('b', {'fat': 2.0})
+    assert cache.get('a') == {'fat': 1.0}   # 'b' is now least recently used
+    cache.put('c', {'fat': 3.0})
+    
+    assert cache.get('b') is None
+    assert cache.get('c') == {'fat': 3.0}
+    stats = cache.stats()
+    assert (stats['entries'], stats['hits'], stats['misses'], stats['evictions']) == (2, 2, 1, 1)
+
+def test_cached_values_are_copies():
+    """Test callers can't modify a cached entry through a returned value"""
+    cache = PredictionCache(max_entries=10)
+    cache.put('a', {'fat': 1.0})
+    cache.get('a')['fat'] = 99.0
+    assert cache.get('a') == {'fat': 1.0}
+
+def test_disabled_cache():
+    """Test max_entries=0 stores nothing"""
+    cache = PredictionCache(max_entries=0)
+    cache.put('a', {'fat': 1.0})
+    assert cache.get('a') is None
+    assert len(cache) == 0
@@ -0,0 +1,61 @@
+import sys
+import numpy as np
+import pandas as pd
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from inference import MACRO_TARGETS, score_descriptions
+from score_cli import OUTPUT_COLUMNS, score_chunk, score_file, worker_models
+
+def test_score_chunk_keeps_order_and_reports_bad_rows():
+    """Test rows come back in input order, repeats share a score and bad rows get an error"""
+    descriptions = ['Oatmeal with banana', 'Grilled chicken salad', '', 'Oatmeal with banana', 'Pizza']
+    meal_types = ['breakfast', 'lunch', 'lunch', 'breakfast', 'brunch']
+    frame = score_chunk(descriptions, meal_types)
+    
+    assert list(frame.columns) == OUTPUT_COLUMNS
+    assert frame['description'].tolist() == descriptions
+    assert frame['error'].tolist()[:2] == ['', ''] and frame['error'][2] and frame['error'][4]
+    assert np.isnan(frame.loc[2, 'protein'])
+    assert frame.loc[0, MACRO_TARGETS].tolist() == frame.loc[3, MACRO_TARGETS].tolist()
+    
+    # Same answer the service gives for an uncached meal
+    expected = score_descriptions(worker_models('lunch'), ['Grilled chicken salad'])[0]
+    assert frame.loc[1, MACRO_TARGETS].tolist() == [expected['predictions'][t] for t in MACRO_TARGETS]
+    assert frame.loc[1, 'source'] == expected['source']
+
+def test_score_file_writes_every_chunk(tmp_path):
+    """Test a CSV is scored chunk by chunk into one output file, with --meal-type as the default"""
+    meals = pd.DataFrame({'description': ['Turkey sandwich', 'Tomato soup', 'Caesar salad'] * 3})
+    meals.to_csv(tmp_path / 'meals.csv', index=False)
+    
+    rows, _ = score_file(tmp_path / 'meals.csv', tmp_path / 'scored.csv', workers=0, chunk_size=4,
+                         default_meal_type='lunch', progress=False)
+    
+    scored = pd.read_csv(tmp_path / 'scored.csv', keep_default_na=False)
+    assert rows == len(scored) == 9
+    assert scored['description'].tolist() == meals['description'].tolist()
+    assert (scored['meal_type'] == 'lunch').all() and (scored['error'] == '').all()
+
+def test_worker_pool_matches_serial_run(tmp_path):
+    """Test scoring across worker processes writes the serial run's rows, in the same order"""
+    meal_types = ['breakfast', 'lunch', 'dinner', 'snacks', 'desserts']
+    descriptions = pd.read_csv('dinner/data/training_data.csv')['description'][:60].tolist()
+    meals = pd.DataFrame({
+        'description': descriptions + ['', 'Pizza'],
+        'meal_type': [meal_types[i % len(meal_types)] for i in range(len(descriptions))] + ['lunch', 'brunch']
+    })
+    meals.to_csv(tmp_path / 'meals.csv', index=False)
+    
+    # Small chunks: more chunks than the pool keeps in flight, so results are written as they finish
+    serial_rows, _ = score_file(tmp_path / 'meals.csv', tmp_path / 'serial.csv', workers=0, chunk_size=7,
+                                progress=False)
+    pool_rows, _ = score_file(tmp_path / 'meals.csv', tmp_path / 'pool.csv', workers=2, chunk_size=7,
+                              progress=False)
+    
+    serial = pd.read_csv(tmp_path / 'serial.csv', keep_default_na=False)
+    pooled = pd.read_csv(tmp_path / 'pool.csv', keep_default_na=False)
+    assert serial_rows == pool_rows == len(meals)
+    assert pooled['description'].tolist() == meals['description'].tolist()
+    pd.testing.assert_frame_equal(pooled, serial)
@@ -0,0 +1,135 @@
+import threading
+import time
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from inference import predict_descriptions
+from model_registry import load_model_set
+from shadow import ShadowEvaluator
+
+MEALS = ['Trail mix with almonds', 'Apple slices with peanut butter', 'Cheese crackers']
+
+def test_identical_candidate_has_zero_delta():
+    """Test a candidate identical to the served models scores every sampled meal with no difference"""
+    models = load_model_set('snacks')
+    served = predict_descriptions(models, MEALS)
+    shadow = ShadowEvaluator(lambda meal_type: models, ['snacks'], sample_rate=1.0)
+    
+    assert shadow.offer('snacks', MEALS, served)
+    assert not shadow.offer('lunch', MEALS, served)
+    # Stored lookups aren't compared
+    assert not shadow.offer('snacks', MEALS[:1], [{'predictions': served[0]['predictions'], 'source': 'lookup'}])
+    shadow.wait()
+    
+    stats = shadow.stats()['meal_types']['snacks']
+    assert stats['scored'] == len(MEALS) and stats['errors'] == 0
+    assert set(stats['mean_abs_delta'].values()) == {0.0}
+    assert stats['latency_ms_per_meal']['p50'] > 0
+
+def test_full_queue_drops_without_blocking():
+    """Test offers return at once and are dropped while the worker is busy and the queue is full"""
+    release = threading.Event()
+    def slow_loader(meal_type):
+        release.wait(5)
+        raise FileNotFoundError('no candidate')
+    
+    entry = {'predictions': {'calories': 100.0, 'protein': 1.0, 'carbs': 10.0, 'fat': 5.0}, 'source': 'model'}
+    shadow = ShadowEvaluator(slow_loader, ['snacks'], sample_rate=1.0, max_queue=2)
+    
+    start = time.perf_counter()
+    results = [shadow.offer('snacks', MEALS[:1], [entry]) for _ in range(10)]
+    assert time.perf_counter() - start < 0.1
+    # One taken by the (stuck) worker, two queued, the rest dropped
+    assert results.count(False) >= 7
+    assert shadow.stats()['dropped'] == results.count(False)
+    
+    release.set()
+    shadow.wait()
+    stats = shadow.stats()
+    assert stats['meal_types']['snacks']['errors'] >= 1
+    # A candidate that can't load stops sampling for its meal type
+    assert not shadow.offer('snacks', MEALS[:1], [entry])
+
+def test_sample_rate():
+    """Test roughly sample_rate of offers are taken"""
+    entry = {'predictions': {'calories': 1.0, 'protein': 1.0, 'carbs': 1.0, 'fat': 1.0}, 'source': 'model'}
+    shadow = ShadowEvaluator(lambda meal_type: None, ['snacks'], sample_rate=0.1, max_queue=1, seed=0)
+    for _ in range(2000):
+        shadow.offer('snacks', ['x'], [entry])
+    assert 120 < shadow.stats()['offered'] < 280
+
+def test_scoring_waits_for_idle():
+    """Test queued samples are only scored once busy() reports no live requests"""
+    models = load_model_set('snacks')
+    served = predict_descriptions(models, MEALS)
+    busy = [True]
+    shadow = ShadowEvaluator(lambda meal_type: models, ['snacks'], sample_rate=1.0, busy=lambda: busy[0])
+    
+    assert shadow.offer('snacks', MEALS, served)
+    time.sleep(0.1)
+    assert shadow.stats()['meal_types']['snacks']['scored'] == 0
+    
+    busy[0] = False
+    shadow.wait()
+    assert shadow.stats()['meal_types']['snacks']['scored'] == len(MEALS)
+
+def test_candidate_warmed_before_scoring(monkeypatch):
+    """Test the candidate predicts the smoke corpus before any sampled meal is timed"""
+    import shadow as shadow_module
+    from model_registry import smoke_corpus
+    
+    models = load_model_set('snacks')
+    served = predict_descriptions(models, MEALS)
+    calls = []
+    def recording_predict(models, meals):
+        calls.append(list(meals))
+        return predict_descriptions(models, meals)
+    monkeypatch.setattr(shadow_module, 'predict_descriptions', recording_predict)
+    
+    shadow = ShadowEvaluator(lambda meal_type: models, ['snacks'], sample_rate=1.0)
+    assert shadow.offer('snacks', MEALS, served)
+    assert shadow.offer('snacks', MEALS, served)
+    shadow.wait()
+    
+    corpus, _ = smoke_corpus('snacks')
+    # Warmed once, on the first sample only
+    assert sum(calls[:-2], []) == corpus and calls[-2:] == [MEALS, MEALS]
+    assert shadow.stats()['meal_types']['snacks']['scored'] == 2 * len(MEALS)
+
+def test_prepare_loads_candidates_up_front():
+    """Test prepare() loads and warms candidates before traffic, dropping meal types that fail"""
+    models = load_model_set('snacks')
+    loaded = []
+    def loader(meal_type):
+        loaded.append(meal_type)
+        if meal_type == 'lunch':
+            raise FileNotFoundError('no candidate')
+        return models
+    
+    shadow = ShadowEvaluator(loader, ['snacks', 'lunch'], sample_rate=1.0)
+    shadow.prepare()
+    assert sorted(loaded) == ['lunch', 'snacks'] and shadow.meal_types == {'snacks'}
+    
+    served = predict_descriptions(models, MEALS)
+    assert shadow.offer('snacks', MEALS, served)
+    shadow.wait()
+    assert loaded.count('snacks') == 1
+    assert shadow.stats()['meal_types']['snacks']['scored'] == len(MEALS)
+
+def test_lazy_load_waits_for_idle():
+    """Test a candidate loaded on first use isn't loaded while requests are in progress"""
+    models = load_model_set('snacks')
+    busy = [True]
+    loaded = []
+    shadow = ShadowEvaluator(lambda meal_type: loaded.append(meal_type) or models, ['snacks'],
+                             sample_rate=1.0, busy=lambda: busy[0])
+    
+    assert shadow.offer('snacks', MEALS, predict_descriptions(models, MEALS))
+    time.sleep(0.1)
+    assert loaded == []
+    
+    busy[0] = False
+    shadow.wait()
+    assert loaded == ['snacks']
@@ -0,0 +1,85 @@
+import pytest
+import sys
+import threading
+from pathlib import Path
+from werkzeug.serving import make_server
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import shard_router
+from app import app as model_app
+
+@pytest.fixture
+def router(monkeypatch):
+    """Router client in front of two in-process "shards" (both full app.py instances)"""
+    servers = [make_server('127.0.0.1', 0, model_app, threaded=True) for _ in range(2)]
+    for server in servers:
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+    first, second = [f'http://127.0.0.1:{server.server_port}' for server in servers]
+    monkeypatch.setattr(shard_router, 'shard_urls', shard_router.parse_shard_urls(
+        f'lunch,dinner={first};breakfast,snacks,desserts={second}'
+    ))
+    shard_router.app.config['TESTING'] = True
+    with shard_router.app.test_client() as client:
+        yield client
+    for server in servers:
+        server.shutdown()
+
+def test_parse_layout_requires_every_meal_type_once():
+    """Test layouts are parsed into groups and incomplete layouts are rejected"""
+    assert shard_router.parse_layout('lunch,dinner:3 breakfast snacks,desserts:1') == [
+        (['lunch', 'dinner'], 3), (['breakfast'], 1), (['snacks', 'desserts'], 1)
+    ]
+    with pytest.raises(ValueError):
+        shard_router.parse_layout('lunch,dinner:2 breakfast:1')
+
+def test_batch_is_split_across_shards_in_order(router):
+    """Test a mixed batch comes back in input order with local validation errors"""
+    response = router.post('/predict-batch', json={'items': [
+        {'meal': 'Turkey sandwich with chips', 'meal_type': 'lunch'},
+        {'meal': 'Pancakes with syrup', 'meal_type': 'breakfast'},
+        {'meal': 'Brunch plate', 'meal_type': 'brunch'},
+        {'meal': 'Brownie', 'meal_type': 'dessert'}
+    ]})
+    results = response.get_json()['results']
+    assert [result['success'] for result in results] == [True, True, False, True]
+    assert [result.get('meal_type') for result in results] == ['lunch', 'breakfast', None, 'desserts']
+    
+    direct = model_app.test_client().post('/predict-lunch', json={'meal': 'Turkey sandwich with chips'})
+    assert results[0]['predictions'] == direct.get_json()['predictions']
+
+def test_non_object_bodies_are_rejected(router):
+    """Test valid JSON that isn't an object gets 400 from the router itself"""
+    for path in ('/predict-batch', '/predict-macros'):
+        for body in ([1], 'meal'):
+            assert router.post(path, json=body).status_code == 400
+
+def test_single_and_all_meal_types_are_routed(router):
+    """Test per-type requests reach their shard and meal_type=all merges every shard"""
+    single = router.post('/predict-dinner', json={'meal': 'Steak with potatoes'}, headers={'X-Deadline-Ms': '0'})
+    assert single.status_code == 200 and single.get_json()['tier'] == 'fast'
+    assert router.post('/predict-dinner', json={}).status_code == 400
+    
+    merged = router.post('/predict-macros', json={'meal': 'Apple pie', 'meal_type': 'all'}).get_json()
+    assert all(merged['predictions'][meal_type] for meal_type in shard_router.MEAL_TYPES)
+    assert router.get('/health/ready').status_code == 200
+
+def test_predict_macros_validated_like_the_app(router):
+    """Test the router checks meals and normalizes meal types before forwarding"""
+    for body in ({'meal': 123, 'meal_type': 'all'}, {'meal': ''}, {'meal': None, 'meal_type': 'lunch'}):
+        assert router.post('/predict-macros', json=body).status_code == 400
+    
+    response = router.post('/predict-macros', json={'meal': 'Brownie', 'meal_type': 'Dessert'})
+    assert response.status_code == 200 and response.get_json()['meal_type'] == 'desserts'
+
+def test_unrouted_formats_get_clear_errors(router):
+    """Test msgpack batches and NDJSON streams are refused with an explanation, not a misleading 400"""
+    columnar = router.post('/predict-batch', data=b'\x80', content_type='application/msgpack')
+    assert columnar.status_code == 415 and 'not routed' in columnar.get_json()['error']
+    
+    accept = router.post('/predict-batch', json={'items': []}, headers={'Accept': 'application/msgpack'})
+    assert accept.status_code == 406
+    
+    stream = router.post('/predict-stream', data='{"meal": "Toast", "meal_type": "breakfast"}\n',
+                         content_type='application/x-ndjson')
+    assert stream.status_code == 404 and 'not routed' in stream.get_json()['error']
@@ -0,0 +1,30 @@
+import pytest
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from singleflight import SingleFlight
+
+def test_followers_share_the_leaders_result():
+    """Test later claims on an in-flight key wait for the first one's value"""
+    flight = SingleFlight()
+    is_leader, future = flight.claim('key')
+    follower = flight.claim('key')
+    assert is_leader and follower == (False, future)
+    
+    flight.resolve('key', {'protein': 12.0})
+    assert follower[1].result(timeout=1) == {'protein': 12.0}
+    assert flight.claim('key')[0]
+    assert flight.stats()['deduplicated'] == 1
+
+def test_failure_reaches_followers_and_frees_the_key():
+    """Test a failed leader raises in its followers and the next claim leads again"""
+    flight = SingleFlight()
+    flight.claim('key')
+    _, future = flight.claim('key')
+    flight.fail('key', RuntimeError('predict failed'))
+    with pytest.raises(RuntimeError):
+        future.result(timeout=1)
+    assert flight.claim('key')[0]
+    assert flight.stats()['in_flight'] == 1
@@ -0,0 +1,54 @@
+import pytest
+import joblib
+import numpy as np
+import pandas as pd
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from tree_ensemble import TreeEnsemble
+
+MEAL_TYPES = ['breakfast', 'lunch', 'dinner', 'snacks', 'desserts']
+
+@pytest.mark.parametrize('meal_type', MEAL_TYPES)
+def test_native_matches_sklearn_exactly(meal_type):
+    """Test array-backed predictions are bit-for-bit equal to sklearn's"""
+    vectorizer = joblib.load(f'{meal_type}/models/vectorizer.joblib')
+    df = pd.read_csv(f'{meal_type}/data/training_data.csv')
+    X = vectorizer.transform(df['description'][:200])
+    
+    for model_path in sorted(Path(f'{meal_type}/models').glob('*_model.joblib')):
+        model = joblib.load(model_path)
+        if hasattr(model, 'n_jobs'):
+            model.n_jobs = 1  # threaded accumulation order isn't deterministic
+        
+        native = TreeEnsemble.from_sklearn(model)
+        assert np.array_equal(native.predict(X), model.predict(X)), f"{model_path} differs"
+        assert np.array_equal(native.predict(X[:1]), model.predict(X[:1]))
+
+def test_native_multi_output_scaled_targets():
+    """Test a joint multi-output model with standardized targets converts exactly"""
+    from sklearn.compose import TransformedTargetRegressor
+    from sklearn.ensemble import RandomForestRegressor
+    from sklearn.preprocessing import StandardScaler
+    
+    rng = np.random.RandomState(0)
+    X = rng.rand(300, 20)
+    Y = np.column_stack([X[:, 0] * 500, X[:, 1] * 30, X[:, 2] * 60, X[:, 3] * 20])
+    
+    model = TransformedTargetRegressor(
+        regressor=RandomForestRegressor(n_estimators=10, random_state=0),
+        transformer=StandardScaler()
+    ).fit(X, Y)
+    
+    native = TreeEnsemble.from_sklearn(model)
+    assert native.predict(X).shape == (300, 4)
+    assert np.array_equal(native.predict(X), model.predict(X))
+
+def test_unsupported_model_rejected():
+    """Test models we can't flatten raise TypeError so callers can fall back"""
+    from sklearn.linear_model import LinearRegression
+    
+    with pytest.raises(TypeError):
+        TreeEnsemble.from_sklearn(LinearRegression())
@@ -0,0 +1,154 @@
+import numpy as np
+
+# Flat, array-backed evaluator for the tree ensembles served by app.py.
+#
+# Every tree of an ensemble is packed into one set of node arrays
+# (feature, threshold, children, value). Leaves point at themselves, so
+# walking all trees for all rows is just max_depth rounds of vectorized
+# gathers, with no per-call sklearn validation or thread-pool dispatch.
+#
+# Predictions are bit-for-bit equal to sklearn's single-threaded predict:
+# features are compared as float32 against float64 thresholds, and tree
+# outputs are accumulated in estimator order exactly as sklearn does.
+
+TREE_LEAF = -1
+
+class TreeEnsemble:
+    """Array-backed regression tree ensemble with a sklearn-like predict"""
+
+    def __init__(self, feature, threshold, children, value, roots, max_depth,
+                 n_features, kind, scale=1.0, base=None, target_mean=None, target_scale=None):
+        self.feature = feature
+        self.threshold = threshold
+        self.children = children      # (n_nodes, 2): [right, left], indexed by "goes left"
+        self.value = value            # (n_nodes, n_outputs)
+        self.roots = roots            # index of each tree's root node
+        self.max_depth = int(max_depth)
+        self.n_features = int(n_features)
+        self.kind = kind              # 'mean' (forest) or 'sum' (gradient boosting)
+        self.scale = float(scale)     # learning rate for 'sum'
+        self.base = base              # initial prediction for 'sum', shape (n_outputs,)
+        self.target_mean = target_mean    # StandardScaler inverse transform, if any
+        self.target_scale = target_scale
+
+    @property
+    def n_outputs(self):
+        return self.value.shape[1]
+
+    @property
+    def n_trees(self):
+        return len(self.roots)
+
+    @classmethod
+    def from_sklearn(cls, model):
+        """Convert a fitted forest, gradient boosting or target-scaled ensemble"""
+        name = type(model).__name__
+
+        if name == 'TransformedTargetRegressor':
+            transformer = model.transformer_
+            if type(transformer).__name__ != 'StandardScaler':
+                raise TypeError(f'Unsupported target transformer: {type(transformer).__name__}')
+            ensemble = cls.from_sklearn(model.regressor_)
+            n_outputs = ensemble.n_outputs
+            ensemble.target_mean = (np.zeros(n_outputs) if transformer.mean_ is None
+                                    else np.asarray(transformer.mean_, dtype=np.float64))
+            ensemble.target_scale = (np.ones(n_outputs) if transformer.scale_ is None
+                                     else np.asarray(transformer.scale_, dtype=np.float64))
+            return ensemble
+
+        if name in ('RandomForestRegressor', 'ExtraTreesRegressor'):
+            trees = [estimator.tree_ for estimator in model.estimators_]
+            return cls._from_trees(trees, model.n_features_in_, kind='mean')
+
+        if name == 'GradientBoostingRegressor':
+            trees = [estimator.tree_ for estimator in model.estimators_[:, 0]]
+            if model.init_ == 'zero':
+                base = np.zeros(1)
+            else:
+                # DummyRegressor-style init: a constant prediction
+                base = np.asarray(model.init_.predict(np.zeros((1, model.n_features_in_))),
+                                  dtype=np.float64).reshape(1)
+            return cls._from_trees(trees, model.n_features_in_, kind='sum',
+                                   scale=model.learning_rate, base=base)
+
+        raise TypeError(f'Unsupported model type: {name}')
+
+    @classmethod
+    def _from_trees(cls, trees, n_features, kind, scale=1.0, base=None):
+        offsets = np.cumsum([0] + [tree.node_count for tree in trees])
+        n_nodes = int(offsets[-1])
+        n_outputs = trees[0].value.shape[1]
+
+        # Native-width indices avoid a conversion on every gather
+        feature = np.zeros(n_nodes, dtype=np.intp)
+        threshold = np.zeros(n_nodes, dtype=np.float64)
+        children = np.zeros((n_nodes, 2), dtype=np.intp)
+        value = np.zeros((n_nodes, n_outputs), dtype=np.float64)
+
+        for tree, offset in zip(trees, offsets[:-1]):
+            nodes = slice(offset, offset + tree.node_count)
+            own_index = np.arange(offset, offset + tree.node_count, dtype=np.intp)
+            is_leaf = tree.children_left == TREE_LEAF
+
+            # Leaves loop back to themselves so extra walk steps are no-ops
+            feature[nodes] = np.where(is_leaf, 0, tree.feature)
+            threshold[nodes] = np.where(is_leaf, 0.0, tree.threshold)
+            children[nodes, 0] = np.where(is_leaf, own_index, tree.children_right + offset)
+            children[nodes, 1] = np.where(is_leaf, own_index, tree.children_left + offset)
+            value[nodes] = tree.value[:, :, 0]
+
+        return cls(
+            feature=feature,
+            threshold=threshold,
+            children=children,
+            value=value,
+            roots=offsets[:-1].astype(np.intp),
+            max_depth=max(tree.max_depth for tree in trees),
+            n_features=n_features,
+            kind=kind,
+            scale=scale,
+            base=base
+        )
+
+    def apply(self, X):
+        """Leaf node index reached in every tree, shape (n_rows, n_trees)"""
+        X = as_float32_rows(X)
+        n_rows, n_features = X.shape
+
+        # Gather from the flattened rows: row_start + feature indexes X directly
+        X_flat = X.ravel()
+        row_start = (np.arange(n_rows) * n_features)[:, None]
+        children = self.children.ravel()
+        node = np.broadcast_to(self.roots, (n_rows, self.n_trees))
+
+        for _ in range(self.max_depth):
+            go_left = X_flat[row_start + self.feature[node]] <= self.threshold[node]
+            node = children[2 * node + go_left].astype(np.intp, copy=False)
+
+        return node
+
+    def predict(self, X):
+        leaf_values = self.value[self.apply(X)]   # (n_rows, n_trees, n_outputs)
+
+        # Accumulate trees in estimator order (cumsum is sequential), matching
+        # sklearn's floating-point summation order exactly
+        if self.kind == 'mean':
+            out = np.cumsum(leaf_values, axis=1)[:, -1, :]
+            out /= self.n_trees
+        else:
+            steps = np.empty((leaf_values.shape[0], self.n_trees + 1, self.n_outputs))
+            steps[:, 0, :] = self.base
+            np.multiply(self.scale, leaf_values, out=steps[:, 1:, :])
+            out = np.cumsum(steps, axis=1)[:, -1, :]
+
+        if self.target_scale is not None:
+            out = out * self.target_scale
+            out += self.target_mean
+
+        return out[:, 0] if self.n_outputs == 1 else out
+
+def as_float32_rows(X):
+    """Dense, C-ordered float32 rows, as sklearn's trees see their input"""
+    if hasattr(X, 'toarray'):
+        X = X.toarray()
+    return np.ascontiguousarray(X, dtype=np.float32).reshape(-1, np.shape(X)[-1])